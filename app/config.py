@@ -10,6 +10,82 @@ class Settings(BaseSettings):
 
     OPENAI_API_KEY: str = ""
     ENVIRONMENT: str = "development"
+    TWITTER_BEARER_TOKEN: str = ""
+    COMMENTS_MAX_WORKERS: int = 8
+    WATERMARK_SQLITE_PATH: str = "data/watermarks.sqlite3"
+
+    # Almacén local de tweets, comentarios y clasificaciones
+    STORAGE_ENABLED: bool = True
+    STORAGE_SQLITE_PATH: str = "data/sentidata.sqlite3"
+
+    # Recolección multi-cuenta (fan-out): límites por ventana de 15 min hasta leer las cabeceras x-rate-limit-*
+    TWITTER_FANOUT_CONCURRENCY: int = 8
+    TWITTER_FANOUT_MAX_WAIT_SECONDS: float = 0.0  # espera máxima por presupuesto antes de dejar la cuenta en cola
+    TWITTER_USER_LOOKUP_LIMIT: int = 300
+    TWITTER_USER_TWEETS_LIMIT: int = 1500
+
+    # Caché de respuestas de /social/collect/twitter (coalescencia + stale-while-revalidate)
+    COLLECT_CACHE_ENABLED: bool = True
+    COLLECT_CACHE_TTL_SECONDS: float = 30.0
+    COLLECT_CACHE_STALE_SECONDS: float = 300.0  # se sirve vencida mientras se refresca en segundo plano
+    COLLECT_CACHE_MAX_ENTRIES: int = 256
+
+    # Pipeline recolección → clasificación → comentarios
+    PIPELINE_QUEUE_SIZE: int = 4
+
+    # Jobs en segundo plano
+    JOB_WORKERS: int = 2
+    JOB_FLUSH_SIZE: int = 200
+    JOBS_SQLITE_PATH: str = "data/jobs.sqlite3"
+    JOB_HEARTBEAT_SECONDS: float = 10.0
+    JOB_STALE_SECONDS: float = 60.0  # sin latido en este tiempo, el proceso dueño se da por muerto
+
+    # Clasificación por lotes
+    ANALYSIS_LLM_BACKEND: str = "openai"  # "openai" o "stub" (offline)
+    ANALYSIS_BATCH_SIZE: int = 25
+    ANALYSIS_MAX_CONCURRENCY: int = 4
+    ANALYSIS_MAX_INPUT_TOKENS: int = 8000  # tokens de entrada por request (además del límite del modelo)
+    ANALYSIS_MAX_ITEM_TOKENS: int = 512  # los textos más largos se recortan
+
+    # Caché de clasificaciones (LRU en memoria + SQLite en disco)
+    CACHE_ENABLED: bool = True
+    CACHE_SQLITE_PATH: str = "data/classification_cache.sqlite3"  # vacío = solo memoria
+    CACHE_MEMORY_MAX_ENTRIES: int = 10000
+    CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+
+    # Cliente LLM asíncrono (0 = sin límite de tasa)
+    LLM_MAX_IN_FLIGHT: int = 32
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_RPM_LIMIT: int = 500
+    LLM_TPM_LIMIT: int = 200000
+    LLM_MAX_RETRIES: int = 5
+    LLM_TIMEOUT_SECONDS: float = 30.0
+
+    # Pre-filtro local en cascada (solo los textos inciertos van al LLM)
+    PREFILTER_ENABLED: bool = True
+    PREFILTER_LOW_THRESHOLD: float = 0.1
+    PREFILTER_HIGH_THRESHOLD: float = 0.7
+    PREFILTER_MODEL_PATH: str = "data/prefilter_model.npz"
+
+    # Datos sintéticos del modo mock (misma semilla = mismos datos)
+    MOCK_SEED: int = 42
+    MOCK_TWEETS_PER_DAY: float = 24.0
+    MOCK_DUPLICATE_RATE: float = 0.1
+    MOCK_RELEVANT_RATIO: float = 0.3
+    MOCK_LANGUAGES: str = "es:0.9,en:0.07,pt:0.03"
+    MOCK_MAX_REPLIES: int = 50
+
+    # Exportación masiva (NDJSON / CSV / Parquet) y destinos por lotes
+    EXPORT_CHUNK_SIZE: int = 5000  # filas leídas y escritas por bloque
+    EXPORT_PARQUET_COMPRESSION: str = "zstd"
+    EXPORT_SINK_BATCH_ROWS: int = 5000  # filas por escritura a un destino tipo planilla
+    EXPORT_DIR: str = "data/exports"
+
+    # Métricas: cabecera Server-Timing en todas las respuestas (o solo si la request envía "X-Timing: 1")
+    METRICS_TIMING_HEADER: bool = False
+
+    # Respuestas: comprimir con gzip (si el cliente envía "Accept-Encoding: gzip") a partir de este tamaño en bytes; 0 = desactivado
+    RESPONSE_GZIP_MIN_BYTES: int = 1024
 
     model_config = SettingsConfigDict(
         env_file=".env",
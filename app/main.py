@@ -1,7 +1,23 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.routing import Match
 from app.modules.social.routes import router as social_router
 from app.modules.analysis.routes import router as analysis_router
+from app.modules.pipeline.routes import router as pipeline_router
+from app.modules.storage.routes import router as storage_router
+from app.modules.jobs.routes import router as jobs_router
+from app.modules.metrics.routes import router as metrics_router
+from app.modules.export.routes import router as export_router
+from app.modules.metrics.metrics_service import (
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    format_server_timing,
+    request_timings,
+)
+from app.modules.jobs.job_service import get_job_manager
+from app.modules.analysis.llm_client import close_async_llm_client
 from app.config import settings
 
 app = FastAPI(
@@ -23,6 +39,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.RESPONSE_GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.RESPONSE_GZIP_MIN_BYTES)
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """
+    Mide latencia y requests en curso por endpoint y, si se pide, agrega la cabecera
+    Server-Timing con el desglose por etapa (twitter, llm, rate_limit, ... y el resto en "app").
+    En respuestas en streaming la latencia medida es hasta el envío de las cabeceras.
+    """
+    # Plantilla de la ruta ("/jobs/{job_id}") para no crear una serie por ID; las rutas
+    # inexistentes comparten una sola serie
+    route = "unmatched"
+    for candidate in app.router.routes:
+        match, _ = candidate.matches(request.scope)
+        if match == Match.FULL:
+            route = getattr(candidate, "path", request.url.path)
+            break
+
+    token = request_timings.set({})
+    timings = request_timings.get()
+    HTTP_IN_FLIGHT.inc(route=route)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        HTTP_IN_FLIGHT.dec(route=route)
+        HTTP_LATENCY.observe(elapsed, method=request.method, route=route, status=str(status))
+        request_timings.reset(token)
+
+    if settings.METRICS_TIMING_HEADER or request.headers.get("x-timing") == "1":
+        response.headers["Server-Timing"] = format_server_timing(timings, elapsed)
+    return response
+
+
+@app.on_event("startup")
+async def startup():
+    await get_job_manager().start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await get_job_manager().stop()
+    await close_async_llm_client()
+
+
 @app.get("/")
 def root():
     return {
@@ -39,6 +104,11 @@ def root():
 # app.include_router(gsheet_router, prefix="/gsheet", tags=["Google Sheets"])
 app.include_router(social_router, prefix="/social", tags=["Social"])
 app.include_router(analysis_router, prefix="/analysis", tags=["Analysis"])
+app.include_router(pipeline_router, prefix="/pipeline", tags=["Pipeline"])
+app.include_router(storage_router, prefix="/storage", tags=["Storage"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+app.include_router(export_router, prefix="/export", tags=["Export"])
+app.include_router(metrics_router, tags=["Metrics"])
 
 if __name__ == "__main__":
     import uvicorn
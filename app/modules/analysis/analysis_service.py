@@ -1,16 +1,45 @@
-from openai import OpenAI
+import asyncio
+import re
+from typing import Dict, List, Optional
 from app.config import settings
+from app.modules.analysis.budget_service import (
+    MESSAGE_OVERHEAD_TOKENS,
+    count_tokens,
+    input_budget,
+    pack_by_tokens,
+    truncate_to_tokens,
+)
+from app.modules.analysis.cache_service import get_classification_cache
+from app.modules.analysis.llm_client import get_async_llm_client
+from app.modules.metrics.metrics_service import record_llm_usage, timed
+from app.providers import get_openai_client
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# Versión del criterio de clasificación; cambiarla invalida la caché.
+PROMPT_VERSION = "mivivienda-v1"
 
-def classify_relevance_for_mivivienda(text: str, model: str = "gpt-4o-mini") -> str:
+LABEL_RELEVANT = "RELEVANTE"
+LABEL_NOT_RELEVANT = "NO RELEVANTE"
+LABEL_ERROR = "ERROR"
+
+# Salida esperada de una clasificación individual ("NO RELEVANTE")
+LABEL_OUTPUT_TOKENS = 8
+
+
+def normalize_label(raw: Optional[str]) -> str:
     """
-    Analiza un solo texto utilizando un modelo LLM de OpenAI.
-    Determina si el contenido es relevante para el Ministerio de Vivienda.
+    Normaliza una etiqueta devuelta por el modelo a RELEVANTE / NO RELEVANTE / ERROR.
     """
-    if not text:
-        return "No se proporcionó texto"
+    if not isinstance(raw, str):
+        return LABEL_ERROR
+    label = re.sub(r"[^A-ZÁÉÍÓÚÑ ]", "", raw.upper()).strip()
+    if label.startswith("NO RELEVANTE") or label == "NO":
+        return LABEL_NOT_RELEVANT
+    if label.startswith("RELEVANTE"):
+        return LABEL_RELEVANT
+    return LABEL_ERROR
+
 
+def build_messages(text: str) -> List[Dict[str, str]]:
     prompt = f"""
 Eres un analista del Ministerio de Vivienda, Construcción y Saneamiento del Perú.
 Tu tarea es determinar si un texto o publicación es RELEVANTE o NO RELEVANTE
@@ -23,21 +52,120 @@ Responde solo con una de las siguientes opciones:
 Texto a analizar:
 {text}
 """
+    return [
+        {"role": "system", "content": "Eres un experto analista en clasificación de contenido para entidades del Estado peruano."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def plan_combined_chunks(texts: List[str], model: str = "gpt-4o-mini") -> Dict:
+    """
+    Divide un análisis combinado (todos los textos en un solo prompt) en bloques de textos
+    consecutivos que caben en el presupuesto de entrada, recortando los textos muy largos.
+    Devuelve el texto de cada bloque, cuántos textos incluye, los tokens estimados
+    (entrada, salida) de cada request y cuántos textos se recortaron.
+    """
+    overhead = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in build_messages(""))
+    budget = input_budget(model, LABEL_OUTPUT_TOKENS)
+
+    prepared: List[str] = []
+    truncated = 0
+    for text in texts:
+        text, cut = truncate_to_tokens(text, min(settings.ANALYSIS_MAX_ITEM_TOKENS, budget - overhead))
+        truncated += cut
+        prepared.append(text)
+    item_tokens = [count_tokens(text) + 1 for text in prepared]
+
+    groups = pack_by_tokens(item_tokens, overhead, budget)
+    return {
+        "chunks": ["\n".join(prepared[i] for i in group) for group in groups],
+        "sizes": [len(group) for group in groups],
+        "requests": [(overhead + sum(item_tokens[i] for i in group), LABEL_OUTPUT_TOKENS) for group in groups],
+        "truncated": truncated,
+    }
+
+
+def combine_labels(contents: List[str]) -> str:
+    """
+    Etiqueta del conjunto a partir de las de cada bloque: RELEVANTE si algún bloque lo es,
+    NO RELEVANTE si todos lo son y ERROR en otro caso.
+    """
+    labels = [normalize_label(content) for content in contents]
+    if LABEL_RELEVANT in labels:
+        return LABEL_RELEVANT
+    if labels and all(label == LABEL_NOT_RELEVANT for label in labels):
+        return LABEL_NOT_RELEVANT
+    return LABEL_ERROR
+
+
+def _store(cache, text: str, model: str, content: str) -> str:
+    """
+    Normaliza la respuesta y la guarda en la caché si es válida. Devuelve la etiqueta
+    normalizada, igual que un acierto de caché.
+    """
+    label = normalize_label(content)
+    if cache is not None and label != LABEL_ERROR:
+        cache.set(text, model, PROMPT_VERSION, label)
+    return label
+
+
+def classify_relevance_for_mivivienda(text: str, model: str = "gpt-4o-mini", use_cache: bool = True) -> str:
+    """
+    Analiza un solo texto utilizando un modelo LLM de OpenAI.
+    Determina si el contenido es relevante para el Ministerio de Vivienda.
+    Las respuestas válidas se guardan en la caché de clasificaciones.
+    """
+    if not text:
+        return "No se proporcionó texto"
+
+    cache = get_classification_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(text, model, PROMPT_VERSION)
+        if cached is not None:
+            return cached
 
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Eres un experto analista en clasificación de contenido para entidades del Estado peruano."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0,
-        )
+        with timed("llm.chat_completion"):
+            response = get_openai_client().chat.completions.create(
+                model=model,
+                messages=build_messages(text),
+                temperature=0,
+            )
+        record_llm_usage(model, getattr(response, "usage", None))
 
         message = response.choices[0].message if response.choices else None
         content = getattr(message, "content", None)
 
-        return content.strip() if isinstance(content, str) else "No se obtuvo respuesta del modelo."
+        if not isinstance(content, str):
+            return "No se obtuvo respuesta del modelo."
+
+        return _store(cache, text, model, content.strip())
+
+    except Exception as e:
+        return f"Error al analizar el texto: {str(e)}"
+
+
+async def classify_relevance_for_mivivienda_async(text: str, model: str = "gpt-4o-mini", use_cache: bool = True) -> str:
+    """
+    Versión asíncrona de `classify_relevance_for_mivivienda`.
+    Usa el cliente asíncrono compartido (pool de conexiones, límites de tasa y reintentos)
+    y no bloquea el event loop ni un hilo del threadpool mientras espera al modelo.
+    """
+    if not text:
+        return "No se proporcionó texto"
+
+    cache = get_classification_cache() if use_cache else None
+    if cache is not None:
+        # La caché es SQLite síncrono: se consulta fuera del event loop
+        cached = await asyncio.to_thread(cache.get, text, model, PROMPT_VERSION)
+        if cached is not None:
+            return cached
+
+    try:
+        content = await get_async_llm_client().complete(build_messages(text), model)
+        if not content:
+            return "No se obtuvo respuesta del modelo."
+        return await asyncio.to_thread(_store, cache, text, model, content.strip())
 
     except Exception as e:
         return f"Error al analizar el texto: {str(e)}"
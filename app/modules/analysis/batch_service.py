@@ -0,0 +1,422 @@
+# app/modules/analysis/batch_service.py
+import asyncio
+import inspect
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Generator, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.modules.analysis.analysis_service import (
+    LABEL_ERROR,
+    LABEL_NOT_RELEVANT,
+    LABEL_RELEVANT,
+    PROMPT_VERSION,
+    normalize_label,
+)
+from app.modules.analysis.budget_service import (
+    MESSAGE_OVERHEAD_TOKENS,
+    count_tokens,
+    estimate_cost,
+    get_model_profile,
+    input_budget,
+    pack_by_tokens,
+    truncate_to_tokens,
+)
+from app.modules.analysis.cache_service import get_classification_cache
+from app.modules.analysis.llm_client import get_async_llm_client
+from app.modules.metrics.metrics_service import record_llm_usage, timed
+from app.providers import get_openai_client
+
+# Un "chat model" recibe los mensajes y el nombre del modelo y devuelve el texto de la respuesta.
+ChatModel = Callable[[List[Dict[str, str]], str], str]
+AsyncChatModel = Callable[[List[Dict[str, str]], str], Awaitable[str]]
+
+SYSTEM_PROMPT = "Eres un experto analista en clasificación de contenido para entidades del Estado peruano."
+
+BATCH_PROMPT = """
+Eres un analista del Ministerio de Vivienda, Construcción y Saneamiento del Perú.
+Tu tarea es determinar, para CADA texto de la lista, si es RELEVANTE o NO RELEVANTE
+para los intereses del ministerio.
+
+Responde únicamente con un objeto JSON con la forma:
+{{"resultados": [{{"indice": 0, "etiqueta": "RELEVANTE"}}, {{"indice": 1, "etiqueta": "NO RELEVANTE"}}]}}
+
+Incluye exactamente un resultado por cada índice recibido.
+
+{marker}
+{items}
+"""
+
+ITEMS_MARKER = "Textos a analizar (JSON):"
+
+# Salida esperada por lote: ~16 tokens por resultado ({"indice": n, "etiqueta": "..."}) más el envoltorio
+ITEM_OUTPUT_TOKENS = 16
+BATCH_OUTPUT_OVERHEAD_TOKENS = 8
+
+# Palabras clave usadas por el modelo simulado (modo offline).
+STUB_KEYWORDS = (
+    "vivienda", "construcción", "construccion", "saneamiento", "agua potable",
+    "desagüe", "desague", "alcantarillado", "techo propio", "mivivienda",
+    "edificación", "edificacion", "obra", "urbano", "urbana", "habilitación",
+    "terreno", "bono familiar", "infraestructura", "pistas y veredas",
+)
+
+
+def openai_chat_model(messages: List[Dict[str, str]], model: str) -> str:
+    """
+    Chat model por defecto: llama a OpenAI pidiendo salida JSON estructurada.
+    """
+    with timed("llm.chat_completion"):
+        response = get_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+    record_llm_usage(model, getattr(response, "usage", None))
+    message = response.choices[0].message if response.choices else None
+    content = getattr(message, "content", None)
+    return content if isinstance(content, str) else ""
+
+
+async def openai_async_chat_model(messages: List[Dict[str, str]], model: str) -> str:
+    """
+    Chat model asíncrono: usa el cliente compartido con límites de tasa y reintentos.
+    """
+    return await get_async_llm_client().complete(messages, model, json_output=True)
+
+
+class StubChatModel:
+    """
+    Modelo simulado y determinista para pruebas sin conexión.
+    Marca como RELEVANTE todo texto que contenga alguna palabra clave del sector.
+    Registra cada llamada en `calls` para poder contar los round-trips.
+    """
+
+    def __init__(self, keywords: tuple = STUB_KEYWORDS):
+        self.keywords = tuple(k.lower() for k in keywords)
+        self.calls: List[int] = []
+
+    def __call__(self, messages: List[Dict[str, str]], model: str) -> str:
+        items = _extract_items(messages[-1]["content"])
+        self.calls.append(len(items))
+        results = []
+        for item in items:
+            text = str(item.get("texto", "")).lower()
+            relevant = any(k in text for k in self.keywords)
+            results.append({
+                "indice": item.get("indice"),
+                "etiqueta": LABEL_RELEVANT if relevant else LABEL_NOT_RELEVANT,
+            })
+        return json.dumps({"resultados": results}, ensure_ascii=False)
+
+
+def _extract_items(prompt: str) -> List[Dict]:
+    _, _, payload = prompt.partition(ITEMS_MARKER)
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return []
+
+
+def get_chat_model(name: Optional[str] = None) -> ChatModel:
+    """
+    Devuelve el chat model configurado ("openai" o "stub").
+    """
+    backend = (name or settings.ANALYSIS_LLM_BACKEND).lower()
+    if backend == "stub":
+        return StubChatModel()
+    return openai_chat_model
+
+
+def get_async_chat_model(name: Optional[str] = None) -> AsyncChatModel:
+    """
+    Devuelve el chat model asíncrono configurado ("openai" o "stub").
+    """
+    backend = (name or settings.ANALYSIS_LLM_BACKEND).lower()
+    if backend == "stub":
+        return as_async_chat_model(StubChatModel())
+    return openai_async_chat_model
+
+
+def as_async_chat_model(chat_model: Union[ChatModel, AsyncChatModel]) -> AsyncChatModel:
+    """
+    Adapta un chat model síncrono (p. ej. StubChatModel) a la interfaz asíncrona.
+    """
+    if inspect.iscoroutinefunction(chat_model) or inspect.iscoroutinefunction(getattr(chat_model, "__call__", None)):
+        return chat_model
+
+    async def wrapper(messages: List[Dict[str, str]], model: str) -> str:
+        return chat_model(messages, model)
+
+    return wrapper
+
+
+def build_batch_messages(texts: List[str]) -> List[Dict[str, str]]:
+    items = [{"indice": i, "texto": text} for i, text in enumerate(texts)]
+    prompt = BATCH_PROMPT.format(marker=ITEMS_MARKER, items=json.dumps(items, ensure_ascii=False))
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def parse_batch_labels(content: str, expected: int) -> List[Optional[str]]:
+    """
+    Interpreta la respuesta JSON del modelo. Devuelve una lista de `expected` etiquetas,
+    con None en los índices que el modelo no devolvió o que no se pudieron interpretar.
+    """
+    labels: List[Optional[str]] = [None] * expected
+    try:
+        payload = json.loads(content)
+    except (TypeError, ValueError):
+        return labels
+
+    results = payload.get("resultados", []) if isinstance(payload, dict) else payload
+    if not isinstance(results, list):
+        return labels
+
+    for position, item in enumerate(results):
+        if isinstance(item, dict):
+            index = item.get("indice", position)
+            raw = item.get("etiqueta")
+        else:
+            index, raw = position, item
+        if isinstance(index, int) and 0 <= index < expected:
+            label = normalize_label(raw)
+            if label != LABEL_ERROR:
+                labels[index] = label
+    return labels
+
+
+def _missing(labels: List[Optional[str]]) -> List[int]:
+    return [i for i, label in enumerate(labels) if label is None]
+
+
+def _batch_rounds(texts: List[str]) -> Generator[List[Dict[str, str]], Optional[str], List[str]]:
+    """
+    Llamadas de un lote, independientes del transporte: entrega los mensajes de cada llamada
+    y recibe el texto de la respuesta (None si la llamada falló). Primero va el lote completo;
+    los índices que falten en la respuesta se reintentan una vez en un lote reducido.
+    Devuelve las etiquetas finales (ERROR en las que sigan faltando).
+    """
+    labels = parse_batch_labels((yield build_batch_messages(texts)), len(texts))
+
+    missing = _missing(labels)
+    if missing and len(missing) < len(texts):
+        retry = parse_batch_labels((yield build_batch_messages([texts[i] for i in missing])), len(missing))
+        for i, label in zip(missing, retry):
+            labels[i] = label
+
+    return [label or LABEL_ERROR for label in labels]
+
+
+def classify_batch(texts: List[str], model: str, chat_model: ChatModel) -> List[str]:
+    """
+    Clasifica un lote de textos en una sola llamada al modelo (más un reintento de los
+    índices faltantes, ver `_batch_rounds`).
+    """
+    rounds = _batch_rounds(texts)
+    messages = next(rounds)
+    while True:
+        try:
+            content = chat_model(messages, model)
+        except Exception:
+            content = None
+        try:
+            messages = rounds.send(content)
+        except StopIteration as done:
+            return done.value
+
+
+async def classify_batch_async(texts: List[str], model: str, chat_model: AsyncChatModel) -> List[str]:
+    """
+    Versión asíncrona de `classify_batch`: solo cambia la llamada al modelo.
+    """
+    rounds = _batch_rounds(texts)
+    messages = next(rounds)
+    while True:
+        try:
+            content = await chat_model(messages, model)
+        except Exception:
+            content = None
+        try:
+            messages = rounds.send(content)
+        except StopIteration as done:
+            return done.value
+
+
+def chunk(items: List, size: int) -> List[List]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def plan_batches(texts: List[str], model: str, batch_size: Optional[int] = None) -> Dict:
+    """
+    Arma los lotes por presupuesto de tokens y no solo por cantidad: cada lote respeta
+    `batch_size`, ANALYSIS_MAX_INPUT_TOKENS, la ventana de contexto y la salida máxima del modelo.
+    Los textos de más de ANALYSIS_MAX_ITEM_TOKENS se recortan.
+    Devuelve los lotes (en orden), los tokens estimados (entrada, salida) de cada request
+    y cuántos textos se recortaron.
+    """
+    batch_size = batch_size or settings.ANALYSIS_BATCH_SIZE
+    profile, _ = get_model_profile(model)
+    max_output = int(profile["max_output_tokens"])
+    reserved_output = min(max_output, BATCH_OUTPUT_OVERHEAD_TOKENS + batch_size * ITEM_OUTPUT_TOKENS)
+    budget = input_budget(model, reserved_output)
+    overhead = _batch_overhead_tokens()
+
+    prepared: List[str] = []
+    truncated = 0
+    for text in texts:
+        text, cut = truncate_to_tokens(text, min(settings.ANALYSIS_MAX_ITEM_TOKENS, budget - overhead))
+        truncated += cut
+        prepared.append(text)
+    item_tokens = [
+        count_tokens(json.dumps({"indice": batch_size, "texto": text}, ensure_ascii=False)) + 1
+        for text in prepared
+    ]
+
+    groups = pack_by_tokens(
+        item_tokens, overhead, budget, max_items=batch_size,
+        output_tokens_per_item=ITEM_OUTPUT_TOKENS, output_overhead_tokens=BATCH_OUTPUT_OVERHEAD_TOKENS,
+        max_output_tokens=max_output,
+    )
+    return {
+        "batches": [[prepared[i] for i in group] for group in groups],
+        "requests": [
+            (overhead + sum(item_tokens[i] for i in group), BATCH_OUTPUT_OVERHEAD_TOKENS + len(group) * ITEM_OUTPUT_TOKENS)
+            for group in groups
+        ],
+        "truncated": truncated,
+    }
+
+
+_overhead_tokens: Optional[int] = None
+
+
+def _batch_overhead_tokens() -> int:
+    global _overhead_tokens
+    if _overhead_tokens is None:
+        messages = build_batch_messages([])
+        _overhead_tokens = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+    return _overhead_tokens
+
+
+def estimate_batched(texts: List[str], model: str = "gpt-4o-mini", batch_size: Optional[int] = None,
+                     use_cache: bool = True) -> Dict:
+    """
+    Simula `classify_relevance_batched_async` sin llamar al modelo: descuenta aciertos de caché
+    y textos repetidos, arma los lotes y estima tokens, costo y latencia.
+    """
+    cache = get_classification_cache() if use_cache else None
+    labels, pending = _plan(texts, model, cache)
+    plan = plan_batches(list(pending), model, batch_size)
+    return {
+        **estimate_cost(model, plan["requests"]),
+        "texts": len(texts),
+        "cached": sum(1 for label in labels if label is not None),
+        "duplicates": sum(len(indices) - 1 for indices in pending.values()),
+        "to_classify": len(pending),
+        "batch_sizes": [len(batch) for batch in plan["batches"]],
+        "truncated": plan["truncated"],
+    }
+
+
+def _plan(texts: List[str], model: str, cache) -> Tuple[List[Optional[str]], Dict[str, List[int]]]:
+    """
+    Resuelve desde la caché lo que se pueda y agrupa los textos pendientes idénticos
+    ({texto: [índices]}) para enviarlos una sola vez al modelo.
+    """
+    labels: List[Optional[str]] = [None] * len(texts)
+    if cache is not None:
+        for i, label in cache.get_many(texts, model, PROMPT_VERSION).items():
+            labels[i] = label
+
+    pending: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if labels[i] is None:
+            pending.setdefault(text, []).append(i)
+    return labels, pending
+
+
+def _merge(labels: List[Optional[str]], pending: Dict[str, List[int]], fresh: List[str], model: str, cache) -> List[str]:
+    unique_texts = list(pending)
+    for text, label in zip(unique_texts, fresh):
+        for i in pending[text]:
+            labels[i] = label
+
+    if cache is not None:
+        valid = [(text, label) for text, label in zip(unique_texts, fresh) if label != LABEL_ERROR]
+        if valid:
+            cache.set_many([t for t, _ in valid], [l for _, l in valid], model, PROMPT_VERSION)
+
+    return labels
+
+
+def classify_relevance_batched(
+    texts: List[str],
+    model: str = "gpt-4o-mini",
+    batch_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    chat_model: Optional[ChatModel] = None,
+    use_cache: bool = True,
+) -> List[str]:
+    """
+    Clasifica cada texto por separado agrupándolos en lotes de hasta `batch_size` por llamada
+    (dentro del presupuesto de tokens, ver `plan_batches`) y ejecutando varios lotes en paralelo.
+    Devuelve una etiqueta por texto, en el mismo orden.
+    Los textos ya clasificados se toman de la caché y los textos repetidos se envían una sola vez.
+    """
+    if not texts:
+        return []
+
+    batch_size = batch_size or settings.ANALYSIS_BATCH_SIZE
+    max_workers = max_workers or settings.ANALYSIS_MAX_CONCURRENCY
+    chat_model = chat_model or get_chat_model()
+    cache = get_classification_cache() if use_cache else None
+
+    labels, pending = _plan(texts, model, cache)
+    if not pending:
+        return labels
+
+    batches = plan_batches(list(pending), model, batch_size)["batches"]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+        results = pool.map(lambda batch: classify_batch(batch, model, chat_model), batches)
+
+    fresh: List[str] = []
+    for batch_labels in results:
+        fresh.extend(batch_labels)
+    return _merge(labels, pending, fresh, model, cache)
+
+
+async def classify_relevance_batched_async(
+    texts: List[str],
+    model: str = "gpt-4o-mini",
+    batch_size: Optional[int] = None,
+    chat_model: Optional[Union[ChatModel, AsyncChatModel]] = None,
+    use_cache: bool = True,
+) -> List[str]:
+    """
+    Versión asíncrona de `classify_relevance_batched`: todos los lotes se lanzan a la vez
+    y el cliente compartido limita cuántos quedan en vuelo y a qué ritmo.
+    """
+    if not texts:
+        return []
+
+    batch_size = batch_size or settings.ANALYSIS_BATCH_SIZE
+    chat_model = as_async_chat_model(chat_model) if chat_model else get_async_chat_model()
+    cache = get_classification_cache() if use_cache else None
+
+    # La caché es SQLite síncrono: se consulta fuera del event loop
+    labels, pending = await asyncio.to_thread(_plan, texts, model, cache)
+    if not pending:
+        return labels
+
+    batches = plan_batches(list(pending), model, batch_size)["batches"]
+    results = await asyncio.gather(*(classify_batch_async(batch, model, chat_model) for batch in batches))
+
+    fresh: List[str] = []
+    for batch_labels in results:
+        fresh.extend(batch_labels)
+    return await asyncio.to_thread(_merge, labels, pending, fresh, model, cache)
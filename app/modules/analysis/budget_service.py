@@ -0,0 +1,138 @@
+# app/modules/analysis/budget_service.py
+import math
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+# Aproximación de tokens por caracteres (misma base que `llm_client.estimate_tokens`)
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_SUFFIX = " …"
+
+# Perfil por modelo: ventana de contexto, salida máxima, precio (USD por millón de tokens)
+# y velocidad aproximada, usada solo para estimar latencia.
+MODEL_PROFILES: Dict[str, Dict[str, float]] = {
+    "gpt-4o-mini": {"context_tokens": 128000, "max_output_tokens": 16384,
+                    "input_usd_per_1m": 0.15, "output_usd_per_1m": 0.60,
+                    "base_latency_s": 0.4, "input_tokens_per_s": 20000, "output_tokens_per_s": 90},
+    "gpt-4o": {"context_tokens": 128000, "max_output_tokens": 16384,
+               "input_usd_per_1m": 2.50, "output_usd_per_1m": 10.00,
+               "base_latency_s": 0.5, "input_tokens_per_s": 10000, "output_tokens_per_s": 60},
+    "gpt-4.1-mini": {"context_tokens": 1047576, "max_output_tokens": 32768,
+                     "input_usd_per_1m": 0.40, "output_usd_per_1m": 1.60,
+                     "base_latency_s": 0.4, "input_tokens_per_s": 20000, "output_tokens_per_s": 90},
+    "gpt-4.1-nano": {"context_tokens": 1047576, "max_output_tokens": 32768,
+                     "input_usd_per_1m": 0.10, "output_usd_per_1m": 0.40,
+                     "base_latency_s": 0.3, "input_tokens_per_s": 30000, "output_tokens_per_s": 120},
+    "gpt-4.1": {"context_tokens": 1047576, "max_output_tokens": 32768,
+                "input_usd_per_1m": 2.00, "output_usd_per_1m": 8.00,
+                "base_latency_s": 0.5, "input_tokens_per_s": 10000, "output_tokens_per_s": 60},
+}
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def get_model_profile(model: str) -> Tuple[Dict[str, float], bool]:
+    """
+    Devuelve el perfil del modelo y si es conocido. Para modelos desconocidos
+    (o versiones fechadas, p. ej. "gpt-4o-mini-2024-07-18") se usa el prefijo más largo
+    que coincida o, en último caso, el perfil por defecto.
+    """
+    if model in MODEL_PROFILES:
+        return MODEL_PROFILES[model], True
+    for name in sorted(MODEL_PROFILES, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PROFILES[name], True
+    return MODEL_PROFILES[DEFAULT_MODEL], False
+
+
+def count_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Recorta `text` para que no supere `max_tokens`, cortando en el último espacio.
+    Devuelve el texto y si hubo recorte.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    limit = max(1, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_SUFFIX))
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut + TRUNCATION_SUFFIX, True
+
+
+def input_budget(model: str, output_tokens: int) -> int:
+    """
+    Tokens de entrada admitidos por request: el tope configurado, sin exceder
+    la ventana de contexto del modelo menos la salida reservada.
+    """
+    profile, _ = get_model_profile(model)
+    return max(1, min(settings.ANALYSIS_MAX_INPUT_TOKENS, int(profile["context_tokens"]) - output_tokens))
+
+
+def pack_by_tokens(item_tokens: List[int], overhead_tokens: int, max_input_tokens: int,
+                   max_items: Optional[int] = None, output_tokens_per_item: int = 0,
+                   output_overhead_tokens: int = 0, max_output_tokens: Optional[int] = None) -> List[List[int]]:
+    """
+    Agrupa ítems consecutivos (conservando el orden) en bloques que respetan el presupuesto
+    de entrada (`overhead_tokens` + tokens de cada ítem), la salida esperada y `max_items`.
+    Devuelve los índices de cada bloque. Un ítem que por sí solo excede el presupuesto
+    va en un bloque propio (debe recortarse antes).
+    """
+    groups: List[List[int]] = []
+    current: List[int] = []
+    used = overhead_tokens
+    for i, tokens in enumerate(item_tokens):
+        output = output_overhead_tokens + (len(current) + 1) * output_tokens_per_item
+        fits = (
+            used + tokens <= max_input_tokens
+            and (max_items is None or len(current) < max_items)
+            and (max_output_tokens is None or output <= max_output_tokens)
+        )
+        if current and not fits:
+            groups.append(current)
+            current, used = [], overhead_tokens
+        current.append(i)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def estimate_cost(model: str, requests: List[Tuple[int, int]], concurrency: Optional[int] = None) -> Dict:
+    """
+    Estima costo y latencia de un conjunto de requests ((tokens de entrada, tokens de salida) por request).
+    La latencia considera las requests en paralelo (`concurrency`) y los límites RPM / TPM configurados.
+    """
+    profile, known = get_model_profile(model)
+    concurrency = max(1, concurrency or settings.LLM_MAX_IN_FLIGHT)
+    input_tokens = sum(i for i, _ in requests)
+    output_tokens = sum(o for _, o in requests)
+
+    cost = (input_tokens * profile["input_usd_per_1m"] + output_tokens * profile["output_usd_per_1m"]) / 1_000_000
+
+    durations = sorted(
+        (profile["base_latency_s"] + i / profile["input_tokens_per_s"] + o / profile["output_tokens_per_s"]
+         for i, o in requests),
+        reverse=True,
+    )
+    # Tandas de `concurrency` requests; cada tanda dura lo que su request más lenta
+    latency = sum(durations[start] for start in range(0, len(durations), concurrency))
+    if settings.LLM_RPM_LIMIT > 0:
+        latency = max(latency, 60.0 * (len(requests) - settings.LLM_RPM_LIMIT) / settings.LLM_RPM_LIMIT)
+    if settings.LLM_TPM_LIMIT > 0:
+        latency = max(latency, 60.0 * (input_tokens - settings.LLM_TPM_LIMIT) / settings.LLM_TPM_LIMIT)
+
+    return {
+        "model": model,
+        "pricing_known": known,
+        "requests": len(requests),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(cost, 6),
+        "latency_seconds": round(latency, 2),
+        "max_request_input_tokens": max((i for i, _ in requests), default=0),
+    }
@@ -0,0 +1,224 @@
+# app/modules/analysis/cache_service.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+_RT_PREFIX = re.compile(r"^rt @\w+:\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para usarlo como clave de caché:
+    Unicode NFKC, minúsculas, sin prefijo "RT @usuario:" y con espacios colapsados.
+    """
+    normalized = unicodedata.normalize("NFKC", text or "").lower().strip()
+    normalized = _RT_PREFIX.sub("", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    raw = f"{prompt_version}\x1f{model}\x1f{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """
+    Caché de clasificaciones en dos niveles:
+    - LRU en memoria acotado a `max_entries`.
+    - SQLite en disco (compartido entre reinicios y workers), opcional si `path` es vacío.
+    Ambas capas respetan el TTL en segundos (`ttl_seconds <= 0` desactiva la expiración).
+    """
+
+    def __init__(self, path: str = "", max_entries: int = 10000, ttl_seconds: int = 0):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classification_cache (
+                    key TEXT PRIMARY KEY,
+                    label TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_expires ON classification_cache(expires_at)"
+            )
+            self._conn.commit()
+
+    # ---------------- helpers internos ----------------
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return now + self.ttl_seconds if self.ttl_seconds > 0 else None
+
+    def _remember(self, key: str, label: str, expires_at: Optional[float]) -> None:
+        self._memory[key] = (label, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _lookup(self, key: str, now: float) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            label, expires_at = entry
+            if expires_at is None or expires_at > now:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return label
+            del self._memory[key]
+            self.counters["expired"] += 1
+
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT label, expires_at FROM classification_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                label, expires_at = row
+                if expires_at is None or expires_at > now:
+                    self._remember(key, label, expires_at)
+                    self.counters["disk_hits"] += 1
+                    return label
+                self.counters["expired"] += 1
+
+        self.counters["misses"] += 1
+        return None
+
+    # ---------------- API pública ----------------
+
+    def get(self, text: str, model: str, prompt_version: str) -> Optional[str]:
+        key = make_cache_key(text, model, prompt_version)
+        with self._lock:
+            return self._lookup(key, time.time())
+
+    def get_many(self, texts: List[str], model: str, prompt_version: str) -> Dict[int, str]:
+        """
+        Busca varios textos a la vez. Devuelve {índice: etiqueta} solo para los aciertos.
+        """
+        now = time.time()
+        found: Dict[int, str] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                label = self._lookup(make_cache_key(text, model, prompt_version), now)
+                if label is not None:
+                    found[i] = label
+        return found
+
+    def set(self, text: str, model: str, prompt_version: str, label: str) -> None:
+        self.set_many([text], [label], model, prompt_version)
+
+    def set_many(self, texts: List[str], labels: List[str], model: str, prompt_version: str) -> None:
+        now = time.time()
+        expires_at = self._expiry(now)
+        rows = []
+        with self._lock:
+            for text, label in zip(texts, labels):
+                key = make_cache_key(text, model, prompt_version)
+                self._remember(key, label, expires_at)
+                rows.append((key, label, model, prompt_version, now, expires_at))
+            self.counters["writes"] += len(rows)
+
+            if self._conn is not None and rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO classification_cache "
+                    "(key, label, model, prompt_version, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+                self._writes += len(rows)
+                if self._writes >= 1000:
+                    self._writes = 0
+                    self._purge_expired(now)
+
+    def _purge_expired(self, now: float) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM classification_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """
+        Elimina del disco las entradas vencidas. Devuelve la cantidad eliminada.
+        """
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._purge_expired(time.time())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM classification_cache")
+                self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            lookups = hits + self.counters["misses"]
+            disk_entries = None
+            if self._conn is not None:
+                disk_entries = self._conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0]
+            return {
+                **self.counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.max_entries,
+                "disk_entries": disk_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+_cache: Optional[ClassificationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_classification_cache() -> Optional[ClassificationCache]:
+    """
+    Devuelve la caché compartida del proceso (o None si está desactivada por configuración).
+    """
+    global _cache
+    if not settings.CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ClassificationCache(
+                    path=settings.CACHE_SQLITE_PATH,
+                    max_entries=settings.CACHE_MEMORY_MAX_ENTRIES,
+                    ttl_seconds=settings.CACHE_TTL_SECONDS,
+                )
+    return _cache
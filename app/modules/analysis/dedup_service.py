@@ -0,0 +1,139 @@
+# app/modules/analysis/dedup_service.py
+import re
+import zlib
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.modules.analysis.cache_service import normalize_text
+
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_MENTION = re.compile(r"@\w+")
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Primo mayor que 2**32 para las permutaciones universales de MinHash.
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def normalize_for_dedup(text: str) -> str:
+    """
+    Normaliza un texto para detectar casi-duplicados: sin URLs, @menciones, emojis ni signos.
+    """
+    text = _MENTION.sub(" ", _URL.sub(" ", normalize_text(text)))
+    return _NON_WORD.sub(" ", text).replace("_", " ").strip()
+
+
+def shingles(text: str, k: int = 5) -> np.ndarray:
+    """
+    Conjunto de k-shingles de caracteres (hasheados a 32 bits) de un texto ya normalizado.
+    Se usan caracteres y no palabras porque los comentarios suelen ser muy cortos.
+    """
+    if len(text) <= k:
+        grams = {text}
+    else:
+        grams = {text[i:i + k] for i in range(len(text) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # El representante es siempre el índice menor (primera aparición)
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class MinHashLSH:
+    """
+    Firmas MinHash (`num_perm` permutaciones) indexadas con LSH en `bands` bandas.
+    Dos textos caen en el mismo bucket si coinciden en todas las filas de alguna banda.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.a = rng.integers(1, 2 ** 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        values = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % _PRIME
+        return (values & _MAX_HASH).min(axis=1)
+
+    def signatures(self, texts: List[str], k: int = 5) -> np.ndarray:
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        for i, text in enumerate(texts):
+            out[i] = self.signature(shingles(text, k))
+        return out
+
+    def candidate_buckets(self, signatures: np.ndarray) -> Iterator[List[int]]:
+        """
+        Recorre banda por banda los buckets con más de un miembro (agrupando con NumPy,
+        sin mantener un diccionario de todas las bandas en memoria).
+        """
+        for band in range(self.bands):
+            block = np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+            keys = block.view(np.dtype((np.void, block.dtype.itemsize * self.rows))).ravel()
+            _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            if counts.max() < 2:
+                continue
+            order = np.argsort(inverse.ravel(), kind="stable")
+            for members in np.split(order, np.cumsum(counts)[:-1]):
+                if len(members) > 1:
+                    yield members.tolist()
+
+
+def cluster_near_duplicates(texts: List[str], threshold: float = 0.7, num_perm: int = 64,
+                            bands: int = 16, lsh: Optional[MinHashLSH] = None) -> List[int]:
+    """
+    Agrupa textos casi idénticos. Devuelve, para cada texto, el índice de su representante
+    (la primera aparición del grupo); un texto sin duplicados es su propio representante.
+    Los duplicados exactos tras normalizar se agrupan sin calcular firmas.
+    """
+    normalized = [normalize_for_dedup(t) for t in texts]
+
+    # 1️⃣ Duplicados exactos (tras normalizar)
+    first_seen: Dict[str, int] = {}
+    exact = [first_seen.setdefault(n, i) for i, n in enumerate(normalized)]
+    uniques = list(first_seen.values())
+    if len(uniques) <= 1:
+        return exact
+
+    # 2️⃣ Casi-duplicados con MinHash + LSH sobre los textos únicos
+    lsh = lsh or MinHashLSH(num_perm=num_perm, bands=bands)
+    signatures = lsh.signatures([normalized[i] for i in uniques])
+    union = _UnionFind(len(uniques))
+    for members in lsh.candidate_buckets(signatures):
+        anchor = members[0]
+        for other in members[1:]:
+            if union.find(anchor) == union.find(other):
+                continue
+            similarity = float(np.mean(signatures[anchor] == signatures[other]))
+            if similarity >= threshold:
+                union.union(anchor, other)
+
+    representative = {uniques[j]: uniques[union.find(j)] for j in range(len(uniques))}
+    return [representative[exact[i]] for i in range(len(texts))]
+
+
+def group_members(clusters: List[int]) -> Dict[int, List[int]]:
+    """
+    Convierte la salida de `cluster_near_duplicates` en {representante: [miembros]}.
+    """
+    groups: Dict[int, List[int]] = {}
+    for i, representative in enumerate(clusters):
+        groups.setdefault(representative, []).append(i)
+    return groups
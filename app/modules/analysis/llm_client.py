@@ -0,0 +1,190 @@
+# app/modules/analysis/llm_client.py
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.providers import registry
+from app.modules.metrics.metrics_service import LLM_RETRIES, record_llm_usage, record_rate_limit_wait, timed
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Estimación rápida de tokens de entrada (~4 caracteres por token, más overhead por mensaje).
+    """
+    return sum(len(m.get("content", "")) // 4 + 4 for m in messages)
+
+
+class TokenBucket:
+    """
+    Token bucket asíncrono: se recarga a `rate_per_minute` unidades por minuto
+    hasta `capacity`. Un `rate_per_minute <= 0` desactiva el límite.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """
+        Espera hasta disponer de `amount` unidades. Devuelve los segundos esperados.
+        """
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    import openai
+
+    return isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncLLMClient:
+    """
+    Cliente asíncrono de OpenAI compartido por el proceso:
+    - un único pool de conexiones HTTP (keep-alive),
+    - un máximo de llamadas simultáneas (`max_in_flight`),
+    - token buckets de requests/minuto y tokens/minuto,
+    - reintentos con backoff exponencial y jitter ante 429/5xx.
+    """
+
+    def __init__(
+        self,
+        api_key: str = "",
+        max_in_flight: int = 32,
+        rpm_limit: int = 0,
+        tpm_limit: int = 0,
+        max_retries: int = 5,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+    ):
+        import httpx
+        import openai
+
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        # Los reintentos los gestionamos aquí para coordinarlos con los límites de tasa.
+        self._client = openai.AsyncOpenAI(api_key=api_key, http_client=self._http, max_retries=0)
+        self._semaphore = asyncio.Semaphore(max(1, max_in_flight))
+        self.requests_bucket = TokenBucket(rpm_limit)
+        self.tokens_bucket = TokenBucket(tpm_limit)
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self.usage = {"requests": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        json_output: bool = False,
+    ) -> str:
+        """
+        Ejecuta una chat completion respetando los límites. Devuelve el contenido del mensaje.
+        """
+        kwargs = {"model": model, "messages": messages, "temperature": 0}
+        if json_output:
+            kwargs["response_format"] = {"type": "json_object"}
+
+        attempt = 0
+        while True:
+            waited = await self.requests_bucket.acquire(1)
+            waited += await self.tokens_bucket.acquire(estimate_tokens(messages))
+            record_rate_limit_wait("openai", waited)
+            try:
+                async with self._semaphore:
+                    self.in_flight += 1
+                    try:
+                        with timed("llm.chat_completion"):
+                            response = await self._client.chat.completions.create(**kwargs)
+                    finally:
+                        self.in_flight -= 1
+            except Exception as exc:
+                if attempt >= self.max_retries or not _is_retryable(exc):
+                    raise
+                attempt += 1
+                self.usage["retries"] += 1
+                LLM_RETRIES.inc(model=model)
+                backoff = _retry_after(exc) or min(30.0, 0.5 * (2 ** attempt))
+                delay = backoff * random.uniform(0.5, 1.5)
+                if getattr(exc, "status_code", None) == 429:
+                    record_rate_limit_wait("openai", delay)
+                await asyncio.sleep(delay)
+                continue
+
+            self.usage["requests"] += 1
+            usage = getattr(response, "usage", None)
+            record_llm_usage(model, usage)
+            if usage is not None:
+                self.usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+                self.usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+            message = response.choices[0].message if response.choices else None
+            content = getattr(message, "content", None)
+            return content if isinstance(content, str) else ""
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+PROVIDER_ASYNC_LLM = "async_llm"
+
+
+def _create_async_llm_client() -> AsyncLLMClient:
+    return AsyncLLMClient(
+        api_key=settings.OPENAI_API_KEY,
+        max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+        rpm_limit=settings.LLM_RPM_LIMIT,
+        tpm_limit=settings.LLM_TPM_LIMIT,
+        max_retries=settings.LLM_MAX_RETRIES,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+    )
+
+
+registry.register(PROVIDER_ASYNC_LLM, _create_async_llm_client)
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    """
+    Devuelve el cliente asíncrono compartido, creándolo en el primer uso.
+    """
+    return registry.get(PROVIDER_ASYNC_LLM)
+
+
+async def close_async_llm_client() -> None:
+    for client in registry.pop(PROVIDER_ASYNC_LLM):
+        await client.aclose()
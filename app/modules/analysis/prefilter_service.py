@@ -0,0 +1,276 @@
+# app/modules/analysis/prefilter_service.py
+import os
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.modules.analysis.analysis_service import LABEL_NOT_RELEVANT, LABEL_RELEVANT
+from app.modules.analysis.batch_service import classify_relevance_batched_async, estimate_batched
+from app.modules.metrics.metrics_service import timed
+
+STAGE_PREFILTER = "prefilter"
+STAGE_LLM = "llm"
+
+# Léxico inicial del modelo lineal: término (unigrama o bigrama, sin tildes) → peso.
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    # Sector vivienda, construcción y saneamiento
+    "vivienda": 3.0, "viviendas": 3.0, "mivivienda": 4.0, "techo propio": 4.0,
+    "bono familiar": 3.5, "credito hipotecario": 3.0, "construccion": 2.0,
+    "saneamiento": 3.5, "agua potable": 3.5, "desague": 3.0, "alcantarillado": 3.0,
+    "edificacion": 2.0, "habilitacion urbana": 3.0, "titulacion": 2.0, "lotes": 1.5,
+    "reconstruccion": 2.0, "aguas residuales": 3.0, "sedapal": 3.0,
+    "veredas": 1.5, "obra": 1.0, "obras": 1.0, "infraestructura": 1.0,
+    "urbanismo": 1.5, "mvcs": 4.0,
+    # Temas municipales ajenos al sector
+    "parque": -1.0, "ruido": -1.5, "feria": -1.5, "emprendimiento": -1.0,
+    "salud": -1.0, "ciclovia": -1.0, "serenazgo": -1.5, "seguridad ciudadana": -1.5,
+    "vigilancia": -1.0, "camaras": -1.0, "arboles": -1.0, "deporte": -1.5,
+    "concierto": -1.5, "cultura": -1.0, "mascotas": -1.5, "paraderos": -0.5,
+}
+# Con el sesgo por defecto un texto sin términos del léxico queda en sigmoid(-2.5) ≈ 0.08,
+# bajo el umbral bajo (0.1), y un único término fuerte (peso >= 3.5) supera el alto (0.7).
+DEFAULT_BIAS = -2.5
+
+_TOKEN = re.compile(r"[a-z0-9ñ]+")
+_ACCENTS = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")
+
+
+def _words(text: str) -> List[str]:
+    return _TOKEN.findall(unicodedata.normalize("NFKC", text or "").lower().translate(_ACCENTS))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokeniza un texto en minúsculas, sin tildes, devolviendo unigramas y bigramas.
+    """
+    tokens = _words(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class LinearPrefilter:
+    """
+    Modelo lineal sobre features hasheadas (uni y bigramas).
+    `predict_proba` puntúa un lote completo con NumPy y `fit` ajusta los pesos
+    por regresión logística a partir de etiquetas ya obtenidas del LLM.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, bias: float = DEFAULT_BIAS,
+                 n_features: int = 2 ** 16):
+        self.n_features = n_features
+        self.bias = float(bias)
+        self.w = np.zeros(n_features, dtype=np.float64)
+        self._index = lru_cache(maxsize=200000)(self._hash)
+        for term, weight in (DEFAULT_WEIGHTS if weights is None else weights).items():
+            self.w[self._index(" ".join(_words(term)))] += weight
+
+    def _hash(self, feature: str) -> int:
+        return zlib.crc32(feature.encode("utf-8")) % self.n_features
+
+    def _design(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        rows: List[int] = []
+        cols: List[int] = []
+        for i, text in enumerate(texts):
+            indices = {self._index(feature) for feature in tokenize(text)}
+            cols.extend(indices)
+            rows.extend([i] * len(indices))
+        return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+    def _scores(self, rows: np.ndarray, cols: np.ndarray, n: int) -> np.ndarray:
+        return np.bincount(rows, weights=self.w[cols], minlength=n) + self.bias
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        Probabilidad de RELEVANTE para cada texto.
+        """
+        if not texts:
+            return np.zeros(0)
+        rows, cols = self._design(texts)
+        return 1.0 / (1.0 + np.exp(-self._scores(rows, cols, len(texts))))
+
+    def fit(self, texts: List[str], labels: List[str], epochs: int = 30,
+            learning_rate: float = 0.5, l2: float = 1e-4) -> "LinearPrefilter":
+        """
+        Ajusta los pesos por descenso de gradiente (regresión logística binaria).
+        """
+        y = np.asarray([1.0 if label == LABEL_RELEVANT else 0.0 for label in labels])
+        rows, cols = self._design(texts)
+        n = len(texts)
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-self._scores(rows, cols, n)))
+            error = (p - y) / n
+            gradient = np.zeros_like(self.w)
+            np.add.at(gradient, cols, error[rows])
+            self.w -= learning_rate * (gradient + l2 * self.w)
+            self.bias -= learning_rate * float(error.sum())
+        return self
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, w=self.w, bias=np.asarray([self.bias]))
+
+    @classmethod
+    def load(cls, path: str) -> "LinearPrefilter":
+        stored = np.load(path)
+        model = cls(weights={}, bias=float(stored["bias"][0]), n_features=len(stored["w"]))
+        model.w = stored["w"].astype(np.float64)
+        return model
+
+    def decide(self, texts: List[str], low: float, high: float) -> Tuple[List[Optional[str]], np.ndarray]:
+        """
+        Etiqueta localmente los textos con probabilidad >= `high` (RELEVANTE) o <= `low`
+        (NO RELEVANTE). Los inciertos quedan en None para enviarlos al LLM.
+        """
+        proba = self.predict_proba(texts)
+        labels: List[Optional[str]] = [None] * len(texts)
+        for i in np.flatnonzero(proba >= high):
+            labels[i] = LABEL_RELEVANT
+        for i in np.flatnonzero(proba <= low):
+            labels[i] = LABEL_NOT_RELEVANT
+        return labels, proba
+
+
+def resolve_thresholds(low: Optional[float] = None, high: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Umbrales efectivos (los de settings si no se indican). `low` debe ser menor que `high`:
+    si no, un mismo texto caería en ambas decisiones.
+    """
+    low = settings.PREFILTER_LOW_THRESHOLD if low is None else low
+    high = settings.PREFILTER_HIGH_THRESHOLD if high is None else high
+    if low >= high:
+        raise ValueError(f"El umbral bajo ({low}) debe ser menor que el alto ({high}).")
+    return low, high
+
+
+_prefilter: Optional[LinearPrefilter] = None
+
+
+def get_prefilter() -> LinearPrefilter:
+    """
+    Devuelve el pre-filtro del proceso: el modelo entrenado en PREFILTER_MODEL_PATH si existe,
+    o el léxico por defecto.
+    """
+    global _prefilter
+    if _prefilter is None:
+        path = settings.PREFILTER_MODEL_PATH
+        _prefilter = LinearPrefilter.load(path) if path and os.path.exists(path) else LinearPrefilter()
+    return _prefilter
+
+
+def load_training_examples(store, limit_per_label: int = 5000) -> Tuple[List[str], List[str]]:
+    """
+    Textos ya etiquetados en el almacén local (tweets y comentarios), hasta
+    `limit_per_label` por etiqueta y tabla, del más reciente al más antiguo.
+    """
+    texts: List[str] = []
+    labels: List[str] = []
+    for table in ("tweets", "comments"):
+        for label in (LABEL_RELEVANT, LABEL_NOT_RELEVANT):
+            page = store.query(table, limit=limit_per_label, label=label)
+            for item in page["items"]:
+                if item.get("text"):
+                    texts.append(item["text"])
+                    labels.append(label)
+    return texts, labels
+
+
+def train_prefilter(texts: List[str], labels: List[str], epochs: int = 30,
+                    path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Ajusta el pre-filtro partiendo del léxico por defecto con etiquetas ya obtenidas del LLM,
+    lo guarda en PREFILTER_MODEL_PATH y lo deja activo en el proceso.
+    Requiere ejemplos de ambas clases.
+    """
+    global _prefilter
+    relevant = sum(1 for label in labels if label == LABEL_RELEVANT)
+    if relevant == 0 or relevant == len(labels):
+        raise ValueError("Se necesitan ejemplos etiquetados RELEVANTE y NO RELEVANTE para entrenar.")
+
+    with timed("prefilter.fit"):
+        model = LinearPrefilter().fit(texts, labels, epochs=epochs)
+    path = path or settings.PREFILTER_MODEL_PATH
+    if path:
+        model.save(path)
+    _prefilter = model
+
+    low, high = resolve_thresholds()
+    labels_local, _ = model.decide(texts, low, high)
+    decided = [(got, want) for got, want in zip(labels_local, labels) if got is not None]
+    return {
+        "examples": len(texts),
+        "relevant": relevant,
+        "not_relevant": len(texts) - relevant,
+        "path": path,
+        "decided_locally": len(decided),
+        "local_accuracy": round(sum(got == want for got, want in decided) / len(decided), 4) if decided else None,
+    }
+
+
+async def classify_with_prefilter_async(
+    texts: List[str],
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    batch_size: Optional[int] = None,
+    chat_model=None,
+) -> Dict[str, Any]:
+    """
+    Clasificación en cascada: el pre-filtro local decide los casos claros y solo los
+    inciertos se envían (en lotes) al LLM. Devuelve etiquetas, etapa y puntaje por texto,
+    más el conteo de cuántos textos decidió cada etapa.
+    """
+    low, high = resolve_thresholds(low, high)
+
+    with timed("prefilter.decide"):
+        labels, proba = get_prefilter().decide(texts, low, high)
+    stages = [STAGE_PREFILTER if label is not None else STAGE_LLM for label in labels]
+
+    uncertain = [i for i, label in enumerate(labels) if label is None]
+    if uncertain:
+        llm_labels = await classify_relevance_batched_async(
+            [texts[i] for i in uncertain], batch_size=batch_size, chat_model=chat_model
+        )
+        for i, label in zip(uncertain, llm_labels):
+            labels[i] = label
+
+    decided_locally = len(texts) - len(uncertain)
+    return {
+        "labels": labels,
+        "stages": stages,
+        "scores": [round(float(p), 4) for p in proba],
+        "stats": {
+            "total": len(texts),
+            STAGE_PREFILTER: decided_locally,
+            "prefilter_relevant": sum(1 for i, s in enumerate(stages) if s == STAGE_PREFILTER and labels[i] == LABEL_RELEVANT),
+            "prefilter_not_relevant": sum(1 for i, s in enumerate(stages) if s == STAGE_PREFILTER and labels[i] == LABEL_NOT_RELEVANT),
+            STAGE_LLM: len(uncertain),
+            "thresholds": {"low": low, "high": high},
+        },
+    }
+
+
+def estimate_with_prefilter(
+    texts: List[str],
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    batch_size: Optional[int] = None,
+    model: str = "gpt-4o-mini",
+) -> Dict[str, Any]:
+    """
+    Simula `classify_with_prefilter_async` sin llamar al LLM: el pre-filtro (local y barato)
+    sí se ejecuta para saber cuántos textos quedarían inciertos y estimar solo esos.
+    """
+    low, high = resolve_thresholds(low, high)
+
+    labels, _ = get_prefilter().decide(texts, low, high)
+    uncertain = [texts[i] for i, label in enumerate(labels) if label is None]
+    return {
+        **estimate_batched(uncertain, model=model, batch_size=batch_size),
+        "texts": len(texts),
+        STAGE_PREFILTER: len(texts) - len(uncertain),
+    }
@@ -1,27 +1,179 @@
 # app/modules/analysis/routes.py
-from fastapi import APIRouter, Body, HTTPException
-from typing import List
-from app.modules.analysis.analysis_service import classify_relevance_for_mivivienda
+import asyncio
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from typing import List, Optional
+from collections import Counter
+from app.modules.analysis.analysis_service import (
+    classify_relevance_for_mivivienda_async,
+    combine_labels,
+    plan_combined_chunks,
+)
+from app.modules.analysis.batch_service import classify_relevance_batched_async, estimate_batched
+from app.modules.analysis.budget_service import estimate_cost
+from app.modules.analysis.cache_service import get_classification_cache
+from app.modules.analysis.dedup_service import cluster_near_duplicates, group_members
+from app.modules.analysis.prefilter_service import (
+    classify_with_prefilter_async,
+    estimate_with_prefilter,
+    load_training_examples,
+    resolve_thresholds,
+    train_prefilter,
+)
+from app.modules.metrics.metrics_service import timed
+from app.modules.storage.store_service import get_local_store
+from app.utils import parse_fields, project_items, render
 
 router = APIRouter()
 
+
+async def _classify_per_text(mode: str, texts: List[str], batch_size: Optional[int],
+                             low_threshold: Optional[float], high_threshold: Optional[float]):
+    """
+    Clasifica cada texto según el modo. Devuelve un dict por texto (label y, en cascada,
+    stage / score) y las estadísticas por etapa (solo en cascada).
+    """
+    if mode == "batch":
+        labels = await classify_relevance_batched_async(texts, batch_size=batch_size)
+        return [{"label": label} for label in labels], None
+
+    result = await classify_with_prefilter_async(texts, low=low_threshold, high=high_threshold,
+                                                 batch_size=batch_size)
+    items = [
+        {"label": label, "stage": stage, "score": score}
+        for label, stage, score in zip(result["labels"], result["stages"], result["scores"])
+    ]
+    return items, result["stats"]
+
+
 @router.post("/analyze/posts")
-def analyze_text_endpoint(
+async def analyze_text_endpoint(
+    request: Request,
     texts: List[str] = Body(..., description="Lista de textos a analizar"),
+    mode: str = Query("combined", description="'combined' (un análisis general), 'batch' (una etiqueta por texto) o 'cascade' (pre-filtro local + LLM)"),
+    batch_size: Optional[int] = Query(None, ge=1, le=100, description="Textos por llamada al LLM en modo 'batch' / 'cascade'"),
+    low_threshold: Optional[float] = Query(None, ge=0, le=1, description="Modo 'cascade': probabilidad bajo la cual se decide NO RELEVANTE localmente"),
+    high_threshold: Optional[float] = Query(None, ge=0, le=1, description="Modo 'cascade': probabilidad sobre la cual se decide RELEVANTE localmente"),
+    dedup: bool = Query(False, description="Agrupar casi-duplicados y clasificar un representante por grupo"),
+    dry_run: bool = Query(False, description="No llamar al LLM: solo estimar requests, tokens, costo y latencia"),
+    fields: Optional[str] = Query(None, description="Modo 'batch' / 'cascade': campos a devolver por resultado, separados por coma (p. ej. `index,label`)"),
 ):
     """
     Recibe una lista de textos (por ejemplo, tweets o publicaciones) y realiza un análisis general.
+    En modo 'batch' devuelve una etiqueta RELEVANTE / NO RELEVANTE por cada texto.
+    En modo 'cascade' el pre-filtro local decide los casos claros y solo los inciertos van al LLM.
+    Con `dedup` los casi-duplicados se agrupan y la etiqueta del representante se propaga al grupo.
+    Con `dry_run` se devuelve solo la estimación de requests, tokens, costo y latencia.
+    Con `fields` cada resultado incluye solo esos campos (p. ej. omitir el texto original).
     """
     if not texts:
         raise HTTPException(status_code=400, detail="Debe enviarse al menos un texto para analizar.")
 
-    # Combinar todo el contenido
-    combined_text = "\n".join(texts)
+    if mode == "cascade":
+        try:
+            resolve_thresholds(low_threshold, high_threshold)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if mode in ("batch", "cascade"):
+        # El agrupamiento es CPU-bound: se ejecuta en un hilo para no bloquear el event loop
+        if dedup:
+            with timed("dedup.cluster"):
+                clusters = await asyncio.to_thread(cluster_near_duplicates, texts)
+        else:
+            clusters = list(range(len(texts)))
+        targets = sorted(set(clusters))
+        if dry_run:
+            unique_texts = [texts[i] for i in targets]
+            if mode == "batch":
+                estimate = estimate_batched(unique_texts, batch_size=batch_size)
+            else:
+                estimate = estimate_with_prefilter(unique_texts, low=low_threshold, high=high_threshold,
+                                                   batch_size=batch_size)
+            if dedup:
+                estimate["near_duplicates"] = len(texts) - len(targets)
+            return render(request, {"status": "ok", "mode": mode, "dry_run": True, "input_count": len(texts), "estimate": estimate})
+
+        items, stages = await _classify_per_text(mode, [texts[i] for i in targets], batch_size,
+                                                 low_threshold, high_threshold)
+        by_representative = dict(zip(targets, items))
+
+        results = []
+        for i, (text, representative) in enumerate(zip(texts, clusters)):
+            result = {"index": i, "text": text, **by_representative[representative]}
+            if dedup:
+                result["group"] = representative
+            results.append(result)
+
+        response = {
+            "status": "ok",
+            "mode": mode,
+            "input_count": len(texts),
+            "summary": dict(Counter(r["label"] for r in results)),
+            "results": project_items(results, parse_fields(fields)),
+        }
+        if stages is not None:
+            response["stages"] = stages
+        if dedup:
+            response["dedup"] = {
+                "groups": len(targets),
+                "propagated": len(texts) - len(targets),
+                "mapping": [
+                    {"representative": representative, "members": members}
+                    for representative, members in group_members(clusters).items()
+                    if len(members) > 1
+                ],
+            }
+        return render(request, response)
+
+    if mode != "combined":
+        raise HTTPException(status_code=400, detail=f"Modo no soportado: {mode}")
 
-    analysis = classify_relevance_for_mivivienda(combined_text)
+    # Combinar el contenido en bloques que quepan en el presupuesto de tokens
+    plan = plan_combined_chunks(texts)
+    estimate = {**estimate_cost("gpt-4o-mini", plan["requests"]), "truncated": plan["truncated"]}
+    if dry_run:
+        return render(request, {"status": "ok", "mode": mode, "dry_run": True, "input_count": len(texts), "estimate": estimate})
 
-    return {
+    analyses = await asyncio.gather(*(classify_relevance_for_mivivienda_async(text) for text in plan["chunks"]))
+
+    response = {
         "status": "ok",
         "input_count": len(texts),
-        "analysis": analysis,
+        "analysis": analyses[0] if len(analyses) == 1 else combine_labels(analyses),
+        "estimate": estimate,
     }
+    if len(analyses) > 1:
+        response["chunks"] = [{"texts": size, "analysis": analysis} for size, analysis in zip(plan["sizes"], analyses)]
+    return render(request, response)
+
+
+@router.get("/cache/stats")
+def cache_stats_endpoint():
+    """
+    Devuelve los contadores de aciertos / fallos de la caché de clasificaciones.
+    """
+    cache = get_classification_cache()
+    if cache is None:
+        return {"status": "ok", "enabled": False}
+    return {"status": "ok", "enabled": True, "stats": cache.stats()}
+
+
+@router.post("/prefilter/train")
+async def train_prefilter_endpoint(
+    limit_per_label: int = Query(5000, ge=1, le=100000, description="Máximo de ejemplos por etiqueta y tabla"),
+    epochs: int = Query(30, ge=1, le=500, description="Pasadas del descenso de gradiente"),
+):
+    """
+    Entrena el pre-filtro del modo 'cascade' con los tweets y comentarios ya etiquetados
+    en el almacén local, lo guarda en PREFILTER_MODEL_PATH y lo activa sin reiniciar.
+    """
+    store = get_local_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="El almacenamiento local está desactivado (STORAGE_ENABLED).")
+    texts, labels = await asyncio.to_thread(load_training_examples, store, limit_per_label)
+    try:
+        # El ajuste es CPU-bound: se ejecuta en un hilo para no bloquear el event loop
+        result = await asyncio.to_thread(train_prefilter, texts, labels, epochs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "ok", "training": result}
@@ -0,0 +1,244 @@
+# app/modules/export/export_service.py
+"""
+Exportación masiva de tweets y comentarios almacenados (con sus etiquetas).
+
+Los datos se leen del almacén local en bloques (paginación por cursor) y cada bloque se
+convierte y se entrega apenas está listo, así la memoria no crece con el tamaño de la
+exportación. Formatos: NDJSON, CSV y Parquet (columnar y comprimido, requiere `pyarrow`).
+Para destinos tipo planilla, `export_to_sink` escribe filas en lotes grandes a un `RowSink`.
+"""
+import csv
+import io
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.config import settings
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+
+MEDIA_TYPES = {
+    FORMAT_NDJSON: "application/x-ndjson",
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+}
+
+# Columnas exportadas por tabla y su tipo (el JSON original `raw` no se exporta)
+EXPORT_COLUMNS: Dict[str, Dict[str, str]] = {
+    "tweets": {
+        "id": "string", "author_id": "string", "username": "string", "conversation_id": "string",
+        "created_at": "string", "text": "string", "lang": "string",
+        "like_count": "int64", "reply_count": "int64", "retweet_count": "int64", "quote_count": "int64",
+        "label": "string", "label_updated_at": "float64", "source": "string", "collected_at": "float64",
+    },
+    "comments": {
+        "id": "string", "tweet_id": "string", "conversation_id": "string", "author_id": "string",
+        "created_at": "string", "text": "string", "like_count": "int64", "reply_count": "int64",
+        "label": "string", "label_updated_at": "float64", "source": "string", "collected_at": "float64",
+    },
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def _project(chunk: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str, Any]]:
+    return [{column: item.get(column) for column in columns} for item in chunk]
+
+
+def iter_ndjson(chunks: Iterable[List[Dict[str, Any]]], columns: List[str]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in _project(chunk, columns)).encode("utf-8")
+
+
+def iter_csv(chunks: Iterable[List[Dict[str, Any]]], columns: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        writer.writerows([item.get(column) for column in columns] for item in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkedSink:
+    """
+    Destino de escritura para pyarrow que acumula los bytes hasta que se drenan,
+    llevando la posición absoluta (el footer de Parquet guarda offsets absolutos).
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_parquet(chunks: Iterable[List[Dict[str, Any]]], table: str, columns: List[str],
+                 compression: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Escribe un row group por bloque y entrega los bytes de cada uno apenas se escriben.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("La exportación a Parquet requiere el paquete `pyarrow`.")
+
+    types = EXPORT_COLUMNS[table]
+    schema = pa.schema([(column, pa.type_for_alias(types[column])) for column in columns])
+    sink = _ChunkedSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema,
+                              compression=compression or settings.EXPORT_PARQUET_COMPRESSION)
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist(_project(chunk, columns), schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def resolve_columns(table: str, columns: Optional[List[str]] = None) -> List[str]:
+    if table not in EXPORT_COLUMNS:
+        raise ExportError(f"Tabla no soportada: {table}")
+    if not columns:
+        return list(EXPORT_COLUMNS[table])
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS[table]]
+    if unknown:
+        raise ExportError(f"Columnas desconocidas para {table}: {', '.join(unknown)}")
+    return columns
+
+
+def iter_export(chunks: Iterable[List[Dict[str, Any]]], table: str, export_format: str,
+                columns: Optional[List[str]] = None) -> Iterator[bytes]:
+    """
+    Convierte los bloques del almacén al formato pedido, bloque a bloque.
+    """
+    columns = resolve_columns(table, columns)
+    if export_format == FORMAT_NDJSON:
+        return iter_ndjson(chunks, columns)
+    if export_format == FORMAT_CSV:
+        return iter_csv(chunks, columns)
+    if export_format == FORMAT_PARQUET:
+        return iter_parquet(chunks, table, columns)
+    raise ExportError(f"Formato no soportado: {export_format}")
+
+
+# ---------------- destinos por lotes (tipo planilla) ----------------
+
+class RowSink:
+    """
+    Destino de filas tipo planilla: recibe la cabecera una vez y luego lotes de filas.
+    Las implementaciones (p. ej. Google Sheets) deben hacer una escritura por lote.
+    """
+
+    def write_header(self, columns: List[str]) -> None:
+        raise NotImplementedError
+
+    def append_rows(self, rows: List[List[Any]]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> Dict[str, Any]:
+        return {}
+
+
+class LocalSheetSink(RowSink):
+    """
+    Sustituto local de una planilla: cada lote se agrega de una vez a un archivo CSV
+    en EXPORT_DIR (misma forma que `values.append` de la API de Sheets).
+    """
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        safe_name = re.sub(r"[^\w.-]+", "_", name).strip("._") or "export"
+        directory = directory or settings.EXPORT_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{safe_name}.csv")
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self.writes = 0
+
+    def write_header(self, columns: List[str]) -> None:
+        self._writer.writerow(columns)
+
+    def append_rows(self, rows: List[List[Any]]) -> None:
+        self._writer.writerows(rows)
+        self._file.flush()
+        self.writes += 1
+
+    def close(self) -> Dict[str, Any]:
+        self._file.close()
+        return {"path": self.path, "writes": self.writes}
+
+
+class BatchingWriter:
+    """
+    Acumula filas y las envía al destino en lotes de `batch_rows` (nunca de a una).
+    """
+
+    def __init__(self, sink: RowSink, columns: List[str], batch_rows: Optional[int] = None):
+        self.sink = sink
+        self.columns = columns
+        self.batch_rows = max(1, batch_rows or settings.EXPORT_SINK_BATCH_ROWS)
+        self._buffer: List[List[Any]] = []
+        self.rows = 0
+        self.batches = 0
+        sink.write_header(columns)
+
+    def write(self, items: Iterable[Dict[str, Any]]) -> None:
+        for item in items:
+            self._buffer.append([item.get(column) for column in self.columns])
+            if len(self._buffer) >= self.batch_rows:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        self.sink.append_rows(self._buffer)
+        self.rows += len(self._buffer)
+        self.batches += 1
+        self._buffer = []
+
+    def close(self) -> Dict[str, Any]:
+        self.flush()
+        return {"rows": self.rows, "batches": self.batches, **self.sink.close()}
+
+
+def export_to_sink(chunks: Iterable[List[Dict[str, Any]]], table: str, sink: RowSink,
+                   columns: Optional[List[str]] = None, batch_rows: Optional[int] = None) -> Dict[str, Any]:
+    writer = BatchingWriter(sink, resolve_columns(table, columns), batch_rows=batch_rows)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+    finally:
+        result = writer.close()
+    return result
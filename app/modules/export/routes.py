@@ -0,0 +1,108 @@
+# app/modules/export/routes.py
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+from app.config import settings
+from app.modules.export.export_service import (
+    FORMAT_NDJSON,
+    MEDIA_TYPES,
+    ExportError,
+    LocalSheetSink,
+    export_to_sink,
+    iter_export,
+    resolve_columns,
+)
+from app.modules.storage.store_service import get_local_store
+
+router = APIRouter()
+
+
+def _require_store():
+    store = get_local_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="El almacenamiento local está desactivado (STORAGE_ENABLED).")
+    return store
+
+
+def _columns(table: str, columns: Optional[str]):
+    try:
+        return resolve_columns(table, [c.strip() for c in columns.split(",") if c.strip()] if columns else None)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _filters(table: str, label: Optional[str], username: Optional[str], tweet_id: Optional[str],
+             conversation_id: Optional[str], source: Optional[str]):
+    filters = {"label": label, "conversation_id": conversation_id, "source": source}
+    filters.update({"username": username} if table == "tweets" else {"tweet_id": tweet_id})
+    return filters
+
+
+@router.get("/{table}")
+def export_table(
+    table: str,
+    format: str = Query(FORMAT_NDJSON, description="'ndjson', 'csv' o 'parquet'"),
+    columns: Optional[str] = Query(None, description="Columnas a exportar, separadas por coma (vacío = todas)"),
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    label: Optional[str] = Query(None, description="Etiqueta (RELEVANTE / NO RELEVANTE)"),
+    username: Optional[str] = Query(None, description="Cuenta de origen (solo tweets)"),
+    tweet_id: Optional[str] = Query(None, description="ID del tweet comentado (solo comentarios)"),
+    conversation_id: Optional[str] = Query(None, description="ID de la conversación"),
+    source: Optional[str] = Query(None, description="'real' o 'mock'"),
+):
+    """
+    Exporta `tweets` o `comments` almacenados (con sus etiquetas) en streaming:
+    se leen y se envían en bloques de EXPORT_CHUNK_SIZE filas, con memoria constante.
+    """
+    store = _require_store()
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {format}")
+    selected = _columns(table, columns)
+    filters = _filters(table, label, username, tweet_id, conversation_id, source)
+
+    chunks = store.iter_chunks(table, chunk_size=settings.EXPORT_CHUNK_SIZE,
+                               start_date=start_date, end_date=end_date, **filters)
+    body = iter_export(chunks, table, format, selected)
+    try:
+        # El primer bloque se genera aquí para poder responder con error (p. ej. sin pyarrow)
+        first = next(body, b"")
+    except ExportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    def stream():
+        yield first
+        yield from body
+
+    filename = f"{table}_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{format}"
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.post("/{table}/sink")
+def export_table_to_sink(
+    table: str,
+    name: str = Query(..., description="Nombre de la planilla de destino"),
+    columns: Optional[str] = Query(None, description="Columnas a exportar, separadas por coma (vacío = todas)"),
+    batch_rows: Optional[int] = Query(None, ge=1, description="Filas por escritura al destino"),
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    label: Optional[str] = Query(None, description="Etiqueta (RELEVANTE / NO RELEVANTE)"),
+    username: Optional[str] = Query(None, description="Cuenta de origen (solo tweets)"),
+    tweet_id: Optional[str] = Query(None, description="ID del tweet comentado (solo comentarios)"),
+    conversation_id: Optional[str] = Query(None, description="ID de la conversación"),
+    source: Optional[str] = Query(None, description="'real' o 'mock'"),
+):
+    """
+    Escribe `tweets` o `comments` en un destino tipo planilla, por lotes grandes de filas.
+    Por ahora el destino es un sustituto local (CSV en EXPORT_DIR). Admite los mismos
+    filtros que la exportación en streaming.
+    """
+    store = _require_store()
+    selected = _columns(table, columns)
+    filters = _filters(table, label, username, tweet_id, conversation_id, source)
+    chunks = store.iter_chunks(table, chunk_size=settings.EXPORT_CHUNK_SIZE, start_date=start_date,
+                               end_date=end_date, **filters)
+    result = export_to_sink(chunks, table, LocalSheetSink(name), columns=selected, batch_rows=batch_rows)
+    return {"status": "ok", "table": table, "sink": "local_sheet", **result}
@@ -0,0 +1,477 @@
+# app/modules/jobs/job_service.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.modules.analysis.batch_service import chunk, classify_relevance_batched_async
+from app.modules.analysis.prefilter_service import classify_with_prefilter_async
+from app.modules.pipeline.pipeline_service import run_pipeline
+from app.modules.social.fanout_service import ACCOUNT_QUEUED, collect_accounts
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+JOB_COLLECT = "collect"
+JOB_CLASSIFY = "classify"
+JOB_FANOUT = "fanout"
+
+# Un runner recibe los parámetros del job y una función `report(items, done, total)`
+Reporter = Callable[[List[Dict[str, Any]], int, Optional[int]], Awaitable[None]]
+Runner = Callable[[Dict[str, Any], Reporter], Awaitable[None]]
+
+
+class JobCancelled(Exception):
+    """
+    El job dejó de pertenecer a este proceso (otro lo canceló): `report` lo lanza para
+    cortar el runner sin sobrescribir el estado.
+    """
+
+
+class JobDeferred(Exception):
+    """
+    Un runner la lanza para volver a encolar el job con otros parámetros, sin ejecutarlo
+    antes de `delay_seconds` (p. ej. mientras se recupera el rate limit).
+    """
+
+    def __init__(self, params: Dict[str, Any], delay_seconds: float):
+        super().__init__(f"Job diferido {delay_seconds:.0f}s")
+        self.params = params
+        self.delay_seconds = delay_seconds
+
+
+class JobStore:
+    """
+    Persistencia de jobs y de sus resultados parciales en SQLite.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                done INTEGER DEFAULT 0,
+                total INTEGER,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                not_before REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+            CREATE TABLE IF NOT EXISTS job_owners (
+                id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            """
+        )
+        # Bases anteriores al reparto entre procesos
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (("owner", "TEXT"), ("not_before", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self._conn.commit()
+
+    def create(self, job_type: str, params: Dict[str, Any], not_before: Optional[float] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, type, status, params, created_at, not_before) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, job_type, STATUS_QUEUED, json.dumps(params, ensure_ascii=False), time.time(), not_before),
+            )
+            self._conn.commit()
+        return job_id
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if not fields:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+            self._conn.commit()
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """
+        Toma un job en cola para `owner`. Atómico entre procesos: solo uno lo consigue.
+        Un job diferido no se puede tomar antes de su `not_before`.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = COALESCE(started_at, ?) "
+                "WHERE id = ? AND status = ? AND (not_before IS NULL OR not_before <= ?)",
+                (STATUS_RUNNING, owner, now, job_id, STATUS_QUEUED, now),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> bool:
+        """
+        Cierra un job con su estado final solo si sigue "running" a nombre de `owner`:
+        una cancelación escrita por otro proceso no se sobrescribe.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (status, error, time.time(), job_id, STATUS_RUNNING, owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Marca como cancelado un job en cola o en curso (de cualquier proceso). El dueño lo
+        detecta en su próximo `report` o latido y detiene el runner.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED, STATUS_RUNNING),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def defer(self, job_id: str, owner: str, params: Dict[str, Any], not_before: float) -> bool:
+        """
+        Devuelve a la cola un job en curso de `owner` con nuevos parámetros, sin dueño y
+        sin poder reclamarse antes de `not_before`.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, params = ?, not_before = ? "
+                "WHERE id = ? AND status = ? AND owner = ?",
+                (STATUS_QUEUED, json.dumps(params, ensure_ascii=False), not_before, job_id, STATUS_RUNNING, owner),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def lost(self, job_ids: List[str], owner: str) -> List[str]:
+        """
+        De los jobs que `owner` está ejecutando, los que ya no le pertenecen (cancelados
+        o reasignados desde otro proceso).
+        """
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE id IN ({placeholders}) AND (status != ? OR owner IS NOT ?)",
+                [*job_ids, STATUS_RUNNING, owner],
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def heartbeat(self, owner: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_owners (id, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (owner, time.time()),
+            )
+            self._conn.commit()
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM job_owners WHERE id = ?", (owner,))
+            self._conn.commit()
+
+    def append_results(self, job_id: str, owner: str, items: List[Dict[str, Any]], done: int,
+                       total: Optional[int]) -> bool:
+        """
+        Guarda un tramo de resultados si el job sigue en curso a nombre de `owner`.
+        Devuelve False (sin guardar nada) si otro proceso lo canceló.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET done = ?, total = ? WHERE id = ? AND status = ? AND owner = ?",
+                (done, total, job_id, STATUS_RUNNING, owner),
+            )
+            if cursor.rowcount != 1:
+                self._conn.rollback()
+                return False
+            start = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM job_results WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO job_results (job_id, seq, payload) VALUES (?, ?, ?)",
+                [(job_id, start + i, json.dumps(item, ensure_ascii=False, default=str)) for i, item in enumerate(items)],
+            )
+            self._conn.commit()
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            results = self._conn.execute("SELECT COUNT(*) FROM job_results WHERE job_id = ?", (job_id,)).fetchone()[0]
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["results_available"] = results
+        job["progress"] = round(job["done"] / job["total"], 4) if job["total"] else None
+        return job
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT id, type, status, done, total, created_at, finished_at FROM jobs"
+        params: List[Any] = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (job_id, offset, limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def recover(self, stale_seconds: Optional[float] = None) -> List[Tuple[str, Optional[float]]]:
+        """
+        Tras un reinicio: los jobs "running" cuyo proceso dueño ya no late se marcan como
+        fallidos (los de otros procesos vivos no se tocan) y se devuelven los "queued"
+        con su `not_before` para volver a encolarlos (cada uno lo ejecuta solo quien
+        logre reclamarlo).
+        """
+        deadline = time.time() - (settings.JOB_STALE_SECONDS if stale_seconds is None else stale_seconds)
+        with self._lock:
+            self._conn.execute("DELETE FROM job_owners WHERE heartbeat_at < ?", (deadline,))
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? "
+                "AND (owner IS NULL OR owner NOT IN (SELECT id FROM job_owners))",
+                (STATUS_FAILED, "Interrumpido por reinicio del servidor", time.time(), STATUS_RUNNING),
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT id, not_before FROM jobs WHERE status = ? ORDER BY created_at", (STATUS_QUEUED,)
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+
+# ---------------- runners ----------------
+
+async def run_collect_job(params: Dict[str, Any], report: Reporter) -> None:
+    """
+    Ejecuta el pipeline recolección → clasificación → comentarios y va guardando cada tweet.
+    """
+    buffer: List[Dict[str, Any]] = []
+    done = 0
+    total = params.get("max_results")
+    async for item in run_pipeline(
+        params["username"], params["start_date"], params["end_date"],
+        max_results=total, mock=params.get("mock", True),
+        include_comments=params.get("include_comments", True),
+        max_comments=params.get("max_comments", 5),
+    ):
+        if item.get("status") == "done":
+            continue
+        if item.get("status") != "error":
+            done += 1
+        buffer.append(item)
+        if len(buffer) >= settings.JOB_FLUSH_SIZE:
+            await report(buffer, done, total)
+            buffer = []
+    await report(buffer, done, total or done)
+
+
+async def run_classify_job(params: Dict[str, Any], report: Reporter) -> None:
+    """
+    Clasifica una lista de textos por tramos, guardando cada tramo apenas termina.
+    """
+    texts: List[str] = params["texts"]
+    mode = params.get("mode", "cascade")
+    done = 0
+    for part in chunk(texts, settings.JOB_FLUSH_SIZE):
+        if mode == "batch":
+            labels = await classify_relevance_batched_async(part)
+            items = [{"index": done + i, "label": label} for i, label in enumerate(labels)]
+        else:
+            result = await classify_with_prefilter_async(part)
+            items = [
+                {"index": done + i, "label": label, "stage": stage}
+                for i, (label, stage) in enumerate(zip(result["labels"], result["stages"]))
+            ]
+        done += len(part)
+        await report(items, done, len(texts))
+
+
+async def run_fanout_job(params: Dict[str, Any], report: Reporter) -> None:
+    """
+    Continúa una recolección multi-cuenta: cuando el presupuesto de rate limit se agota,
+    el job vuelve a la cola con las cuentas pendientes (y su cursor) y no se reanuda
+    antes del ETA, sin ocupar un worker mientras tanto.
+    Cada tanda de tweets se guarda como un resultado por cuenta.
+    """
+    accounts: List[Dict[str, Any]] = params["accounts"]
+    total = params.get("total", len(accounts))
+    done = params.get("done", 0)
+    result = await collect_accounts(
+        accounts, params["start_date"], params["end_date"],
+        max_results=params.get("max_results"), page_size=params.get("page_size", 100),
+        mock=params.get("mock", True),
+    )
+    done += sum(account["status"] != ACCOUNT_QUEUED for account in result["accounts"])
+    await report([a for a in result["accounts"] if a["data"] or a["status"] != ACCOUNT_QUEUED], done, total)
+    if result["pending"]:
+        raise JobDeferred({**params, "accounts": result["pending"], "total": total, "done": done},
+                          max(1.0, result["eta_seconds"]))
+
+
+RUNNERS: Dict[str, Runner] = {
+    JOB_COLLECT: run_collect_job,
+    JOB_CLASSIFY: run_classify_job,
+    JOB_FANOUT: run_fanout_job,
+}
+
+
+class JobManager:
+    """
+    Cola de jobs en segundo plano atendida por un pool de `workers` tareas asyncio.
+    El estado y los resultados parciales se persisten en el JobStore. Varios procesos
+    pueden compartir la misma base: cada uno se identifica con `owner` y late cada
+    JOB_HEARTBEAT_SECONDS para que los demás no den por muertos sus jobs.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2):
+        self.store = store
+        self.workers = max(1, workers)
+        self.owner = uuid.uuid4().hex
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        await asyncio.to_thread(self.store.heartbeat, self.owner)
+        for job_id, not_before in await asyncio.to_thread(self.store.recover):
+            self._enqueue(job_id, not_before)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        for task in list(self._running.values()) + self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.store.release, self.owner)
+
+    def _enqueue(self, job_id: str, not_before: Optional[float] = None) -> None:
+        delay = (not_before or 0) - time.time()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job_id)
+        else:
+            self._queue.put_nowait(job_id)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            await asyncio.to_thread(self.store.heartbeat, self.owner)
+            # Jobs cancelados desde otro proceso: se detienen aunque el runner no reporte
+            for job_id in await asyncio.to_thread(self.store.lost, list(self._running), self.owner):
+                task = self._running.get(job_id)
+                if task is not None:
+                    task.cancel()
+
+    async def submit(self, job_type: str, params: Dict[str, Any],
+                     delay_seconds: Optional[float] = None) -> Dict[str, Any]:
+        if job_type not in RUNNERS:
+            raise ValueError(f"Tipo de job no soportado: {job_type}")
+        await self.start()
+        not_before = time.time() + delay_seconds if delay_seconds else None
+        job_id = await asyncio.to_thread(self.store.create, job_type, params, not_before)
+        self._enqueue(job_id, not_before)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] in FINAL_STATUSES:
+            return job
+        # En cola: el worker lo descartará al tomarlo. En curso en otro proceso: su dueño
+        # lo detiene en el próximo report o latido.
+        await asyncio.to_thread(self.store.cancel, job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            # Solo se ejecuta si este proceso logra reclamarlo (otro pudo tomarlo o cancelarlo)
+            if not await asyncio.to_thread(self.store.claim, job_id, self.owner):
+                continue
+            job = await asyncio.to_thread(self.store.get, job_id)
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+
+        async def report(items: List[Dict[str, Any]], done: int, total: Optional[int]) -> None:
+            if not await asyncio.to_thread(self.store.append_results, job_id, self.owner, items, done, total):
+                raise JobCancelled(job_id)
+
+        # Los estados finales solo se escriben si el job sigue siendo de este proceso
+        try:
+            await RUNNERS[job["type"]](job["params"], report)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.finish, job_id, self.owner, STATUS_CANCELLED)
+            raise
+        except JobCancelled:
+            pass
+        except JobDeferred as deferred:
+            not_before = time.time() + deferred.delay_seconds
+            if await asyncio.to_thread(self.store.defer, job_id, self.owner, deferred.params, not_before):
+                self._enqueue(job_id, not_before)
+        except Exception as e:
+            await asyncio.to_thread(self.store.finish, job_id, self.owner, STATUS_FAILED, str(e))
+        else:
+            await asyncio.to_thread(self.store.finish, job_id, self.owner, STATUS_DONE)
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager(JobStore(settings.JOBS_SQLITE_PATH), workers=settings.JOB_WORKERS)
+    return _manager
@@ -0,0 +1,111 @@
+# app/modules/jobs/routes.py
+from fastapi import APIRouter, Body, HTTPException, Query
+from typing import List, Optional
+from app.modules.jobs.job_service import JOB_CLASSIFY, JOB_COLLECT, get_job_manager
+from app.utils import default_window
+
+router = APIRouter()
+
+
+@router.post("/collect")
+async def submit_collect_job(
+    username: str = Query(..., description="Nombre de usuario de Twitter"),
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    max_results: Optional[int] = Query(None, ge=1, description="Total máximo de tweets"),
+    mock: bool = Query(True, description="Usar datos simulados en lugar de reales"),
+    include_comments: bool = Query(True, description="Adjuntar comentarios a cada tweet"),
+    max_comments: int = Query(5, ge=1, le=100, description="Comentarios máximos por tweet"),
+):
+    """
+    Encola un job de recolección + clasificación + comentarios y devuelve su ID de inmediato.
+    """
+    start_date, end_date = default_window(start_date, end_date)
+
+    job = await get_job_manager().submit(JOB_COLLECT, {
+        "username": username,
+        "start_date": start_date,
+        "end_date": end_date,
+        "max_results": max_results,
+        "mock": mock,
+        "include_comments": include_comments,
+        "max_comments": max_comments,
+    })
+    return {"status": "ok", "job": job}
+
+
+@router.post("/classify")
+async def submit_classify_job(
+    texts: List[str] = Body(..., description="Lista de textos a analizar"),
+    mode: str = Query("cascade", description="'batch' o 'cascade'"),
+):
+    """
+    Encola la clasificación de una lista de textos y devuelve el ID del job de inmediato.
+    """
+    if not texts:
+        raise HTTPException(status_code=400, detail="Debe enviarse al menos un texto para analizar.")
+    if mode not in ("batch", "cascade"):
+        raise HTTPException(status_code=400, detail=f"Modo no soportado: {mode}")
+
+    job = await get_job_manager().submit(JOB_CLASSIFY, {"texts": texts, "mode": mode})
+    job["params"] = {"mode": mode, "input_count": len(texts)}
+    return {"status": "ok", "job": job}
+
+
+@router.get("")
+def list_jobs(
+    status: Optional[str] = Query(None, description="Filtrar por estado"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Lista los jobs más recientes.
+    """
+    return {"status": "ok", "jobs": get_job_manager().store.list(status=status, limit=limit)}
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """
+    Estado y progreso de un job.
+    """
+    job = get_job_manager().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+    job["params"].pop("texts", None)
+    return {"status": "ok", "job": job}
+
+
+@router.get("/{job_id}/results")
+def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Posición desde la cual leer resultados"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Resultados (parciales o finales) de un job, paginados por posición.
+    """
+    manager = get_job_manager()
+    job = manager.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+    items = manager.store.results(job_id, offset=offset, limit=limit)
+    return {
+        "status": "ok",
+        "job_status": job["status"],
+        "offset": offset,
+        "count": len(items),
+        "next_offset": offset + len(items) if offset + len(items) < job["results_available"] else None,
+        "results": items,
+    }
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancela un job en cola o en ejecución (los resultados ya guardados se conservan).
+    """
+    job = await get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+    job["params"].pop("texts", None)
+    return {"status": "ok", "job": job}
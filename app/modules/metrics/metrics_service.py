@@ -0,0 +1,251 @@
+# app/modules/metrics/metrics_service.py
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Intervalos (inicio, fin) por etapa de la request en curso; None fuera de una request.
+request_timings: ContextVar[Optional[Dict[str, List[Tuple[float, float]]]]] = ContextVar("request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # [conteo por bucket..., +Inf, suma]
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = self.header()
+        for key, series in items:
+            for bound, count in zip([*self.buckets, "+Inf"], series):
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Registra una función que actualiza gauges justo antes de cada exposición.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                pass
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "sentidata_http_request_duration_seconds", "Latencia de las requests HTTP por endpoint.",
+    ("method", "route", "status")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "sentidata_http_requests_in_flight", "Requests HTTP en curso por endpoint.", ("route",)))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "sentidata_stage_duration_seconds", "Latencia por etapa (llamadas a Twitter, OpenAI, etc.).", ("stage",)))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "sentidata_stage_errors_total", "Errores por etapa.", ("stage",)))
+STAGE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "sentidata_stage_in_flight", "Llamadas en curso por etapa.", ("stage",)))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "sentidata_llm_tokens_total", "Tokens consumidos por modelo y tipo (prompt / completion).", ("model", "type")))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "sentidata_llm_retries_total", "Reintentos de llamadas al LLM.", ("model",)))
+RATE_LIMIT_WAIT = REGISTRY.register(Counter(
+    "sentidata_rate_limit_wait_seconds_total", "Segundos esperados por límites de tasa.", ("provider",)))
+CACHE_STATS = REGISTRY.register(Gauge(
+    "sentidata_classification_cache", "Contadores de la caché de clasificaciones.", ("stat",)))
+COLLECT_CACHE_STATS = REGISTRY.register(Gauge(
+    "sentidata_collect_cache", "Contadores de la caché de respuestas de recolección.", ("stat",)))
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Mide una etapa: histograma de latencia, gauge de llamadas en curso, contador de errores
+    y, si hay una request activa, suma el tiempo a su desglose (cabecera Server-Timing).
+    """
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        finished = time.perf_counter()
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_LATENCY.observe(finished - started, stage=stage)
+        add_request_timing(stage.split(".")[0], started, finished)
+
+
+def add_request_timing(name: str, started: float, finished: float) -> None:
+    """
+    Anota un intervalo en el desglose de la request activa. Se guardan intervalos y no sumas
+    porque las llamadas concurrentes (p. ej. lotes al LLM con gather) se solapan.
+    """
+    timings = request_timings.get()
+    if timings is not None:
+        timings.setdefault(name, []).append((started, finished))
+
+
+def _covered(intervals: List[Tuple[float, float]]) -> float:
+    total = 0.0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def record_llm_usage(model: str, usage) -> None:
+    """
+    Registra tokens de una respuesta de OpenAI (`response.usage`).
+    """
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, type="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, type="completion")
+
+
+def record_rate_limit_wait(provider: str, seconds: float, started: Optional[float] = None) -> None:
+    """
+    Registra una espera por límite de tasa. Sin `started`, se asume que la espera acaba de terminar.
+    """
+    if seconds > 0:
+        RATE_LIMIT_WAIT.inc(seconds, provider=provider)
+        if started is None:
+            started = time.perf_counter() - seconds
+        add_request_timing("rate_limit", started, started + seconds)
+
+
+def format_server_timing(timings: Dict[str, List[Tuple[float, float]]], total: float) -> str:
+    """
+    Cabecera Server-Timing: tiempo por etapa, el resto ("app") y el total, en milisegundos.
+    """
+    durations = {name: _covered(intervals) for name, intervals in timings.items()}
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sorted(durations.items())]
+    app_time = max(0.0, total - _covered([i for intervals in timings.values() for i in intervals]))
+    parts.append(f"app;dur={app_time * 1000:.1f}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class _TweepyRateLimitHandler(logging.Handler):
+    """
+    Tweepy con `wait_on_rate_limit=True` duerme en silencio y solo lo anuncia en su log:
+    "Rate limit exceeded. Sleeping for N seconds." Este handler convierte ese aviso en métrica.
+    """
+
+    _pattern = re.compile(r"Sleeping for (\d+(?:\.\d+)?) seconds")
+
+    def emit(self, record: logging.LogRecord) -> None:
+        match = self._pattern.search(record.getMessage())
+        if match:
+            # Tweepy lo registra justo antes de dormir
+            record_rate_limit_wait("twitter", float(match.group(1)), started=time.perf_counter())
+
+
+_tweepy_logger = logging.getLogger("tweepy.client")
+_tweepy_logger.addHandler(_TweepyRateLimitHandler(level=logging.WARNING))
@@ -0,0 +1,33 @@
+# app/modules/metrics/routes.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.modules.analysis.cache_service import get_classification_cache
+from app.modules.metrics.metrics_service import CACHE_STATS, COLLECT_CACHE_STATS, REGISTRY
+from app.modules.social.collect_cache_service import get_collection_cache
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _collect_cache_stats() -> None:
+    """
+    Copia a gauges los contadores que ya llevan las cachés de clasificaciones y de recolección.
+    """
+    for gauge, cache in ((CACHE_STATS, get_classification_cache()), (COLLECT_CACHE_STATS, get_collection_cache())):
+        if cache is not None:
+            for name, value in cache.stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauge.set(value, stat=name)
+
+
+REGISTRY.add_collector(_collect_cache_stats)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """
+    Métricas en formato de texto de Prometheus: latencias por endpoint y por etapa,
+    tokens por modelo, esperas por límites de tasa, errores, llamadas en curso y caché.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
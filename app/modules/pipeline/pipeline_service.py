@@ -0,0 +1,164 @@
+# app/modules/pipeline/pipeline_service.py
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import settings
+from app.modules.analysis.batch_service import chunk, classify_relevance_batched_async
+from app.modules.analysis.prefilter_service import classify_with_prefilter_async
+from app.modules.social.comments_service import get_mock_comments, get_real_comments
+from app.modules.social.twitter_service import aiter_real_tweet_pages, iter_mock_tweet_pages
+from app.modules.storage.store_service import get_local_store
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, stage: str, error: Exception):
+        self.stage = stage
+        self.error = error
+
+
+async def _collect(queue: asyncio.Queue, username: str, start_date: str, end_date: str,
+                   max_results: Optional[int], mock: bool, batch_size: int) -> None:
+    """
+    Etapa 1: recolecta tweets y los encola en lotes de `batch_size`.
+    """
+    try:
+        if mock:
+            for page in iter_mock_tweet_pages(username, start_date, end_date, max_results=max_results):
+                for batch in chunk(page["data"], batch_size):
+                    await queue.put(batch)
+        else:
+            async for page in aiter_real_tweet_pages(username, start_date, end_date,
+                                                     settings.TWITTER_BEARER_TOKEN,
+                                                     max_results=max_results):
+                if page.get("status") == "error":
+                    await queue.put(_StageError("collect", RuntimeError(page.get("details") or page.get("message"))))
+                    break
+                for batch in chunk(page["data"], batch_size):
+                    await queue.put(batch)
+    except Exception as e:
+        await queue.put(_StageError("collect", e))
+    finally:
+        await queue.put(_DONE)
+
+
+async def _classify(source: asyncio.Queue, target: asyncio.Queue, batch_size: int) -> None:
+    """
+    Etapa 2: clasifica cada lote (una etiqueta por tweet) mientras la recolección continúa.
+    """
+    try:
+        while True:
+            batch = await source.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, _StageError):
+                await target.put(batch)
+                continue
+            texts = [tweet.get("text", "") for tweet in batch]
+            if settings.PREFILTER_ENABLED:
+                labels = (await classify_with_prefilter_async(texts, batch_size=batch_size))["labels"]
+            else:
+                labels = await classify_relevance_batched_async(texts, batch_size=batch_size)
+            for tweet, label in zip(batch, labels):
+                tweet["classification"] = label
+            await target.put(batch)
+    except Exception as e:
+        await target.put(_StageError("classify", e))
+    finally:
+        await target.put(_DONE)
+
+
+async def _fetch_comments(tweet_ids: List[str], mock: bool, max_comments: int) -> Dict[str, List[Dict[str, Any]]]:
+    if mock:
+        return get_mock_comments(tweet_ids, max_comments_per_post=max_comments)
+    result = await asyncio.to_thread(get_real_comments, tweet_ids, settings.TWITTER_BEARER_TOKEN, max_comments)
+    return result.get("comments", {})
+
+
+def _enrich(tweet: Dict[str, Any], comments: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    item = {
+        "id": tweet.get("id"),
+        "text": tweet.get("text"),
+        "created_at": tweet.get("created_at"),
+        "author_id": tweet.get("author_id"),
+        "public_metrics": tweet.get("public_metrics"),
+        "classification": tweet.get("classification"),
+    }
+    if comments is not None:
+        item["comments"] = comments
+    return item
+
+
+async def run_pipeline(
+    username: str,
+    start_date: str,
+    end_date: str,
+    max_results: Optional[int] = None,
+    mock: bool = True,
+    include_comments: bool = True,
+    max_comments: int = 5,
+    batch_size: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Ejecuta recolección → clasificación → comentarios como etapas concurrentes unidas
+    por colas acotadas, y entrega cada tweet enriquecido apenas está listo.
+    Al final entrega un resumen con "status": "done".
+    Cada lote (tweets con su etiqueta y comentarios) se guarda en el almacén local.
+    """
+    batch_size = batch_size or settings.ANALYSIS_BATCH_SIZE
+    queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+    tweets_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    classified_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(_collect(tweets_queue, username, start_date, end_date, max_results, mock, batch_size)),
+        asyncio.create_task(_classify(tweets_queue, classified_queue, batch_size)),
+    ]
+    emitted = 0
+    errors = 0
+
+    try:
+        # Etapa 3: comentarios del lote k mientras se clasifica el lote k+1
+        while True:
+            batch = await classified_queue.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, _StageError):
+                errors += 1
+                yield {"status": "error", "stage": batch.stage, "details": str(batch.error)}
+                continue
+
+            comments: Dict[str, List[Dict[str, Any]]] = {}
+            if include_comments:
+                try:
+                    comments = await _fetch_comments([t.get("id") for t in batch], mock, max_comments)
+                except Exception as e:
+                    errors += 1
+                    yield {"status": "error", "stage": "comments", "details": str(e)}
+
+            store = get_local_store()
+            if store is not None:
+                source = "mock" if mock else "real"
+                await asyncio.to_thread(store.upsert_tweets, batch, username, source)
+                await asyncio.to_thread(store.upsert_comments,
+                                        [c for values in comments.values() for c in values], source)
+
+            for tweet in batch:
+                emitted += 1
+                yield _enrich(tweet, comments.get(tweet.get("id"), []) if include_comments else None)
+
+        yield {
+            "status": "done",
+            "tweets": emitted,
+            "errors": errors,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Esperar a que las etapas terminen de cancelarse (sin dejar tareas ni errores sueltos)
+        await asyncio.gather(*tasks, return_exceptions=True)
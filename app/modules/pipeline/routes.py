@@ -0,0 +1,34 @@
+# app/modules/pipeline/routes.py
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.modules.pipeline.pipeline_service import run_pipeline
+from app.utils import default_window, to_json_line
+
+router = APIRouter()
+
+
+@router.get("/twitter")
+def twitter_pipeline(
+    username: str = Query(..., description="Nombre de usuario de Twitter"),
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    max_results: Optional[int] = Query(None, ge=1, description="Total máximo de tweets"),
+    mock: bool = Query(True, description="Usar datos simulados en lugar de reales"),
+    include_comments: bool = Query(True, description="Adjuntar comentarios a cada tweet"),
+    max_comments: int = Query(5, ge=1, le=100, description="Comentarios máximos por tweet"),
+    batch_size: Optional[int] = Query(None, ge=1, le=100, description="Tweets por lote de clasificación"),
+):
+    """
+    Recolecta, clasifica y enriquece tweets con sus comentarios en el servidor.
+    Responde NDJSON: un tweet enriquecido por línea en cuanto está listo, y una línea final de resumen.
+    """
+    start_date, end_date = default_window(start_date, end_date)
+
+    async def lines():
+        async for item in run_pipeline(username, start_date, end_date, max_results=max_results, mock=mock,
+                                       include_comments=include_comments, max_comments=max_comments,
+                                       batch_size=batch_size):
+            yield to_json_line(item)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
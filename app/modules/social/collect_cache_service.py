@@ -0,0 +1,182 @@
+# app/modules/social/collect_cache_service.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+CACHE_COALESCED = "COALESCED"
+CACHE_BYPASS = "BYPASS"
+
+
+def _normalize_date(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip("Z")).isoformat()
+    except ValueError:
+        return value
+
+
+def make_collect_key(username: str, start_date: Optional[str], end_date: Optional[str], max_results: int,
+                     mock: bool, pagination_token: Optional[str] = None) -> Tuple:
+    """
+    Clave de caché con los parámetros normalizados. Sin fechas la ventana es "últimos 7 días"
+    (se calcula al momento), así que esas requests comparten clave entre sí.
+    """
+    return (
+        username.lower(),
+        _normalize_date(start_date),
+        _normalize_date(end_date),
+        max_results,
+        bool(mock),
+        pagination_token or None,
+    )
+
+
+class _Flight:
+    """
+    Llamada al upstream en curso; las requests idénticas esperan su resultado.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class CollectionCache:
+    """
+    Caché en memoria de respuestas de recolección con coalescencia (single-flight):
+    - Requests idénticas y simultáneas comparten una sola llamada al upstream.
+    - Una entrada es fresca durante `ttl_seconds`; luego, hasta `stale_seconds` más, se sirve
+      vencida mientras se refresca en segundo plano (stale-while-revalidate).
+    - LRU acotado a `max_entries`. Solo se guardan resultados que `cacheable` acepte.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, stale_seconds: float = 300, max_entries: int = 256,
+                 clock: Callable[[], float] = time.time):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float]]" = OrderedDict()
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "errors": 0,
+            "evictions": 0,
+        }
+
+    def _store(self, key: Tuple, value: Any) -> None:
+        self._entries[key] = (value, self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _run_flight(self, key: Tuple, flight: _Flight, compute: Callable[[], Any],
+                    cacheable: Callable[[Any], bool]) -> None:
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+        with self._lock:
+            if flight.error is None and cacheable(flight.value):
+                self._store(key, flight.value)
+            elif flight.error is not None:
+                self.counters["errors"] += 1
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = lambda value: True,
+                       refresh: bool = False) -> Tuple[Any, str]:
+        """
+        Devuelve (valor, estado) donde estado es HIT, STALE, MISS o COALESCED.
+        Con `refresh` no se lee la caché (p. ej. `Cache-Control: no-cache`), pero se sigue
+        compartiendo la llamada en curso y se guarda el resultado.
+        """
+        with self._lock:
+            entry = None if refresh else self._entries.get(key)
+            age = self._clock() - entry[1] if entry is not None else None
+            if entry is not None and age <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[0], CACHE_HIT
+
+            flight = self._flights.get(key)
+            if entry is not None and age <= self.ttl_seconds + self.stale_seconds:
+                # Vencida pero utilizable: responder ya y refrescar en segundo plano (una sola vez)
+                self.counters["stale_hits"] += 1
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    self.counters["refreshes"] += 1
+                    threading.Thread(target=self._run_flight, args=(key, flight, compute, cacheable),
+                                     daemon=True).start()
+                return entry[0], CACHE_STALE
+
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if leader:
+            self._run_flight(key, flight, compute, cacheable)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value, CACHE_MISS if leader else CACHE_COALESCED
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"] + self.counters["coalesced"]
+            served = lookups - self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "in_flight": len(self._flights),
+                "capacity": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+            }
+
+
+_cache: Optional[CollectionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_collection_cache() -> Optional[CollectionCache]:
+    """
+    Devuelve la caché compartida de recolección (o None si COLLECT_CACHE_ENABLED está desactivado).
+    """
+    global _cache
+    if not settings.COLLECT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CollectionCache(
+                    ttl_seconds=settings.COLLECT_CACHE_TTL_SECONDS,
+                    stale_seconds=settings.COLLECT_CACHE_STALE_SECONDS,
+                    max_entries=settings.COLLECT_CACHE_MAX_ENTRIES,
+                )
+    return _cache
@@ -1,117 +1,286 @@
 # app/modules/social/comments_service.py
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Set, Tuple
 
-import random
-import tweepy
+from app.config import settings
+from app.modules.metrics.metrics_service import timed
+from app.providers import get_twitter_client
+from app.modules.social.synthetic_service import get_synthetic_generator
+from app.modules.social.watermark_service import SCOPE_CONVERSATION, get_watermark_store, is_newer, newest_id
+
+if TYPE_CHECKING:
+    import tweepy
 
 
 def get_mock_comments(tweet_ids: List[str], max_comments_per_post: int = 5) -> Dict:
     """
-    Genera comentarios simulados para una lista de IDs de tweets.
+    Genera comentarios simulados para una lista de IDs de tweets con el generador sintético:
+    la cantidad por tweet coincide con su `reply_count` (hasta `max_comments_per_post`)
+    y la misma semilla siempre produce los mismos comentarios.
     Retorna una estructura similar a lo que devolvería un endpoint real de comentarios.
     """
+    return get_synthetic_generator().comments(list(dict.fromkeys(tweet_ids)), max_comments_per_post)
+
+
+# Límites de la API v2
+LOOKUP_MAX_IDS = 100        # GET /2/tweets?ids=...
+SEARCH_MIN_RESULTS = 10     # GET /2/tweets/search/recent
+SEARCH_MAX_RESULTS = 100
+QUERY_MAX_LENGTH = 512
+
+COMMENT_TWEET_FIELDS = [
+    "id", "text", "author_id", "created_at", "conversation_id",
+    "public_metrics", "in_reply_to_user_id", "referenced_tweets"
+]
+COMMENT_USER_FIELDS = ["id", "name", "username", "profile_image_url", "verified"]
+
+def _as_dict(obj) -> Dict[str, Any]:
+    return obj.data if hasattr(obj, "data") else obj
 
-    comments_response = {}
-    for tweet_id in tweet_ids:
-        num_comments = random.randint(1, max_comments_per_post)
-        comments = []
-
-        for i in range(num_comments):
-            comment_id = f"{tweet_id}_c{i}"
-            created_at = (datetime.utcnow() - timedelta(minutes=random.randint(0, 10000))).isoformat() + "Z"
-            text = random.choice([
-                                "¡Excelente iniciativa!",
-                "Me parece muy positivo para la comunidad.",
-                "Gracias por mantenernos informados.",
-                "Espero que esto mejore la seguridad en la zona.",
-                "Ojalá continúen con más proyectos como este."
-            ])
-            author_id = f"user_{random.randint(1000, 9999)}"
-
-            comments.append({
-                "id": comment_id,
-                "tweet_id": tweet_id,
-                "text": text,
-                "created_at": created_at,
-                "author_id": author_id,
-                "like_count": random.randint(0, 50),
-                "reply_count": random.randint(0, 10)
-            })
-
-        comments_response[tweet_id] = comments
-
-    return comments_response
-
-
-def get_real_comments(tweet_ids: List[str], bearer_token: str, max_results: int = 20) -> Dict[str, Any]:
+
+def _lookup_conversations(client: "tweepy.Client", tweet_ids: List[str]) -> Dict[str, Dict[str, str]]:
     """
-    Obtiene las respuestas (comentarios) reales a una lista de tweets usando Tweepy + API v2.
+    Obtiene conversation_id y author_id de los tweets en bloques de hasta 100 IDs por request.
     """
+    found: Dict[str, Dict[str, str]] = {}
+    for start in range(0, len(tweet_ids), LOOKUP_MAX_IDS):
+        block = tweet_ids[start:start + LOOKUP_MAX_IDS]
+        with timed("twitter.get_tweets"):
+            resp = client.get_tweets(ids=block, tweet_fields=["conversation_id", "author_id"])
+        for tweet in getattr(resp, "data", None) or []:
+            data = _as_dict(tweet)
+            found[str(data["id"])] = {
+                "conversation_id": str(data["conversation_id"]),
+                "author_id": str(data["author_id"]),
+            }
+    return found
 
-    client = tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=True)
-    comments_response: Dict[str, List[Dict[str, Any]]] = {}
 
-    for tweet_id in tweet_ids:
-        try:
-            # 1️⃣ Obtener tweet original (para conocer su conversation_id y author_id)
-            tweet_resp = client.get_tweet(
-                id=tweet_id,
-                tweet_fields=["conversation_id", "author_id"]
-            )
+def build_conversation_queries(conversations: Dict[str, str], max_length: int = QUERY_MAX_LENGTH) -> List[Dict[str, Any]]:
+    """
+    Agrupa conversaciones ({conversation_id: author_id}) en consultas con OR,
+    una serie por autor (para excluir sus propias respuestas) y sin superar `max_length`.
+    """
+    by_author: Dict[str, List[str]] = {}
+    for conversation_id, author_id in conversations.items():
+        by_author.setdefault(author_id, []).append(conversation_id)
 
-            if not tweet_resp or not getattr(tweet_resp, "data", None):
-                comments_response[tweet_id] = []
-                continue
+    queries = []
+    for author_id, conversation_ids in by_author.items():
+        suffix = f" -from:{author_id}"
+        current: List[str] = []
+        for conversation_id in conversation_ids:
+            candidate = current + [conversation_id]
+            if current and len(_render_query(candidate, suffix)) > max_length:
+                queries.append({"query": _render_query(current, suffix), "conversation_ids": current, "suffix": suffix})
+                candidate = [conversation_id]
+            current = candidate
+        if current:
+            queries.append({"query": _render_query(current, suffix), "conversation_ids": current, "suffix": suffix})
+    return queries
 
-            conversation_id = tweet_resp.data["conversation_id"]
-            author_id = tweet_resp.data["author_id"]
 
-            # 2️⃣ Buscar respuestas dentro del hilo
-            query = f"conversation_id:{conversation_id} -from:{author_id}"
+def _render_query(conversation_ids: List[str], suffix: str) -> str:
+    clause = " OR ".join(f"conversation_id:{c}" for c in conversation_ids)
+    if len(conversation_ids) > 1:
+        clause = f"({clause})"
+    return clause + suffix
 
+
+def _search_conversations(client: "tweepy.Client", query: Dict[str, Any],
+                          max_per_conversation: int) -> Tuple[List[Dict[str, Any]], Set[str], int]:
+    """
+    Ejecuta una consulta agrupada hasta reunir `max_per_conversation` respuestas por
+    conversación (o hasta agotar los resultados). Cada conversación que completa su cupo
+    sale de la consulta, que se rearma para las restantes y continúa (`until_id`) desde la
+    respuesta más antigua vista: una conversación con pocas respuestas no obliga a leer
+    todas las páginas de las más activas.
+    Con `query["watermarks"]` se omiten las respuestas ya recolectadas de cada conversación,
+    y una conversación queda agotada apenas la búsqueda baja de su marca.
+    Devuelve las respuestas (a lo sumo `max_per_conversation` por conversación), las
+    conversaciones agotadas (se leyeron todas sus respuestas nuevas) y cuántas se omitieron.
+    """
+    marks: Dict[str, str] = query.get("watermarks") or {}
+    counts = {conversation_id: 0 for conversation_id in query["conversation_ids"]}
+    active = list(query["conversation_ids"])
+    exhausted: Set[str] = set()
+    results: List[Dict[str, Any]] = []
+    skipped = 0
+    text, until_id, next_token = query["query"], query.get("until_id"), None
+    oldest: Optional[int] = None
+    while True:
+        missing = sum(max_per_conversation - counts[c] for c in active)
+        with timed("twitter.search_recent_tweets"):
             search_resp = client.search_recent_tweets(
-                query=query,
-                max_results=max_results,
-                tweet_fields=[
-                    "id", "text", "author_id", "created_at",
-                    "public_metrics", "in_reply_to_user_id",
-                    "referenced_tweets"
-                ],
+                query=text,
+                max_results=max(SEARCH_MIN_RESULTS, min(SEARCH_MAX_RESULTS, missing)),
+                next_token=next_token,
+                since_id=query.get("since_id"),
+                until_id=until_id,
+                tweet_fields=COMMENT_TWEET_FIELDS,
                 expansions=["author_id"],
-                user_fields=[
-                    "id", "name", "username", "profile_image_url", "verified"
-                ],
+                user_fields=COMMENT_USER_FIELDS,
             )
-
-            # 3️⃣ Estructurar datos
-            tweets_data = getattr(search_resp, "data", None)
-            if not tweets_data:
-                comments_response[tweet_id] = []
+        for tweet in getattr(search_resp, "data", None) or []:
+            data = _as_dict(tweet)
+            if str(data.get("id", "")).isdigit():
+                oldest = min(oldest or int(data["id"]), int(data["id"]))
+            conversation_id = str(data.get("conversation_id"))
+            if not is_newer(data.get("id"), marks.get(conversation_id)):
+                skipped += 1
                 continue
+            if counts.get(conversation_id, max_per_conversation) < max_per_conversation:
+                counts[conversation_id] += 1
+                results.append(data)
+        next_token = (getattr(search_resp, "meta", None) or {}).get("next_token")
+        if not next_token:
+            return results, exhausted | set(active), skipped
+
+        # Los resultados vienen del más nuevo al más antiguo: bajo la marca ya no hay nada nuevo
+        exhausted.update(c for c in active if marks.get(c) and oldest is not None and oldest <= int(marks[c]))
+        remaining = [c for c in active if counts[c] < max_per_conversation and c not in exhausted]
+        if not remaining:
+            return results, exhausted, skipped
+        if len(remaining) < len(active) and oldest is not None:
+            # Consulta más corta para las que faltan, desde donde se quedó la anterior
+            active = remaining
+            text, until_id, next_token = _render_query(active, query["suffix"]), str(oldest), None
+
+
+def _update_conversation_watermark(conversation_id: str, items: List[Dict[str, Any]], exhausted: bool,
+                                   has_mark: bool, resuming: bool) -> Optional[str]:
+    """
+    Actualiza la marca de una conversación según lo que cubrió la búsqueda:
+    - agotada: todo lo nuevo se devolvió; la marca avanza (o se cierra el hueco retomado);
+    - recortada por el tope: se devolvieron las más nuevas y queda un hueco pendiente entre
+      la marca y la más antigua devuelta, que la siguiente recolección retoma;
+    - sin marca previa: la primera recolección fija la línea base en la más nueva devuelta.
+    Devuelve "advanced", "pending" o None.
+    """
+    store = get_watermark_store()
+    latest = newest_id(items)
+    created_at = next((i.get("created_at") for i in items if str(i["id"]) == latest), None)
+    if resuming:
+        if exhausted:
+            return "advanced" if store.close_pending(SCOPE_CONVERSATION, conversation_id) else None
+        if items:
+            store.hold(SCOPE_CONVERSATION, conversation_id, _oldest_id(items))
+        return "pending"
+    if not latest:
+        return None
+    if exhausted or not has_mark:
+        return "advanced" if store.advance(SCOPE_CONVERSATION, conversation_id, latest, created_at) else None
+    store.hold(SCOPE_CONVERSATION, conversation_id, _oldest_id(items), latest, created_at)
+    return "pending"
+
+
+def _oldest_id(items: List[Dict[str, Any]]) -> str:
+    return str(min(int(item["id"]) for item in items if str(item.get("id", "")).isdigit()))
+
+
+def get_real_comments(tweet_ids: List[str], bearer_token: str, max_results: int = 20,
+                      max_workers: Optional[int] = None, incremental: bool = False) -> Dict[str, Any]:
+    """
+    Obtiene las respuestas (comentarios) reales a una lista de tweets usando Tweepy + API v2.
+    Consulta los tweets originales en bloque, agrupa las conversaciones en búsquedas con OR
+    y ejecuta las búsquedas en paralelo con un pool acotado.
+    En modo `incremental` solo devuelve respuestas posteriores a la marca de agua de cada conversación;
+    si una conversación tiene más respuestas nuevas que `max_results`, las restantes quedan
+    pendientes y se devuelven en la siguiente recolección.
+    """
+    import tweepy
+
+    client = get_twitter_client(bearer_token)
+    comments_response: Dict[str, List[Dict[str, Any]]] = {tweet_id: [] for tweet_id in tweet_ids}
+
+    # 1️⃣ Obtener tweets originales en bloque (conversation_id y author_id)
+    try:
+        originals = _lookup_conversations(client, list(dict.fromkeys(tweet_ids)))
+    except tweepy.TweepyException as e:
+        error = [{"error": True, "message": str(e)}]
+        return {
+            "status": "success",
+            "comments": {tweet_id: list(error) for tweet_id in tweet_ids}
+        }
+
+    tweets_by_conversation: Dict[str, List[str]] = {}
+    authors: Dict[str, str] = {}
+    for tweet_id, info in originals.items():
+        tweets_by_conversation.setdefault(info["conversation_id"], []).append(tweet_id)
+        authors[info["conversation_id"]] = info["author_id"]
+
+    # 2️⃣ Buscar respuestas de varias conversaciones por consulta, en paralelo
+    watermarks: Dict[str, str] = {}
+    pending: Dict[str, str] = {}
+    if incremental:
+        store = get_watermark_store()
+        watermarks = store.get_many(SCOPE_CONVERSATION, list(authors))
+        pending = store.get_pending_many(SCOPE_CONVERSATION, list(watermarks))
+    queries = build_conversation_queries({c: a for c, a in authors.items() if c not in pending})
+    for query in queries:
+        query["watermarks"] = {c: watermarks[c] for c in query["conversation_ids"] if c in watermarks}
+        # since_id común: el más antiguo del grupo, y solo si todas tienen marca de agua
+        marks = [watermarks.get(c) for c in query["conversation_ids"]]
+        if incremental and all(marks):
+            query["since_id"] = str(min(int(m) for m in marks))
+    for conversation_id, until_id in pending.items():
+        # Hueco pendiente de una recolección recortada: se retoma antes que lo más nuevo
+        query = build_conversation_queries({conversation_id: authors[conversation_id]})[0]
+        mark = watermarks[conversation_id]
+        queries.append({**query, "since_id": mark, "until_id": until_id, "watermarks": {conversation_id: mark}})
+    report = {"conversations": len(authors), "with_watermark": len(watermarks), "skipped": 0,
+              "advanced": 0, "resumed": len(pending), "pending": 0}
+
+    if queries:
+        workers = min(max_workers or settings.COMMENTS_MAX_WORKERS, len(queries))
+        with timed("twitter.search_conversations"), ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_search_conversations, client, query, max_results): query
+                for query in queries
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    replies, exhausted, skipped = future.result()
+                except tweepy.TweepyException as e:
+                    for conversation_id in query["conversation_ids"]:
+                        for tweet_id in tweets_by_conversation[conversation_id]:
+                            comments_response[tweet_id] = [{"error": True, "message": str(e)}]
+                    continue
+
+                # 3️⃣ Estructurar datos (la búsqueda ya limita las respuestas por conversación)
+                report["skipped"] += skipped
+                returned: Dict[str, List[Dict[str, Any]]] = {}
+                for t in replies:
+                    conversation_id = str(t.get("conversation_id"))
+                    returned.setdefault(conversation_id, []).append(t)
+                    metrics = t.get("public_metrics") or {}
+                    for tweet_id in tweets_by_conversation.get(conversation_id, []):
+                        comments_response[tweet_id].append({
+                            "id": t["id"],
+                            "tweet_id": tweet_id,
+                            "conversation_id": conversation_id,
+                            "text": t["text"],
+                            "created_at": t["created_at"],
+                            "author_id": t["author_id"],
+                            "like_count": metrics.get("like_count", 0),
+                            "reply_count": metrics.get("reply_count", 0),
+                        })
+
+                if incremental:
+                    for conversation_id in query["conversation_ids"]:
+                        outcome = _update_conversation_watermark(
+                            conversation_id, returned.get(conversation_id, []),
+                            exhausted=conversation_id in exhausted,
+                            has_mark=conversation_id in watermarks, resuming=conversation_id in pending,
+                        )
+                        if outcome:
+                            report[outcome] += 1
 
-            formatted_comments = []
-            for t in tweets_data:
-                metrics = t["public_metrics"] if "public_metrics" in t else {}
-                formatted_comments.append({
-                    "id": t["id"],
-                    "tweet_id": tweet_id,
-                    "text": t["text"],
-                    "created_at": t["created_at"],
-                    "author_id": t["author_id"],
-                    "like_count": metrics.get("like_count", 0),
-                    "reply_count": metrics.get("reply_count", 0),
-                })
-
-            comments_response[tweet_id] = formatted_comments
-
-        except tweepy.TweepyException as e:
-            comments_response[tweet_id] = [{
-                "error": True,
-                "message": str(e)
-            }]
-
-    return {
+    response = {
         "status": "success",
         "comments": comments_response
-    }
\ No newline at end of file
+    }
+    if incremental:
+        response["incremental"] = report
+    return response
@@ -0,0 +1,335 @@
+# app/modules/social/fanout_service.py
+"""
+Recolección de tweets de varias cuentas en paralelo con un planificador que respeta
+el presupuesto de rate limit de cada endpoint.
+
+El presupuesto se lee de las cabeceras `x-rate-limit-limit / -remaining / -reset` de cada
+respuesta. Mientras queda presupuesto las cuentas avanzan en paralelo; cuando se agota,
+en vez de dormir un hilo (como `wait_on_rate_limit=True`) la cuenta queda en cola con su
+cursor y el ETA en que se renueva la ventana, y se devuelven los resultados parciales.
+"""
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.config import settings
+from app.modules.metrics.metrics_service import timed
+from app.modules.social.synthetic_service import get_synthetic_generator
+from app.modules.social.twitter_service import PAGE_MAX_RESULTS, PAGE_MIN_RESULTS, TWEET_FIELDS, USER_FIELDS
+from app.modules.storage.store_service import get_local_store
+from app.providers import registry
+
+ENDPOINT_USER_LOOKUP = "GET /2/users/by/username/:username"
+ENDPOINT_USER_TWEETS = "GET /2/users/:id/tweets"
+RATE_LIMIT_WINDOW_SECONDS = 15 * 60
+# Espera mínima tras un 429 cuyo `reset` falta o ya pasó (evita reintentar de inmediato)
+RATE_LIMIT_MIN_BACKOFF_SECONDS = 60.0
+
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"/2/users/by/username/[^/]+$"), ENDPOINT_USER_LOOKUP),
+    (re.compile(r"/2/users/[^/]+/tweets$"), ENDPOINT_USER_TWEETS),
+]
+
+ACCOUNT_DONE = "done"
+ACCOUNT_QUEUED = "queued"
+ACCOUNT_ERROR = "error"
+
+
+class RateLimited(Exception):
+    """
+    La API respondió 429; `reset` es el epoch en que se renueva la ventana (si se conoce).
+    """
+
+    def __init__(self, reset: Optional[float] = None):
+        super().__init__("Rate limit agotado")
+        self.reset = reset
+
+
+class RateLimitTracker:
+    """
+    Presupuesto por endpoint dentro de la ventana actual. Cada llamada reserva una unidad
+    (`acquire`) y las cabeceras de la respuesta corrigen el valor con el de la API.
+    Los límites iniciales son una estimación hasta ver la primera respuesta.
+    """
+
+    def __init__(self, limits: Dict[str, int], window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self._limits = dict(limits)
+        self._window = window_seconds
+        self._clock = clock
+        self._state: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _current(self, endpoint: str, now: float) -> Dict[str, float]:
+        state = self._state.get(endpoint)
+        if state is None or now >= state["reset"]:
+            limit = state["limit"] if state else self._limits.get(endpoint, 1)
+            state = {"limit": limit, "remaining": limit, "reset": now + self._window}
+            self._state[endpoint] = state
+        return state
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        Reserva una llamada. Devuelve 0 si hay presupuesto o los segundos que faltan
+        para que se renueve la ventana.
+        """
+        with self._lock:
+            now = self._clock()
+            state = self._current(endpoint, now)
+            if state["remaining"] > 0:
+                state["remaining"] -= 1
+                return 0.0
+            return max(0.0, state["reset"] - now)
+
+    def update(self, endpoint: str, limit: Optional[int], remaining: Optional[int], reset: Optional[float]) -> None:
+        with self._lock:
+            state = self._current(endpoint, self._clock())
+            if limit is not None:
+                state["limit"] = limit
+            if reset is not None and abs(reset - state["reset"]) > 1:
+                # Ventana nueva según la API: su `remaining` manda
+                state["reset"] = reset
+                if remaining is not None:
+                    state["remaining"] = remaining
+            elif remaining is not None:
+                # Misma ventana: con llamadas concurrentes la cabecera puede venir desactualizada
+                state["remaining"] = min(state["remaining"], remaining)
+
+    def update_from_headers(self, endpoint: str, headers: Mapping[str, str]) -> None:
+        def header(name: str) -> Optional[int]:
+            value = headers.get(name)
+            return int(value) if value not in (None, "") else None
+
+        self.update(endpoint, header("x-rate-limit-limit"), header("x-rate-limit-remaining"),
+                    header("x-rate-limit-reset"))
+
+    def exhaust(self, endpoint: str, reset: Optional[float] = None,
+                min_backoff: float = RATE_LIMIT_MIN_BACKOFF_SECONDS) -> None:
+        """
+        Marca el endpoint sin presupuesto (tras un 429) hasta `reset`, y al menos
+        `min_backoff` segundos si el reset falta o ya pasó.
+        """
+        self.update(endpoint, None, 0, max(reset or 0.0, self._clock() + min_backoff))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            now = self._clock()
+            return {
+                endpoint: {
+                    "limit": int(state["limit"]),
+                    "remaining": int(state["remaining"]) if now < state["reset"] else int(state["limit"]),
+                    "reset_in_seconds": round(max(0.0, state["reset"] - now), 1),
+                }
+                for endpoint, state in self._state.items()
+            }
+
+
+def endpoint_for_path(path: str) -> Optional[str]:
+    for pattern, endpoint in _ENDPOINT_PATTERNS:
+        if pattern.search(path):
+            return endpoint
+    return None
+
+
+def _default_limits() -> Dict[str, int]:
+    return {
+        ENDPOINT_USER_LOOKUP: settings.TWITTER_USER_LOOKUP_LIMIT,
+        ENDPOINT_USER_TWEETS: settings.TWITTER_USER_TWEETS_LIMIT,
+    }
+
+
+_trackers: Dict[bool, RateLimitTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_rate_limit_tracker(mock: bool = False) -> RateLimitTracker:
+    """
+    Presupuesto compartido por proceso (uno para la API real y otro simulado para el modo mock).
+    """
+    with _trackers_lock:
+        if mock not in _trackers:
+            _trackers[mock] = RateLimitTracker(_default_limits())
+        return _trackers[mock]
+
+
+# ---------------- backends ----------------
+
+PROVIDER_TWITTER_FANOUT = "twitter_fanout"
+
+
+def _create_fanout_twitter_client(bearer_token: str):
+    """
+    Cliente de Tweepy sin `wait_on_rate_limit` (el planificador decide cuándo esperar)
+    que registra las cabeceras de rate limit de cada respuesta.
+    """
+    import tweepy
+
+    client = tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=False)
+    tracker = get_rate_limit_tracker(mock=False)
+
+    def record_headers(response, *args, **kwargs):
+        endpoint = endpoint_for_path(response.request.path_url.split("?", 1)[0])
+        if endpoint is not None:
+            tracker.update_from_headers(endpoint, response.headers)
+
+    client.session.hooks["response"].append(record_headers)
+    return client
+
+
+registry.register(PROVIDER_TWITTER_FANOUT, _create_fanout_twitter_client)
+
+
+class _RealBackend:
+    def __init__(self, bearer_token: str, start_date: str, end_date: str):
+        self.client = registry.get(PROVIDER_TWITTER_FANOUT, bearer_token)
+        self.start_time = datetime.fromisoformat(start_date).isoformat() + "Z"
+        self.end_time = datetime.fromisoformat(end_date).isoformat() + "Z"
+
+    def _call(self, method, **kwargs):
+        import tweepy
+
+        try:
+            return method(**kwargs)
+        except tweepy.TooManyRequests as e:
+            reset = e.response.headers.get("x-rate-limit-reset") if e.response is not None else None
+            raise RateLimited(float(reset) if reset else None)
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        with timed("twitter.get_user"):
+            resp = self._call(self.client.get_user, username=username, user_fields=USER_FIELDS)
+        user = getattr(resp, "data", None)
+        return user.data if user is not None else None
+
+    def get_tweets(self, username: str, user_id: str, size: int, pagination_token: Optional[str]) -> Tuple[List, Dict]:
+        with timed("twitter.get_users_tweets"):
+            resp = self._call(
+                self.client.get_users_tweets, id=user_id, max_results=size, pagination_token=pagination_token,
+                start_time=self.start_time, end_time=self.end_time, tweet_fields=TWEET_FIELDS,
+            )
+        data = [tweet.data if hasattr(tweet, "data") else tweet for tweet in (getattr(resp, "data", None) or [])]
+        return data, getattr(resp, "meta", None) or {}
+
+
+class _MockBackend:
+    def __init__(self, start_date: str, end_date: str):
+        self.generator = get_synthetic_generator()
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        return self.generator.user(username, self.start_date)
+
+    def get_tweets(self, username: str, user_id: str, size: int, pagination_token: Optional[str]) -> Tuple[List, Dict]:
+        page = self.generator.page(username, self.start_date, self.end_date, max_results=size,
+                                   pagination_token=pagination_token)
+        return page["data"], page["meta"]
+
+
+# ---------------- planificador ----------------
+
+def new_account_state(username: str) -> Dict[str, Any]:
+    """
+    Cursor serializable de una cuenta: permite reanudarla más tarde (p. ej. desde un job).
+    """
+    return {"username": username, "user_id": None, "pagination_token": None, "fetched": 0, "pages": 0}
+
+
+async def _collect_account(state: Dict[str, Any], backend, tracker: RateLimitTracker, semaphore: asyncio.Semaphore,
+                           max_results: Optional[int], page_size: int, max_wait_seconds: float,
+                           source: str) -> Dict[str, Any]:
+    username = state["username"]
+    data: List[Dict] = []
+    store = get_local_store()
+
+    def result(status: str, **extra: Any) -> Dict[str, Any]:
+        return {"username": username, "status": status, "result_count": len(data), "pages": state["pages"],
+                "fetched": state["fetched"], "data": data, **extra}
+
+    while True:
+        endpoint = ENDPOINT_USER_LOOKUP if state["user_id"] is None else ENDPOINT_USER_TWEETS
+        wait = tracker.acquire(endpoint)
+        if wait > 0:
+            if wait > max_wait_seconds:
+                return result(ACCOUNT_QUEUED, blocked_on=endpoint, eta_seconds=round(wait, 1))
+            # Esperar sin ocupar un hilo: el resto de las cuentas sigue avanzando
+            await asyncio.sleep(wait)
+            continue
+
+        try:
+            async with semaphore:
+                if endpoint == ENDPOINT_USER_LOOKUP:
+                    user = await asyncio.to_thread(backend.get_user, username)
+                else:
+                    remaining = max_results - state["fetched"] if max_results else page_size
+                    size = max(PAGE_MIN_RESULTS, min(page_size, remaining))
+                    page, meta = await asyncio.to_thread(backend.get_tweets, username, state["user_id"],
+                                                         size, state["pagination_token"])
+        except RateLimited as e:
+            tracker.exhaust(endpoint, e.reset)
+            continue
+        except Exception as e:
+            return result(ACCOUNT_ERROR, step=endpoint, details=str(e))
+
+        if endpoint == ENDPOINT_USER_LOOKUP:
+            if not user:
+                return result(ACCOUNT_ERROR, step=endpoint, details=f"No se encontró el usuario @{username}")
+            state["user_id"] = str(user["id"])
+            continue
+
+        if max_results:
+            page = page[:max_results - state["fetched"]]
+        data.extend(page)
+        state["fetched"] += len(page)
+        state["pages"] += 1
+        state["pagination_token"] = meta.get("next_token")
+        if store is not None and page:
+            await asyncio.to_thread(store.upsert_tweets, page, username, source)
+        if not state["pagination_token"] or (max_results and state["fetched"] >= max_results):
+            return result(ACCOUNT_DONE)
+
+
+async def collect_accounts(accounts: List[Dict[str, Any]], start_date: str, end_date: str,
+                           max_results: Optional[int] = None, page_size: int = PAGE_MAX_RESULTS,
+                           mock: bool = True, bearer_token: Optional[str] = None,
+                           max_wait_seconds: Optional[float] = None,
+                           concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recolecta las cuentas (`new_account_state(username)` o cursores devueltos en `pending`)
+    en paralelo, hasta `concurrency` llamadas a la vez, mientras haya presupuesto.
+    Una cuenta cuyo endpoint queda sin presupuesto por más de `max_wait_seconds` se devuelve
+    en `pending` con su cursor; `eta_seconds` indica cuándo se puede reanudar.
+    """
+    tracker = get_rate_limit_tracker(mock=mock)
+    backend = _MockBackend(start_date, end_date) if mock else _RealBackend(
+        bearer_token or settings.TWITTER_BEARER_TOKEN, start_date, end_date)
+    semaphore = asyncio.Semaphore(max(1, concurrency or settings.TWITTER_FANOUT_CONCURRENCY))
+    if max_wait_seconds is None:
+        max_wait_seconds = settings.TWITTER_FANOUT_MAX_WAIT_SECONDS
+    page_size = max(PAGE_MIN_RESULTS, min(page_size, PAGE_MAX_RESULTS))
+
+    results = await asyncio.gather(*(
+        _collect_account(state, backend, tracker, semaphore, max_results, page_size, max_wait_seconds,
+                         source="mock" if mock else "real")
+        for state in accounts
+    ))
+
+    pending = [state for state, result in zip(accounts, results) if result["status"] == ACCOUNT_QUEUED]
+    eta_seconds = max((r["eta_seconds"] for r in results if r["status"] == ACCOUNT_QUEUED), default=None)
+    counts = {status: sum(r["status"] == status for r in results)
+              for status in (ACCOUNT_DONE, ACCOUNT_QUEUED, ACCOUNT_ERROR)}
+    return {
+        "status": "partial" if pending else "success",
+        "accounts_total": len(accounts),
+        "accounts_done": counts[ACCOUNT_DONE],
+        "accounts_queued": counts[ACCOUNT_QUEUED],
+        "accounts_error": counts[ACCOUNT_ERROR],
+        "result_count": sum(r["result_count"] for r in results),
+        "eta_seconds": eta_seconds,
+        "eta": datetime.utcfromtimestamp(time.time() + eta_seconds).isoformat() + "Z" if eta_seconds is not None else None,
+        "rate_limits": tracker.snapshot(),
+        "accounts": results,
+        "pending": pending,
+    }
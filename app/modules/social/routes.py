@@ -1,35 +1,89 @@
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
-from datetime import datetime, timedelta
-from app.modules.social.twitter_service import get_mock_tweets, get_real_tweets
+import asyncio
+from fastapi import APIRouter, Body, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.modules.storage.store_service import get_local_store
+from app.utils import default_window, parse_fields, project_items, render, to_json_line
+from app.modules.social.comments_service import get_mock_comments, get_real_comments
+from app.modules.social.collect_cache_service import CACHE_BYPASS, get_collection_cache, make_collect_key
+from app.modules.social.fanout_service import collect_accounts, new_account_state
+from app.modules.social.synthetic_service import decode_page_token
+from app.modules.jobs.job_service import JOB_FANOUT, get_job_manager
+from app.modules.social.twitter_service import get_mock_tweets, get_real_tweets, aiter_real_tweet_pages, iter_mock_tweet_pages
 
 router = APIRouter()
 
+
+FIELDS_DESCRIPTION = "Campos a devolver por tweet/comentario, separados por coma (admite anidados: `public_metrics.like_count`)"
+
+
+def _project_tweets(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Aplica la proyección a los tweets de una respuesta (o página). Con `fields` se omiten
+    también `includes` y `user_info`, que solo sirven para enriquecer tweets completos.
+    """
+    if fields is None or "data" not in data:
+        return data
+    projected = {k: v for k, v in data.items() if k not in ("includes", "user_info")}
+    projected["data"] = project_items(data["data"] or [], fields)
+    return projected
+
+
 @router.get("/collect/twitter")
 def collect_twitter(
+    request: Request,
     username: str = Query(..., description="Nombre de usuario de Twitter"),
     start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
     end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
     max_results: int = Query(5, description="Cantidad máxima de tweets a obtener"),
     mock: bool = Query(True, description="Usar datos simulados en lugar de reales"),
+    incremental: bool = Query(False, description="Solo traer tweets más nuevos que la última recolección de la cuenta"),
+    pagination_token: Optional[str] = Query(None, description="`meta.next_token` de una respuesta anterior (en mock también `meta.previous_token`)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
 ):
     """
     Endpoint que recolecta tweets reales o simulados.
     Por defecto, usa el modo 'mock' para devolver datos ficticios.
+    Las respuestas se cachean unos segundos por parámetros normalizados (cabecera `X-Cache`);
+    `Cache-Control: no-cache` fuerza una llamada nueva.
     """
+    if mock:
+        try:
+            decode_page_token(pagination_token)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        # Si no se pasan fechas, usar últimos 7 días por defecto
-        if not start_date or not end_date:
-            end_date = datetime.utcnow().isoformat()
-            start_date = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        cache = None if incremental else get_collection_cache()
+        cache_key = make_collect_key(username, start_date, end_date, max_results, mock, pagination_token)
+        start_date, end_date = default_window(start_date, end_date)
 
-        if mock:
-            data = get_mock_tweets(username, start_date, end_date, max_results=max_results)
+        def fetch():
+            if mock:
+                data = get_mock_tweets(username, start_date, end_date, max_results=max_results,
+                                       incremental=incremental, pagination_token=pagination_token)
+            else:
+                data = get_real_tweets(username, start_date, end_date,
+                                       bearer_token=settings.TWITTER_BEARER_TOKEN, max_results=max_results,
+                                       incremental=incremental, pagination_token=pagination_token)
+
+            store = get_local_store()
+            if store is not None and data.get("data"):
+                store.upsert_tweets(data["data"], username=username, source="mock" if mock else "real")
+            return data
+
+        # Requests idénticas y simultáneas comparten una llamada; las repetidas se sirven de la caché.
+        # El modo incremental avanza la marca de agua, así que siempre va al upstream.
+        if cache is None:
+            data, cache_status = fetch(), CACHE_BYPASS
         else:
-            # Aquí puedes luego pasar un token real
-            data = get_real_tweets(username, start_date, end_date, bearer_token="")
+            data, cache_status = cache.get_or_compute(
+                cache_key, fetch, cacheable=lambda result: result.get("status") != "error",
+                refresh="no-cache" in request.headers.get("cache-control", ""),
+            )
 
-        return {
+        return render(request, {
             "status": "ok",
             "source": "twitter_mock" if mock else "twitter_real",
             "params": {
@@ -37,9 +91,160 @@ def collect_twitter(
                 "start_date": start_date,
                 "end_date": end_date,
                 "max_results": max_results,
+                "incremental": incremental,
+                "pagination_token": pagination_token,
+                "fields": fields,
+            },
+            "data": _project_tweets(data, parse_fields(fields)),
+        }, headers={"X-Cache": cache_status})
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/collect/twitter/fanout")
+async def collect_twitter_fanout(
+    request: Request,
+    usernames: List[str] = Body(..., description="Cuentas de Twitter a recolectar"),
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    max_results: Optional[int] = Query(None, ge=1, description="Máximo de tweets por cuenta (vacío = todo el rango)"),
+    page_size: int = Query(100, ge=5, le=100, description="Tweets por página de la API"),
+    mock: bool = Query(True, description="Usar datos simulados en lugar de reales"),
+    max_wait_seconds: Optional[float] = Query(None, ge=0, description="Espera máxima por presupuesto de rate limit antes de dejar una cuenta en cola"),
+    queue_pending: bool = Query(True, description="Encolar un job que reanude las cuentas pendientes cuando se renueve la ventana"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """
+    Recolecta varias cuentas en paralelo respetando el rate limit de cada endpoint
+    (leído de las cabeceras de la API). Si el presupuesto se agota, devuelve lo recolectado
+    hasta ahora, las cuentas pendientes con su ETA y, con `queue_pending`, el job que las
+    completará (sus resultados en `/jobs/{id}/results`).
+    """
+    usernames = list(dict.fromkeys(u.strip().lstrip("@") for u in usernames if u.strip()))
+    if not usernames:
+        raise HTTPException(status_code=400, detail="Debe enviarse al menos una cuenta.")
+    start_date, end_date = default_window(start_date, end_date)
+
+    result = await collect_accounts([new_account_state(u) for u in usernames], start_date, end_date,
+                                    max_results=max_results, page_size=page_size, mock=mock,
+                                    bearer_token=settings.TWITTER_BEARER_TOKEN,
+                                    max_wait_seconds=max_wait_seconds)
+
+    job = None
+    if queue_pending and result["pending"]:
+        job = await get_job_manager().submit(JOB_FANOUT, {
+            "accounts": result["pending"],
+            "start_date": start_date,
+            "end_date": end_date,
+            "max_results": max_results,
+            "page_size": page_size,
+            "mock": mock,
+        }, delay_seconds=result["eta_seconds"])
+
+    field_list = parse_fields(fields)
+    for account in result["accounts"]:
+        account["data"] = project_items(account["data"], field_list)
+
+    return render(request, {
+        "status": "ok",
+        "source": "twitter_mock" if mock else "twitter_real",
+        "params": {
+            "usernames": usernames,
+            "start_date": start_date,
+            "end_date": end_date,
+            "max_results": max_results,
+            "page_size": page_size,
+            "fields": fields,
+        },
+        "data": result,
+        "job": job,
+    })
+
+
+@router.get("/collect/comments")
+def collect_comments(
+    request: Request,
+    tweet_ids: List[str] = Query(..., description="IDs de los tweets cuyos comentarios se quieren obtener"),
+    max_results: int = Query(20, ge=1, le=100, description="Cantidad máxima de comentarios por tweet"),
+    mock: bool = Query(True, description="Usar datos simulados en lugar de reales"),
+    incremental: bool = Query(False, description="Solo traer respuestas nuevas desde la última recolección de cada conversación (solo datos reales)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """
+    Endpoint que recolecta los comentarios (respuestas) de una lista de tweets.
+    """
+    if mock and incremental:
+        # Los comentarios simulados son fijos por tweet: no hay respuestas nuevas que seguir
+        raise HTTPException(status_code=400, detail="El modo incremental de comentarios requiere mock=false.")
+
+    try:
+        if mock:
+            data = {"status": "success", "comments": get_mock_comments(tweet_ids, max_comments_per_post=max_results)}
+        else:
+            data = get_real_comments(tweet_ids, settings.TWITTER_BEARER_TOKEN, max_results=max_results,
+                                     incremental=incremental)
+
+        store = get_local_store()
+        if store is not None:
+            store.upsert_comments((c for comments in data["comments"].values() for c in comments),
+                                  source="mock" if mock else "real")
+
+        field_list = parse_fields(fields)
+        if field_list is not None:
+            data = {**data, "comments": {tweet_id: project_items(comments, field_list)
+                                         for tweet_id, comments in data["comments"].items()}}
+
+        return render(request, {
+            "status": "ok",
+            "source": "twitter_mock" if mock else "twitter_real",
+            "params": {
+                "tweet_ids": tweet_ids,
+                "max_results": max_results,
+                "incremental": incremental,
+                "fields": fields,
             },
             "data": data
-        }
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/collect/twitter/stream")
+def collect_twitter_stream(
+    username: str = Query(..., description="Nombre de usuario de Twitter"),
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    max_results: Optional[int] = Query(None, ge=1, description="Total máximo de tweets (vacío = todo el rango)"),
+    page_size: int = Query(100, ge=5, le=100, description="Tweets por página de la API"),
+    mock: bool = Query(True, description="Usar datos simulados en lugar de reales"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """
+    Recolecta tweets página por página y los envía como NDJSON (una página por línea)
+    a medida que llegan, sin acumular todo el rango en memoria. Cada página se guarda
+    en el almacén local antes de enviarse.
+    """
+    start_date, end_date = default_window(start_date, end_date)
+    field_list = parse_fields(fields)
+    store = get_local_store()
+    source = "mock" if mock else "real"
+
+    async def emit(page: Dict[str, Any]) -> str:
+        if store is not None and page.get("data"):
+            await asyncio.to_thread(store.upsert_tweets, page["data"], username, source)
+        return to_json_line(_project_tweets(page, field_list))
+
+    async def pages():
+        if mock:
+            for page in iter_mock_tweet_pages(username, start_date, end_date,
+                                              max_results=max_results, page_size=page_size):
+                yield await emit(page)
+            return
+        async for page in aiter_real_tweet_pages(username, start_date, end_date,
+                                                 settings.TWITTER_BEARER_TOKEN,
+                                                 max_results=max_results, page_size=page_size):
+            yield await emit(page)
+
+    return StreamingResponse(pages(), media_type="application/x-ndjson")
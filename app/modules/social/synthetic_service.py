@@ -0,0 +1,466 @@
+# app/modules/social/synthetic_service.py
+"""
+Generador sintético y determinista de tweets y comentarios para el modo mock.
+
+Todo se deriva de un hash de (semilla, cuenta, posición), así que cualquier página se
+puede generar sin recorrer las anteriores y la misma semilla siempre da los mismos datos.
+Cada cuenta publica en una grilla de "slots" (MOCK_TWEETS_PER_DAY por día) con una hora
+pseudoaleatoria dentro de cada slot; los IDs siguen el formato snowflake de Twitter, por
+lo que crecen con el tiempo y funcionan con `since_id` y las marcas de agua.
+"""
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+TWITTER_EPOCH_MS = 1288834974657
+_LOW_BITS = 22
+_LOW_MASK = (1 << _LOW_BITS) - 1
+
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+# Streams independientes del hash por cada atributo generado
+_S_JITTER, _S_LANG, _S_RELEVANT, _S_TEMPLATE, _S_PLACE, _S_NUMBER, _S_DUPLICATE, \
+    _S_SOURCE, _S_VARIANT, _S_METRICS, _S_REPLIES, _S_DELAY, _S_AUTHOR, _S_ID = range(1, 15)
+
+PLACES = [
+    "Ate", "Carabayllo", "Comas", "San Juan de Lurigancho", "Villa El Salvador", "Chorrillos",
+    "Piura", "Arequipa", "Trujillo", "Chiclayo", "Huancayo", "Cusco", "Iquitos", "Tacna",
+    "Puno", "Ayacucho", "Miraflores", "Surco", "Los Olivos", "Ventanilla",
+]
+PROGRAMS = ["Techo Propio", "Mivivienda", "Agua Segura", "Mejoramiento de Vivienda", "Bono Familiar Habitacional"]
+
+# Plantillas por idioma: (relevantes, no relevantes)
+TWEET_TEMPLATES: Dict[str, Tuple[List[str], List[str]]] = {
+    "es": (
+        [
+            "Entregamos {n} bonos del programa {program} a familias de {place}.",
+            "Avanzan las obras de agua potable y alcantarillado en {place}: {pct}% de ejecución.",
+            "Nuevo crédito hipotecario {program} con tasas preferenciales para {n} familias.",
+            "Supervisamos la construcción de {n} viviendas sociales en {place}.",
+            "Iniciamos el saneamiento físico legal de {n} terrenos en {place}.",
+            "Inauguramos pistas y veredas en {place}, una obra de infraestructura urbana esperada por años.",
+            "Con {program} reforzamos {n} viviendas frente a heladas en {place}.",
+            "Firmamos convenio para la habilitación urbana de {n} lotes en {place}.",
+        ],
+        [
+            "Feria de emprendimiento local este sábado en {place}. ¡Te esperamos!",
+            "Campaña gratuita de salud en {place} este fin de semana.",
+            "Sembramos {n} nuevos árboles en {place}.",
+            "Participamos en el foro de seguridad ciudadana de {place}.",
+            "Inauguramos nueva ciclovía en {place} con {n} km de recorrido.",
+            "Festival cultural en {place} con {n} artistas invitados.",
+            "Reforzamos la iluminación pública en {place} para mayor seguridad vecinal.",
+            "Torneo deportivo interdistrital en {place}: {n} equipos inscritos.",
+        ],
+    ),
+    "en": (
+        [
+            "{n} families in {place} received housing vouchers from the {program} program.",
+            "Water and sewage works in {place} are {pct}% complete.",
+        ],
+        [
+            "Free health campaign in {place} this weekend.",
+            "Local entrepreneurship fair in {place} with {n} exhibitors.",
+        ],
+    ),
+    "pt": (
+        [
+            "{n} famílias de {place} recebem moradia pelo programa {program}.",
+            "Obras de saneamento em {place} chegam a {pct}% de execução.",
+        ],
+        [
+            "Feira cultural em {place} neste sábado.",
+            "Campanha de saúde gratuita em {place} com {n} atendimentos.",
+        ],
+    ),
+}
+
+COMMENT_TEMPLATES: Dict[str, Tuple[List[str], List[str]]] = {
+    "es": (
+        [
+            "¿Cuándo llega el agua potable a {place}?",
+            "Necesitamos más viviendas en {place}, ojalá avance la obra.",
+            "¿Cómo postulo al bono {program}?",
+            "El desagüe en {place} sigue colapsado.",
+        ],
+        [
+            "¡Excelente iniciativa!",
+            "Me parece muy positivo para la comunidad.",
+            "Gracias por mantenernos informados.",
+            "Ojalá continúen con más proyectos como este.",
+            "Espero que esto mejore la seguridad en la zona.",
+        ],
+    ),
+    "en": (["When will the housing program reach {place}?"], ["Great initiative!", "Thanks for the update."]),
+    "pt": (["Quando chega o saneamento em {place}?"], ["Ótima iniciativa!", "Obrigado pela informação."]),
+}
+
+VARIANTS = ["", " #{program}", "RT @vecinos: ", " 👏", " Más info en nuestra web."]
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """
+    Hash splitmix64 vectorizado sobre enteros sin signo de 64 bits.
+    """
+    x = np.asarray(values, dtype=np.uint64).copy()
+    with np.errstate(over="ignore"):
+        x ^= x >> np.uint64(30)
+        x *= _M1
+        x ^= x >> np.uint64(27)
+        x *= _M2
+        x ^= x >> np.uint64(31)
+    return x
+
+
+def _hash(key: int, values: np.ndarray, stream: int) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        salt = np.uint64((key + stream * 0x632BE59BD9B4E019) & 0xFFFFFFFFFFFFFFFF)
+        return _mix(np.asarray(values, dtype=np.uint64) * _GOLDEN ^ salt)
+
+
+def _uniform(key: int, values: np.ndarray, stream: int) -> np.ndarray:
+    return (_hash(key, values, stream) >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _to_ms(value: str) -> int:
+    moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def _iso(ms: np.ndarray) -> List[str]:
+    return np.char.add(np.datetime_as_string(np.asarray(ms, dtype="datetime64[ms]"), unit="ms"), "Z").tolist()
+
+
+def parse_languages(spec: str) -> Dict[str, float]:
+    """
+    Interpreta "es:0.9,en:0.07,pt:0.03" como proporciones normalizadas.
+    """
+    weights: Dict[str, float] = {}
+    for part in spec.split(","):
+        lang, _, weight = part.strip().partition(":")
+        if lang in TWEET_TEMPLATES:
+            weights[lang] = float(weight or 1)
+    total = sum(weights.values()) or 1.0
+    return {lang: weight / total for lang, weight in weights.items()} or {"es": 1.0}
+
+
+class SyntheticGenerator:
+    """
+    Genera tweets y comentarios sintéticos de forma vectorizada y determinista.
+    - `duplicate_rate`: proporción de tweets que repiten (tal cual o con una leve variación)
+      el texto de un tweet anterior de la misma cuenta.
+    - `languages`: mezcla de idiomas ({"es": 0.9, "en": 0.1}).
+    - `relevant_ratio`: proporción de textos del sector vivienda / saneamiento.
+    """
+
+    def __init__(self, seed: int = 42, tweets_per_day: float = 24.0, duplicate_rate: float = 0.1,
+                 relevant_ratio: float = 0.3, languages: Optional[Dict[str, float]] = None,
+                 max_replies: int = 50):
+        self.seed = seed
+        self.interval_ms = max(1, int(86_400_000 / max(tweets_per_day, 1e-6)))
+        self.duplicate_rate = duplicate_rate
+        self.relevant_ratio = relevant_ratio
+        self.languages = languages or {"es": 1.0}
+        self._lang_names = list(self.languages)
+        self._lang_cdf = np.cumsum([self.languages[lang] for lang in self._lang_names])
+        self.max_replies = max_replies
+
+    # ---------------- claves y grilla de tiempo ----------------
+
+    def account_key(self, username: str) -> int:
+        base = (self.seed << 32) | zlib.crc32(username.lower().encode("utf-8"))
+        return int(_mix(np.array([base], dtype=np.uint64))[0])
+
+    def user_id(self, username: str) -> str:
+        return str(self.account_key(username) % 10 ** 12 + 10 ** 12)
+
+    def _times(self, key: int, slots: np.ndarray) -> np.ndarray:
+        jitter = (_uniform(key, slots, _S_JITTER) * self.interval_ms).astype(np.int64)
+        return slots.astype(np.int64) * self.interval_ms + jitter
+
+    def _ids(self, key: int, slots: np.ndarray, times: np.ndarray) -> np.ndarray:
+        low = (_hash(key, slots, _S_ID) & np.uint64(_LOW_MASK)).astype(np.int64)
+        return ((times - TWITTER_EPOCH_MS) << _LOW_BITS) | low
+
+    def slot_range(self, username: str, start_date: str, end_date: str,
+                   since_id: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Rango [primero, último] de slots cuyos tweets caen en la ventana (y son posteriores a `since_id`).
+        Si no hay ninguno, primero > último.
+        """
+        key = self.account_key(username)
+        lo, hi = _to_ms(start_date) // self.interval_ms, _to_ms(end_date) // self.interval_ms
+        edges = np.array([lo, hi], dtype=np.int64)
+        lo_time, hi_time = self._times(key, edges.astype(np.uint64))
+        if lo_time < _to_ms(start_date):
+            lo += 1
+        if hi_time > _to_ms(end_date):
+            hi -= 1
+        if since_id:
+            since = int(since_id)
+            slot = ((since >> _LOW_BITS) + TWITTER_EPOCH_MS) // self.interval_ms
+            candidate = np.array([slot], dtype=np.int64)
+            candidate_id = self._ids(key, candidate.astype(np.uint64), self._times(key, candidate.astype(np.uint64)))[0]
+            lo = max(lo, slot if candidate_id > since else slot + 1)
+        return int(lo), int(hi)
+
+    # ---------------- textos ----------------
+
+    def _texts(self, key: int, slots: np.ndarray, templates: Dict[str, Tuple[List[str], List[str]]]) -> Tuple[List[str], List[str]]:
+        """
+        Texto base e idioma de cada slot (sin duplicados).
+        """
+        langs = np.searchsorted(self._lang_cdf, _uniform(key, slots, _S_LANG) * self._lang_cdf[-1], side="right")
+        langs = np.minimum(langs, len(self._lang_names) - 1)
+        groups = langs * 2 + (_uniform(key, slots, _S_RELEVANT) >= self.relevant_ratio)
+
+        # Todas las plantillas en una tabla plana; cada grupo (idioma, relevancia) es un tramo
+        table: List[str] = []
+        offsets, sizes = [], []
+        for lang in self._lang_names:
+            for options in templates[lang]:
+                offsets.append(len(table))
+                sizes.append(len(options))
+                table.extend(options)
+        offsets, sizes = np.array(offsets, dtype=np.uint64), np.array(sizes, dtype=np.uint64)
+        template_h = _hash(key, slots, _S_TEMPLATE)
+        chosen = (offsets[groups] + (template_h >> np.uint64(8)) % sizes[groups]).tolist()
+        places = (_hash(key, slots, _S_PLACE) % np.uint64(len(PLACES))).tolist()
+        numbers = ((_hash(key, slots, _S_NUMBER) % np.uint64(4990)) + np.uint64(10)).tolist()
+        programs = (template_h % np.uint64(len(PROGRAMS))).tolist()
+
+        texts = [
+            table[t].format(place=PLACES[place], n=number, pct=number % 91 + 9, program=PROGRAMS[program])
+            for t, place, number, program in zip(chosen, places, numbers, programs)
+        ]
+        lang_names = self._lang_names
+        return texts, [lang_names[i] for i in langs.tolist()]
+
+    def _apply_duplicates(self, key: int, slots: np.ndarray, texts: List[str], langs: List[str]) -> None:
+        """
+        Reemplaza el texto de una fracción `duplicate_rate` de slots por el de un slot anterior
+        (hasta 30 atrás), a veces con una variación (hashtag, "RT", emoji) para generar casi-duplicados.
+        """
+        duplicated = np.flatnonzero(_uniform(key, slots, _S_DUPLICATE) < self.duplicate_rate)
+        if not len(duplicated):
+            return
+        offsets = (_hash(key, slots[duplicated], _S_SOURCE) % np.uint64(30)).astype(np.int64) + 1
+        sources = slots[duplicated].astype(np.int64) - offsets
+        source_texts, source_langs = self._texts(key, sources.astype(np.uint64), TWEET_TEMPLATES)
+        variants = (_hash(key, slots[duplicated], _S_VARIANT) % np.uint64(len(VARIANTS))).tolist()
+        for i, text, lang, variant in zip(duplicated.tolist(), source_texts, source_langs, variants):
+            suffix = VARIANTS[variant].format(program=PROGRAMS[variant % len(PROGRAMS)].replace(" ", ""))
+            texts[i] = suffix + text if suffix.startswith("RT") else text + suffix
+            langs[i] = lang
+
+    def _reply_counts(self, id_values: np.ndarray) -> np.ndarray:
+        """
+        Cantidad de respuestas de cada tweet (cola larga: la mayoría tiene pocas).
+        Depende solo del ID, así que coincide entre tweets y comentarios.
+        """
+        u = _uniform(self.seed, id_values, _S_REPLIES)
+        return np.floor(u ** 3 * (self.max_replies + 1)).astype(np.int64)
+
+    # ---------------- tweets ----------------
+
+    def tweets(self, username: str, slots: np.ndarray) -> List[Dict]:
+        """
+        Tweets de los slots indicados, en el mismo orden.
+        """
+        if not len(slots):
+            return []
+        key = self.account_key(username)
+        slots = np.asarray(slots, dtype=np.int64)
+        uslots = slots.astype(np.uint64)
+        times = self._times(key, uslots)
+        id_values = self._ids(key, uslots, times)
+        ids = [str(i) for i in id_values.tolist()]
+        texts, langs = self._texts(key, uslots, TWEET_TEMPLATES)
+        self._apply_duplicates(key, uslots, texts, langs)
+
+        metrics = _hash(key, uslots, _S_METRICS)
+        likes = (metrics % np.uint64(150)).tolist()
+        retweets = ((metrics >> np.uint64(16)) % np.uint64(50)).tolist()
+        quotes = ((metrics >> np.uint64(32)) % np.uint64(6)).tolist()
+        replies = self._reply_counts(id_values.astype(np.uint64)).tolist()
+        created = _iso(times)
+        author_id = self.user_id(username)
+
+        return [
+            {
+                "id": tweet_id,
+                "text": text,
+                "created_at": created_at,
+                "edit_history_tweet_ids": [tweet_id],
+                "lang": lang,
+                "public_metrics": {
+                    "retweet_count": rt,
+                    "reply_count": rp,
+                    "like_count": lk,
+                    "quote_count": qt,
+                },
+                "possibly_sensitive": False,
+                "source": "Twitter Web App",
+                "author_id": author_id,
+                "conversation_id": tweet_id,
+                "referenced_tweets": None,
+            }
+            for tweet_id, text, created_at, lang, rt, rp, lk, qt
+            in zip(ids, texts, created, langs, retweets, replies, likes, quotes)
+        ]
+
+    def page(self, username: str, start_date: str, end_date: str, max_results: int = 10,
+             pagination_token: Optional[str] = None, since_id: Optional[str] = None) -> Dict:
+        """
+        Una página en orden cronológico inverso, con tokens de paginación reales:
+        `next_token` avanza hacia tweets más antiguos y `previous_token` vuelve a los más nuevos.
+        """
+        lo, hi = self.slot_range(username, start_date, end_date, since_id)
+        max_results = max(1, max_results)
+        direction, cursor = decode_page_token(pagination_token)
+        if direction == "previous":
+            first = max(lo, cursor)
+            last = min(hi, first + max_results - 1)
+        else:
+            last = min(hi, cursor if cursor is not None else hi)
+            first = max(lo, last - max_results + 1)
+
+        slots = np.arange(last, first - 1, -1, dtype=np.int64) if last >= first else np.array([], dtype=np.int64)
+        data = self.tweets(username, slots)
+        meta = {"result_count": len(data)}
+        if data:
+            meta["newest_id"] = data[0]["id"]
+            meta["oldest_id"] = data[-1]["id"]
+            if first > lo:
+                meta["next_token"] = encode_page_token("next", first - 1)
+            if last < hi:
+                meta["previous_token"] = encode_page_token("previous", last + 1)
+        return {"data": data, "meta": meta, "window_count": max(0, hi - lo + 1)}
+
+    def user(self, username: str, start_date: str) -> Dict:
+        key = self.account_key(username)
+        followers, following, count, listed = (int(v) for v in _hash(key, np.arange(4, dtype=np.uint64), _S_AUTHOR) % np.uint64(20000))
+        created = _iso(np.array([_to_ms(start_date) - 400 * 86_400_000]))[0]
+        return {
+            "id": self.user_id(username),
+            "name": username.capitalize(),
+            "username": username,
+            "description": f"Cuenta mock de @{username} para pruebas de análisis social.",
+            "verified": True,
+            "created_at": created,
+            "public_metrics": {
+                "followers_count": followers,
+                "following_count": following % 1000,
+                "tweet_count": count,
+                "listed_count": listed % 100,
+            },
+            "profile_image_url": f"https://picsum.photos/seed/{username}/200/200",
+        }
+
+    # ---------------- comentarios ----------------
+
+    def comments(self, tweet_ids: List[str], max_per_tweet: int) -> Dict[str, List[Dict]]:
+        """
+        Respuestas de cada tweet (hasta `max_per_tweet`), del más reciente al más antiguo,
+        publicadas después del tweet original.
+        """
+        base = np.array([_id_value(t) for t in tweet_ids], dtype=np.uint64)
+        counts = np.minimum(self._reply_counts(base), max_per_tweet)
+        owners = np.repeat(np.arange(len(tweet_ids)), counts)
+        positions = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+        with np.errstate(over="ignore"):
+            values = base[owners] * np.uint64(1000003) + positions.astype(np.uint64)
+
+        key = self.seed
+        tweet_ms = np.array([_id_time_ms(t, self.seed) for t in tweet_ids], dtype=np.int64)
+        # Demora de cada respuesta: de segundos a ~2 días (más respuestas al inicio)
+        delays = (_uniform(key, values, _S_DELAY) ** 2 * 2 * 86_400_000).astype(np.int64) + 1000
+        times = tweet_ms[owners] + delays
+        low = (_hash(key, values, _S_ID) & np.uint64(_LOW_MASK)).astype(np.int64)
+        ids = ((times - TWITTER_EPOCH_MS) << _LOW_BITS) | low
+        texts, _ = self._texts(key, values, COMMENT_TEMPLATES)
+        # Comentarios repetidos (respuestas genéricas / spam): todos con el mismo texto
+        duplicated = np.flatnonzero(_uniform(key, values, _S_DUPLICATE) < self.duplicate_rate)
+        for i in duplicated.tolist():
+            texts[i] = COMMENT_TEMPLATES["es"][1][0]
+        authors = ((_hash(key, values, _S_AUTHOR) % np.uint64(10 ** 9)) + np.uint64(10 ** 9)).tolist()
+        metrics = _hash(key, values, _S_METRICS)
+        likes = (metrics % np.uint64(50)).tolist()
+        replies = ((metrics >> np.uint64(16)) % np.uint64(10)).tolist()
+        created = _iso(times)
+        ids = ids.tolist()
+        owners = owners.tolist()
+
+        result: Dict[str, List[Dict]] = {tweet_id: [] for tweet_id in tweet_ids}
+        for i in np.lexsort((-times, owners)).tolist():
+            tweet_id = tweet_ids[owners[i]]
+            result[tweet_id].append({
+                "id": str(ids[i]),
+                "tweet_id": tweet_id,
+                "conversation_id": tweet_id,
+                "text": texts[i],
+                "created_at": created[i],
+                "author_id": str(authors[i]),
+                "like_count": likes[i],
+                "reply_count": replies[i],
+            })
+        return result
+
+
+def _id_value(tweet_id: str) -> int:
+    text = str(tweet_id)
+    return int(text) & 0xFFFFFFFFFFFFFFFF if text.isdigit() else zlib.crc32(text.encode("utf-8"))
+
+
+def _id_time_ms(tweet_id: str, seed: int) -> int:
+    """
+    Hora de publicación según el ID snowflake; para IDs no numéricos, una fecha fija derivada del hash.
+    """
+    text = str(tweet_id)
+    if text.isdigit() and int(text) >> _LOW_BITS:
+        return (int(text) >> _LOW_BITS) + TWITTER_EPOCH_MS
+    return _to_ms("2024-01-01T00:00:00") + (zlib.crc32(text.encode("utf-8")) ^ seed) % (365 * 86_400_000)
+
+
+def encode_page_token(direction: str, slot: int) -> str:
+    return f"{direction[0]}{slot:x}"
+
+
+def decode_page_token(token: Optional[str]) -> Tuple[str, Optional[int]]:
+    """
+    Devuelve la dirección ("next" / "previous") y el slot de inicio de la página.
+    """
+    if not token:
+        return "next", None
+    try:
+        return ("previous" if token[0] == "p" else "next"), int(token[1:], 16)
+    except ValueError:
+        raise ValueError(f"Token de paginación inválido: {token}")
+
+
+_generator: Optional[SyntheticGenerator] = None
+
+
+def get_synthetic_generator() -> SyntheticGenerator:
+    """
+    Devuelve el generador compartido configurado con los parámetros MOCK_* de settings.
+    """
+    global _generator
+    if _generator is None:
+        _generator = SyntheticGenerator(
+            seed=settings.MOCK_SEED,
+            tweets_per_day=settings.MOCK_TWEETS_PER_DAY,
+            duplicate_rate=settings.MOCK_DUPLICATE_RATE,
+            relevant_ratio=settings.MOCK_RELEVANT_RATIO,
+            languages=parse_languages(settings.MOCK_LANGUAGES),
+            max_replies=settings.MOCK_MAX_REPLIES,
+        )
+    return _generator
@@ -1,156 +1,273 @@
-from datetime import datetime, timedelta
-from typing import Dict, List
-import random
-import tweepy
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
 
-def get_mock_tweets(username: str, start_date: str, end_date: str, max_results: int = 10) -> Dict:
+from app.modules.metrics.metrics_service import timed
+from app.providers import get_twitter_client
+from app.modules.social.synthetic_service import get_synthetic_generator
+from app.modules.social.watermark_service import SCOPE_MOCK_USER, SCOPE_USER, get_watermark_store, newest_id
+
+if TYPE_CHECKING:
+    import tweepy
+
+
+def get_mock_tweets(username: str, start_date: str, end_date: str, max_results: int = 10,
+                    incremental: bool = False, pagination_token: Optional[str] = None) -> Dict:
     """
     Simula la respuesta real del endpoint:
     GET /2/users/:id/tweets
     de la API de Twitter (X) v2.
-    Retorna datos similares a publicaciones reales (mock fijo).
+    Los datos vienen del generador sintético (misma semilla = mismos tweets) y la paginación
+    funciona: `meta.next_token` / `meta.previous_token` se pueden pasar como `pagination_token`.
     """
+    generator = get_synthetic_generator()
+    watermark = get_watermark_store().get(SCOPE_MOCK_USER, username) if incremental else None
+    since_id = watermark["newest_id"] if watermark else None
+
+    page = generator.page(username, start_date, end_date, max_results=max_results,
+                          pagination_token=pagination_token, since_id=since_id)
+    tweets = page["data"]
 
-    start = datetime.fromisoformat(start_date)
-    end = datetime.fromisoformat(end_date)
-
-    # Simular ID de usuario y tokens de paginación
-    user_id = f"user_{random.randint(1000, 9999)}"
-    next_token = f"b{random.randint(10000, 99999)}"
-    previous_token = f"a{random.randint(10000, 99999)}"
-
-    # Mock fijo de publicaciones realistas
-    mock_texts = [
-        "Firmamos un convenio con el MTC para mejorar y modernizar más de 200 paraderos en Miraflores.",
-        "¡Buenas noticias! Gracias a nuestras gestiones, iniciaremos la remodelación del Parque Kennedy.",
-        "Seguimos trabajando por una ciudad más verde. Hoy sembramos 50 nuevos árboles en Av. Arequipa.",
-        "Participamos en el Foro de Seguridad Ciudadana para fortalecer la coordinación con Serenazgo.",
-        "Iniciamos el programa 'Miraflores sin Ruido', promoviendo el respeto por los niveles sonoros urbanos.",
-        "Reforzamos la iluminación pública en Av. Benavides y Ricardo Palma para mayor seguridad vecinal.",
-        "Campaña gratuita de salud en el Parque Reducto N°2 este fin de semana. ¡Te esperamos!",
-        "Inauguramos nueva ciclovía conectando Av. Pardo con el Malecón Cisneros.",
-        "Feria de emprendimiento local este sábado en el Parque Central. ¡Apoya a nuestros vecinos!",
-        "Implementamos cámaras con inteligencia artificial para reforzar la vigilancia en zonas críticas."
-    ]
-
-    # Generar tweets simulados según rango y límite
-    total_available = len(mock_texts)
-    limit = min(max_results, total_available)
-
-    delta = (end - start).total_seconds()
-    tweets = []
-    for i in range(limit):
-        created_at = (start + timedelta(seconds=(delta / (limit + 1)) * (i + 1))).isoformat() + "Z"
-        tweet_id = str(1942352849243160964 + i)
-        text = mock_texts[i]
-
-        tweets.append({
-            "id": tweet_id,
-            "text": text,
-            "created_at": created_at,
-            "edit_history_tweet_ids": [tweet_id],
-            "lang": "es",
-            "public_metrics": {
-                "retweet_count": random.randint(0, 50),
-                "reply_count": random.randint(0, 10),
-                "like_count": random.randint(0, 150),
-                "quote_count": random.randint(0, 5)
-            },
-            "possibly_sensitive": False,
-            "source": "Twitter Web App",
-            "author_id": user_id,
-            "referenced_tweets": None
-        })
-
-    # Estructura oficial de respuesta
+    # Estructura oficial de respuesta (orden cronológico inverso)
     response = {
-        "data": list(reversed(tweets)),  # reverse-chronological order
-        "includes": {
-            "users": [
-                {
-                    "id": user_id,
-                    "name": username.capitalize(),
-                    "username": username,
-                    "description": f"Cuenta mock de @{username} para pruebas de análisis social.",
-                    "verified": True,
-                    "created_at": (start - timedelta(days=400)).isoformat() + "Z",
-                    "public_metrics": {
-                        "followers_count": 4520,
-                        "following_count": 180,
-                        "tweet_count": 10240,
-                        "listed_count": 32
-                    },
-                    "profile_image_url": f"https://picsum.photos/seed/{username}/200/200"
-                }
-            ]
-        },
-        "meta": {
-            "result_count": len(tweets),
-            "newest_id": tweets[-1]["id"] if tweets else None,
-            "oldest_id": tweets[0]["id"] if tweets else None,
-            "next_token": next_token,
-            "previous_token": previous_token
-        }
+        "data": tweets,
+        "includes": {"users": [generator.user(username, start_date)]},
+        "meta": page["meta"],
     }
 
+    if incremental:
+        first, last = generator.slot_range(username, start_date, end_date)
+        # La marca solo avanza al leer la primera página y sin páginas pendientes (sin huecos)
+        complete = not pagination_token and "next_token" not in page["meta"]
+        response["incremental"] = {
+            **_advance_watermark(SCOPE_MOCK_USER, username, tweets, watermark, complete=complete),
+            "skipped": max(0, last - first + 1) - page["window_count"],
+        }
+
     return response
 
 
-def get_real_tweets(username: str, start_date: str, end_date: str, bearer_token: str, max_results: int = 10) -> Dict:
+TWEET_FIELDS = ["id", "text", "created_at", "lang", "author_id", "conversation_id",
+                "public_metrics", "possibly_sensitive",
+                "source", "edit_history_tweet_ids", "referenced_tweets"]
+USER_FIELDS = ["id", "name", "username", "description",
+               "verified", "created_at", "public_metrics",
+               "profile_image_url"]
+
+# Límites de la API v2 para GET /2/users/:id/tweets
+PAGE_MIN_RESULTS = 5
+PAGE_MAX_RESULTS = 100
+
+
+def _paginate_users_tweets(client: "tweepy.Client", user_id, start_date: str, end_date: str,
+                           max_total: Optional[int] = None, page_size: int = PAGE_MAX_RESULTS,
+                           since_id: Optional[str] = None,
+                           pagination_token: Optional[str] = None) -> Iterator[Dict]:
     """
-    Obtiene tweets reales de un usuario usando la API de Twitter/X v2 con Tweepy.
-    Compatible con Tweepy v4.14+ (Response object).
+    Recorre las páginas de GET /2/users/:id/tweets siguiendo `meta.next_token`
+    hasta agotar el rango de fechas o alcanzar `max_total` tweets.
+    Con `since_id` solo se piden tweets más recientes que ese ID; con `pagination_token`
+    se continúa desde una página anterior.
+    """
+    page_size = max(PAGE_MIN_RESULTS, min(page_size, PAGE_MAX_RESULTS))
+    fetched = 0
+    page = 0
+
+    while True:
+        remaining = max_total - fetched if max_total else page_size
+        with timed("twitter.get_users_tweets"):
+            tweets_resp = client.get_users_tweets(
+                id=user_id,
+                max_results=max(PAGE_MIN_RESULTS, min(page_size, remaining)),
+                pagination_token=pagination_token,
+                since_id=since_id,
+                start_time=datetime.fromisoformat(start_date).isoformat() + "Z",
+                end_time=datetime.fromisoformat(end_date).isoformat() + "Z",
+                tweet_fields=TWEET_FIELDS,
+                expansions=["author_id"],
+                user_fields=USER_FIELDS,
+            )
+
+        tweets_data = getattr(tweets_resp, "data", None) or []
+        data = [tweet.data if hasattr(tweet, "data") else tweet for tweet in tweets_data]
+        if max_total:
+            data = data[:max_total - fetched]
+        fetched += len(data)
+        page += 1
+        meta = getattr(tweets_resp, "meta", None) or {}
+
+        yield {
+            "page": page,
+            "data": data,
+            "includes": getattr(tweets_resp, "includes", None) or {},
+            "meta": meta,
+        }
+
+        pagination_token = meta.get("next_token")
+        if not pagination_token or (max_total and fetched >= max_total):
+            return
+
+
+def iter_real_tweet_pages(username: str, start_date: str, end_date: str, bearer_token: str,
+                          max_results: Optional[int] = None, page_size: int = PAGE_MAX_RESULTS,
+                          since_id: Optional[str] = None,
+                          pagination_token: Optional[str] = None) -> Iterator[Dict]:
     """
+    Generador de páginas de tweets reales de un usuario.
+    Cada página se entrega apenas llega, así la memoria no crece con el total recolectado.
+    Ante un error se entrega un dict con "status": "error" y se detiene.
+    """
+
+    import tweepy
 
-    # Autenticación
-    client = tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=True)
+    # Autenticación (cliente compartido por bearer token, creado en el primer uso)
+    client = get_twitter_client(bearer_token)
 
     # 1️⃣ Obtener información del usuario
     try:
-        user_resp = client.get_user(
-            username=username,
-            user_fields=["id", "name", "username", "description",
-                         "verified", "created_at", "public_metrics",
-                         "profile_image_url"]
-        )
+        with timed("twitter.get_user"):
+            user_resp = client.get_user(username=username, user_fields=USER_FIELDS)
     except tweepy.TweepyException as e:
-        return {"status": "error", "step": "get_user", "details": str(e)}
+        yield {"status": "error", "step": "get_user", "details": str(e)}
+        return
 
     if not user_resp or not getattr(user_resp, "data", None):
-        return {"status": "error", "message": f"No se encontró el usuario @{username}"}
+        yield {"status": "error", "message": f"No se encontró el usuario @{username}"}
+        return
 
     user_data = user_resp.data
-    user_id = user_data.id
 
-    # 2️⃣ Obtener tweets del usuario
+    # 2️⃣ Recorrer las páginas de tweets del usuario
     try:
-        tweets_resp = client.get_users_tweets(
-            id=user_id,
-            max_results=max_results,
-            start_time=datetime.fromisoformat(start_date).isoformat() + "Z",
-            end_time=datetime.fromisoformat(end_date).isoformat() + "Z",
-            tweet_fields=["id", "text", "created_at", "lang",
-                          "public_metrics", "possibly_sensitive",
-                          "source", "edit_history_tweet_ids", "referenced_tweets"],
-            expansions=["author_id"],
-            user_fields=["id", "name", "username", "description",
-                         "verified", "created_at", "public_metrics",
-                         "profile_image_url"]
-        )
+        for page in _paginate_users_tweets(client, user_data.id, start_date, end_date,
+                                           max_total=max_results, page_size=page_size,
+                                           since_id=since_id, pagination_token=pagination_token):
+            page["status"] = "success"
+            page["user_info"] = user_data
+            yield page
     except tweepy.TweepyException as e:
-        return {"status": "error", "step": "get_tweets", "details": str(e)}
+        yield {"status": "error", "step": "get_tweets", "details": str(e)}
+
 
-    # 3️⃣ Preparar estructura segura
-    tweets_data = getattr(tweets_resp, "data", None)
-    includes_data = getattr(tweets_resp, "includes", None)
-    meta_data = getattr(tweets_resp, "meta", None)
+def iter_mock_tweet_pages(username: str, start_date: str, end_date: str, max_results: Optional[int] = None,
+                          page_size: int = PAGE_MAX_RESULTS) -> Iterator[Dict]:
+    """
+    Equivalente simulado de `iter_real_tweet_pages`: recorre las páginas sintéticas siguiendo
+    `next_token` hasta agotar el rango o reunir `max_results` tweets.
+    """
+    generator = get_synthetic_generator()
+    user_info = generator.user(username, start_date)
+    fetched = 0
+    page = 0
+    pagination_token = None
+    while True:
+        size = min(page_size, max_results - fetched) if max_results else page_size
+        result = generator.page(username, start_date, end_date, max_results=size,
+                                pagination_token=pagination_token)
+        fetched += len(result["data"])
+        page += 1
+        yield {
+            "status": "success",
+            "page": page,
+            "data": result["data"],
+            "includes": {"users": [user_info]},
+            "meta": result["meta"],
+            "user_info": user_info,
+        }
+        pagination_token = result["meta"].get("next_token")
+        if not pagination_token or (max_results and fetched >= max_results):
+            return
+
+
+async def aiter_real_tweet_pages(*args, **kwargs) -> AsyncIterator[Dict]:
+    """
+    Versión asíncrona de `iter_real_tweet_pages`: cada llamada bloqueante a la API
+    se ejecuta en un hilo para no detener el event loop.
+    """
+    pages = iter_real_tweet_pages(*args, **kwargs)
+    while True:
+        page = await asyncio.to_thread(next, pages, None)
+        if page is None:
+            return
+        yield page
+
+
+def get_real_tweets(username: str, start_date: str, end_date: str, bearer_token: str, max_results: int = 10,
+                    incremental: bool = False, pagination_token: Optional[str] = None) -> Dict:
+    """
+    Obtiene tweets reales de un usuario usando la API de Twitter/X v2 con Tweepy.
+    Compatible con Tweepy v4.14+ (Response object).
+    Sigue la paginación (`next_token`) hasta reunir `max_results` tweets, empezando
+    en `pagination_token` si se indica.
+    En modo `incremental` solo pide lo publicado después de la marca de agua de la cuenta.
+    """
+    watermark = get_watermark_store().get(SCOPE_USER, username) if incremental else None
+    since_id = watermark["newest_id"] if watermark else None
+
+    data: List = []
+    includes: Dict[str, List] = {}
+    first_meta: Dict = {}
+    last_meta: Dict = {}
+    user_info = None
+    pages = 0
+
+    for page in iter_real_tweet_pages(username, start_date, end_date, bearer_token,
+                                      max_results=max_results, since_id=since_id,
+                                      pagination_token=pagination_token):
+        if page.get("status") == "error":
+            if not pages:
+                return page
+            # Error a mitad de la paginación: devolver lo recolectado hasta ahora
+            last_meta = {**last_meta, "error": page}
+            break
+
+        pages += 1
+        user_info = page["user_info"]
+        data.extend(page["data"])
+        for key, values in page["includes"].items():
+            includes.setdefault(key, [])
+            includes[key].extend(v for v in values if v not in includes[key])
+        if pages == 1:
+            first_meta = page["meta"]
+        last_meta = page["meta"]
 
     response = {
         "status": "success",
-        "data": [tweet.data if hasattr(tweet, "data") else tweet for tweet in tweets_data] if tweets_data else [],
-        "includes": includes_data or {},
-        "meta": meta_data or {},
-        "user_info": user_data
+        "data": data,
+        "includes": includes,
+        "meta": {
+            "result_count": len(data),
+            "newest_id": first_meta.get("newest_id"),
+            "oldest_id": last_meta.get("oldest_id"),
+            "next_token": last_meta.get("next_token"),
+            "pages": pages,
+            **({"error": last_meta["error"]} if "error" in last_meta else {}),
+        },
+        "user_info": user_info
     }
 
-    return response
\ No newline at end of file
+    if incremental:
+        # Igual que en mock: la marca solo avanza si se empezó por la primera página
+        complete = not pagination_token and "error" not in last_meta and not last_meta.get("next_token")
+        response["incremental"] = _advance_watermark(SCOPE_USER, username, data, watermark, complete=complete)
+
+    return response
+
+
+def _advance_watermark(scope: str, key: str, data: List[Dict], watermark: Optional[Dict], complete: bool) -> Dict:
+    """
+    Avanza la marca de agua solo si se recorrió todo lo nuevo (sin huecos entre la marca
+    anterior y los tweets recolectados). Devuelve el reporte de lo omitido.
+    """
+    newest = newest_id(data)
+    advanced = False
+    if complete and newest:
+        created_at = next((item.get("created_at") for item in data if str(item.get("id")) == newest), None)
+        advanced = get_watermark_store().advance(scope, key, newest, created_at)
+    return {
+        "since_id": watermark["newest_id"] if watermark else None,
+        "skipped_until": watermark["newest_created_at"] if watermark else None,
+        "new_items": len(data),
+        "watermark_advanced": advanced,
+        "newest_id": newest or (watermark["newest_id"] if watermark else None),
+    }
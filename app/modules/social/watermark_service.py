@@ -0,0 +1,198 @@
+# app/modules/social/watermark_service.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+SCOPE_USER = "user"
+SCOPE_CONVERSATION = "conversation"
+# Las colecciones simuladas llevan su propia marca: no deben saltarse tweets reales
+SCOPE_MOCK_USER = "mock_user"
+
+
+def newest_id(items: List[Dict]) -> Optional[str]:
+    """
+    Devuelve el ID más reciente de una lista de tweets (los IDs de Twitter crecen en el tiempo).
+    """
+    ids = [int(item["id"]) for item in items if item.get("id") is not None and str(item["id"]).isdigit()]
+    return str(max(ids)) if ids else None
+
+
+def is_newer(tweet_id, since_id: Optional[str]) -> bool:
+    if not since_id:
+        return True
+    try:
+        return int(tweet_id) > int(since_id)
+    except (TypeError, ValueError):
+        return True
+
+
+class WatermarkStore:
+    """
+    Marcas de agua persistentes (SQLite): el tweet más reciente ya recolectado por
+    cuenta (`user`, o `mock_user` en modo simulado) o por conversación (`conversation`).
+    Solo avanzan, nunca retroceden.
+
+    Una recolección recortada (más respuestas nuevas que el tope) deja un hueco pendiente:
+    `pending_until_id` es la respuesta más antigua devuelta y `pending_newest_id` la más
+    nueva. La marca queda en su lugar hasta que una recolección posterior cubre el hueco
+    (`close_pending`), y recién entonces salta a `pending_newest_id`.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                newest_id TEXT NOT NULL,
+                newest_created_at TEXT,
+                updated_at REAL NOT NULL,
+                pending_until_id TEXT,
+                pending_newest_id TEXT,
+                pending_created_at TEXT,
+                PRIMARY KEY (scope, key)
+            )
+            """
+        )
+        # Bases anteriores a los huecos pendientes
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(watermarks)")}
+        for column in ("pending_until_id", "pending_newest_id", "pending_created_at"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE watermarks ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def get(self, scope: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_id, newest_created_at, updated_at FROM watermarks WHERE scope = ? AND key = ?",
+                (scope, key.lower()),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"newest_id": row[0], "newest_created_at": row[1], "updated_at": row[2]}
+
+    def get_many(self, scope: str, keys: List[str]) -> Dict[str, str]:
+        """
+        Devuelve {key: newest_id} para las claves que tienen marca de agua.
+        """
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                block = [k.lower() for k in keys[start:start + 500]]
+                placeholders = ",".join("?" * len(block))
+                rows = self._conn.execute(
+                    f"SELECT key, newest_id FROM watermarks WHERE scope = ? AND key IN ({placeholders})",
+                    [scope, *block],
+                ).fetchall()
+                found.update(dict(rows))
+        return found
+
+    def get_pending_many(self, scope: str, keys: List[str]) -> Dict[str, str]:
+        """
+        Devuelve {key: pending_until_id} para las claves con un hueco pendiente.
+        """
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                block = [k.lower() for k in keys[start:start + 500]]
+                placeholders = ",".join("?" * len(block))
+                rows = self._conn.execute(
+                    f"SELECT key, pending_until_id FROM watermarks WHERE scope = ? AND key IN ({placeholders}) "
+                    f"AND pending_until_id IS NOT NULL",
+                    [scope, *block],
+                ).fetchall()
+                found.update(dict(rows))
+        return found
+
+    def hold(self, scope: str, key: str, until_id: str, newest_id: Optional[str] = None,
+             created_at: Optional[str] = None) -> bool:
+        """
+        Registra (o achica) el hueco pendiente sobre la marca: faltan las respuestas entre la
+        marca y `until_id`. `newest_id` solo se toma la primera vez (luego solo baja `until_id`).
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE watermarks SET
+                    pending_until_id = ?,
+                    pending_newest_id = COALESCE(pending_newest_id, ?),
+                    pending_created_at = COALESCE(pending_created_at, ?),
+                    updated_at = ?
+                WHERE scope = ? AND key = ?
+                """,
+                (str(until_id), newest_id, str(created_at) if created_at else None, time.time(), scope, key.lower()),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def close_pending(self, scope: str, key: str) -> bool:
+        """
+        El hueco quedó cubierto: la marca salta a la respuesta más nueva ya recolectada.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE watermarks SET
+                    newest_id = CASE WHEN CAST(pending_newest_id AS INTEGER) > CAST(newest_id AS INTEGER)
+                                     THEN pending_newest_id ELSE newest_id END,
+                    newest_created_at = CASE WHEN CAST(pending_newest_id AS INTEGER) > CAST(newest_id AS INTEGER)
+                                             THEN pending_created_at ELSE newest_created_at END,
+                    pending_until_id = NULL, pending_newest_id = NULL, pending_created_at = NULL,
+                    updated_at = ?
+                WHERE scope = ? AND key = ? AND pending_until_id IS NOT NULL
+                """,
+                (time.time(), scope, key.lower()),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def advance(self, scope: str, key: str, tweet_id: Optional[str], created_at: Optional[str] = None) -> bool:
+        """
+        Avanza la marca de agua si `tweet_id` es más reciente. Devuelve True si se actualizó.
+        """
+        if not tweet_id or not str(tweet_id).isdigit():
+            return False
+        # Una sola sentencia: la comparación y la escritura son atómicas entre procesos
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO watermarks (scope, key, newest_id, newest_created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(scope, key) DO UPDATE SET
+                    newest_id = excluded.newest_id,
+                    newest_created_at = excluded.newest_created_at,
+                    updated_at = excluded.updated_at
+                WHERE CAST(excluded.newest_id AS INTEGER) > CAST(watermarks.newest_id AS INTEGER)
+                """,
+                (scope, key.lower(), str(tweet_id), str(created_at) if created_at else None, time.time()),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def reset(self, scope: str, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM watermarks WHERE scope = ? AND key = ?", (scope, key.lower()))
+            self._conn.commit()
+
+
+_store: Optional[WatermarkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_watermark_store() -> WatermarkStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WatermarkStore(settings.WATERMARK_SQLITE_PATH)
+    return _store
@@ -0,0 +1,105 @@
+# app/modules/storage/routes.py
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.modules.storage.store_service import ROLLUP_SCOPES, get_local_store
+
+router = APIRouter()
+
+
+def _require_store():
+    store = get_local_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="El almacenamiento local está desactivado (STORAGE_ENABLED).")
+    return store
+
+
+@router.get("/tweets")
+def list_tweets(
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    label: Optional[str] = Query(None, description="Etiqueta (RELEVANTE / NO RELEVANTE)"),
+    username: Optional[str] = Query(None, description="Cuenta de origen"),
+    author_id: Optional[str] = Query(None, description="ID del autor"),
+    conversation_id: Optional[str] = Query(None, description="ID de la conversación"),
+    source: Optional[str] = Query(None, description="'real' o 'mock'"),
+    limit: int = Query(100, ge=1, le=1000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en `next_cursor`"),
+):
+    """
+    Consulta los tweets almacenados, del más reciente al más antiguo, con paginación por cursor.
+    """
+    store = _require_store()
+    return {
+        "status": "ok",
+        **store.query("tweets", start_date=start_date, end_date=end_date, limit=limit, cursor=cursor,
+                      label=label, username=username, author_id=author_id,
+                      conversation_id=conversation_id, source=source),
+    }
+
+
+@router.get("/comments")
+def list_comments(
+    start_date: Optional[str] = Query(None, description="Fecha de inicio (ISO8601)"),
+    end_date: Optional[str] = Query(None, description="Fecha de fin (ISO8601)"),
+    label: Optional[str] = Query(None, description="Etiqueta (RELEVANTE / NO RELEVANTE)"),
+    tweet_id: Optional[str] = Query(None, description="ID del tweet comentado"),
+    author_id: Optional[str] = Query(None, description="ID del autor"),
+    conversation_id: Optional[str] = Query(None, description="ID de la conversación"),
+    source: Optional[str] = Query(None, description="'real' o 'mock'"),
+    limit: int = Query(100, ge=1, le=1000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en `next_cursor`"),
+):
+    """
+    Consulta los comentarios almacenados, del más reciente al más antiguo, con paginación por cursor.
+    """
+    store = _require_store()
+    return {
+        "status": "ok",
+        **store.query("comments", start_date=start_date, end_date=end_date, limit=limit, cursor=cursor,
+                      label=label, tweet_id=tweet_id, author_id=author_id,
+                      conversation_id=conversation_id, source=source),
+    }
+
+
+@router.get("/stats")
+def storage_stats():
+    """
+    Totales almacenados por tabla y por etiqueta.
+    """
+    return {"status": "ok", "stats": _require_store().stats()}
+
+
+def _check_scope(scope: str) -> None:
+    if scope not in ROLLUP_SCOPES:
+        raise HTTPException(status_code=400, detail=f"Alcance no soportado: {scope} (usar {' o '.join(ROLLUP_SCOPES)})")
+
+
+@router.get("/rollups/{scope}")
+def list_rollups(
+    scope: str,
+    limit: int = Query(50, ge=1, le=1000, description="Cantidad de tweets / cuentas"),
+):
+    """
+    Tweets (`tweet`) o cuentas (`account`) con más comentarios y su resumen precalculado.
+    """
+    _check_scope(scope)
+    return {"status": "ok", "scope": scope, "rollups": _require_store().list_rollups(scope, limit=limit)}
+
+
+@router.get("/rollups/{scope}/{key}")
+def get_rollup(
+    scope: str,
+    key: str,
+    top_commenters: int = Query(10, ge=0, le=100, description="Cantidad de comentaristas principales"),
+    days: Optional[int] = Query(None, ge=1, description="Días de la serie diaria (vacío = todos)"),
+):
+    """
+    Resumen de los comentarios de un tweet (por ID) o de una cuenta (por username):
+    volumen, likes / respuestas, proporción relevante, principales comentaristas y serie diaria.
+    Se mantiene incrementalmente al guardar comentarios, así que no relee la conversación.
+    """
+    _check_scope(scope)
+    rollup = _require_store().get_rollup(scope, key, top_commenters=top_commenters, days=days)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="Sin comentarios registrados para esa clave.")
+    return {"status": "ok", "rollup": rollup}
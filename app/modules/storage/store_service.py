@@ -0,0 +1,665 @@
+# app/modules/storage/store_service.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+ITEM_TWEET = "tweet"
+ITEM_COMMENT = "comment"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id TEXT PRIMARY KEY,
+    author_id TEXT,
+    username TEXT,
+    conversation_id TEXT,
+    created_at TEXT,
+    text TEXT,
+    lang TEXT,
+    like_count INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0,
+    retweet_count INTEGER DEFAULT 0,
+    quote_count INTEGER DEFAULT 0,
+    label TEXT,
+    label_updated_at REAL,
+    source TEXT,
+    raw TEXT,
+    collected_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_created ON tweets(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tweets_author_created ON tweets(author_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tweets_username_created ON tweets(username, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tweets_conversation_created ON tweets(conversation_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tweets_label_created ON tweets(label, created_at, id);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    tweet_id TEXT,
+    conversation_id TEXT,
+    author_id TEXT,
+    created_at TEXT,
+    text TEXT,
+    like_count INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0,
+    label TEXT,
+    label_updated_at REAL,
+    source TEXT,
+    collected_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_tweet_created ON comments(tweet_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_created ON comments(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_author_created ON comments(author_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_conversation_created ON comments(conversation_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_label_created ON comments(label, created_at, id);
+
+CREATE TABLE IF NOT EXISTS comment_rollups (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    comments INTEGER DEFAULT 0,
+    like_count INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0,
+    labeled INTEGER DEFAULT 0,
+    relevant INTEGER DEFAULT 0,
+    first_at TEXT,
+    last_at TEXT,
+    updated_at REAL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_comments ON comment_rollups(scope, comments);
+
+CREATE TABLE IF NOT EXISTS comment_rollup_authors (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    author_id TEXT NOT NULL,
+    comments INTEGER DEFAULT 0,
+    like_count INTEGER DEFAULT 0,
+    last_at TEXT,
+    PRIMARY KEY (scope, key, author_id)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_authors_top ON comment_rollup_authors(scope, key, comments);
+
+CREATE TABLE IF NOT EXISTS comment_rollup_daily (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    day TEXT NOT NULL,
+    comments INTEGER DEFAULT 0,
+    like_count INTEGER DEFAULT 0,
+    relevant INTEGER DEFAULT 0,
+    PRIMARY KEY (scope, key, day)
+);
+"""
+
+# Agregados de comentarios: por tweet comentado y por cuenta dueña del tweet
+ROLLUP_TWEET = "tweet"
+ROLLUP_ACCOUNT = "account"
+ROLLUP_SCOPES = (ROLLUP_TWEET, ROLLUP_ACCOUNT)
+_RELEVANT_LABEL = "RELEVANTE"
+_ROLLUP_FIELDS = ("tweet_id", "author_id", "created_at", "like_count", "reply_count", "label")
+
+_TWEET_COLUMNS = ("id", "author_id", "username", "conversation_id", "created_at", "text", "lang",
+                  "like_count", "reply_count", "retweet_count", "quote_count", "label",
+                  "label_updated_at", "source", "raw", "collected_at")
+_COMMENT_COLUMNS = ("id", "tweet_id", "conversation_id", "author_id", "created_at", "text",
+                    "like_count", "reply_count", "label", "label_updated_at", "source", "collected_at")
+
+# Índices de versiones anteriores, reemplazados por los que terminan en (created_at, id)
+_LEGACY_INDEXES = ("idx_tweets_author", "idx_tweets_username", "idx_tweets_conversation", "idx_tweets_label",
+                   "idx_comments_tweet", "idx_comments_author", "idx_comments_conversation", "idx_comments_label")
+
+# Sin fecha se guarda '' (ordena antes que cualquier fecha) y no NULL: así la paginación
+# ordena y compara por las columnas (created_at, id) tal cual y los índices la resuelven
+NO_DATE = ""
+
+# Columnas filtrables por tabla (evita interpolar nombres arbitrarios en SQL)
+_FILTERS = {
+    "tweets": ("author_id", "username", "conversation_id", "label", "source"),
+    "comments": ("tweet_id", "conversation_id", "author_id", "label", "source"),
+}
+
+
+def normalize_timestamp(value: Any) -> Optional[str]:
+    """
+    Convierte fechas (ISO8601 con o sin 'Z', o datetime) al formato UTC uniforme
+    "YYYY-MM-DDTHH:MM:SS.mmmZ", que ordena correctamente como texto.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        try:
+            moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return str(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def stored_timestamp(value: Any) -> str:
+    return normalize_timestamp(value) or NO_DATE
+
+
+def encode_cursor(created_at: Optional[str], item_id: str) -> str:
+    return f"{created_at or ''}|{item_id}"
+
+
+def account_key(username: Optional[str]) -> Optional[str]:
+    """
+    Clave de una cuenta en los agregados: los usuarios de Twitter no distinguen mayúsculas.
+    """
+    return username.lower() if username else None
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    created_at, _, item_id = cursor.partition("|")
+    return created_at, item_id
+
+
+class LocalStore:
+    """
+    Almacén local (SQLite) de tweets, comentarios y sus clasificaciones.
+    Inserciones masivas con upsert por ID e índices para consultas por autor,
+    fecha, conversación y etiqueta con paginación por keyset.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Bases anteriores: índices viejos y fechas faltantes guardadas como NULL
+        for index in _LEGACY_INDEXES:
+            self._conn.execute(f"DROP INDEX IF EXISTS {index}")
+        for table in ("tweets", "comments"):
+            self._conn.execute(f"UPDATE {table} SET created_at = ? WHERE created_at IS NULL", (NO_DATE,))
+        self._conn.commit()
+        # Bases creadas antes de los agregados (o con claves de cuenta sin normalizar):
+        # calcularlos una vez a partir de los comentarios
+        if self._conn.execute("SELECT 1 FROM comments LIMIT 1").fetchone() and (
+                not self._conn.execute("SELECT 1 FROM comment_rollups LIMIT 1").fetchone()
+                or self._conn.execute("SELECT 1 FROM comment_rollups WHERE scope = ? AND key != lower(key) LIMIT 1",
+                                      (ROLLUP_ACCOUNT,)).fetchone()):
+            self.rebuild_rollups()
+
+    # ---------------- escritura ----------------
+
+    def upsert_tweets(self, tweets: Iterable[Dict[str, Any]], username: Optional[str] = None,
+                      source: str = "real") -> int:
+        """
+        Inserta o actualiza tweets por ID. Una etiqueta nula no pisa la ya guardada.
+        """
+        now = time.time()
+        rows = []
+        for tweet in tweets:
+            metrics = tweet.get("public_metrics") or {}
+            label = tweet.get("classification") or tweet.get("label")
+            rows.append((
+                str(tweet["id"]), _str(tweet.get("author_id")), username, _str(tweet.get("conversation_id")),
+                stored_timestamp(tweet.get("created_at")), tweet.get("text"), tweet.get("lang"),
+                metrics.get("like_count", 0), metrics.get("reply_count", 0),
+                metrics.get("retweet_count", 0), metrics.get("quote_count", 0),
+                label, now if label else None, source,
+                json.dumps(tweet, ensure_ascii=False, default=str), now,
+            ))
+        if not rows or not username:
+            return self._upsert("tweets", _TWEET_COLUMNS, rows)
+
+        account = account_key(username)
+        with self._lock:
+            ids = [row[0] for row in rows]
+            previous = self._accounts_for(ids)
+            self._conn.executemany(self._upsert_sql("tweets", _TWEET_COLUMNS), rows)
+            # Tweets que cambian de cuenta: sus agregados pasan de la cuenta anterior a la nueva
+            moved: Dict[str, List[str]] = {}
+            for tweet_id, old_account in previous.items():
+                if old_account != account:
+                    moved.setdefault(old_account, []).append(tweet_id)
+            for old_account, tweet_ids in moved.items():
+                self._attribute_rollups(tweet_ids, old_account, now, sign=-1)
+            # Comentarios guardados antes que su tweet: ahora se suman a la cuenta
+            self._attribute_rollups([i for i in ids if previous.get(i) != account], account, now)
+            self._conn.commit()
+        return len(rows)
+
+    def upsert_comments(self, comments: Iterable[Dict[str, Any]], source: str = "real") -> int:
+        """
+        Inserta o actualiza comentarios por ID y, en la misma transacción, actualiza los
+        agregados por tweet y por cuenta con la diferencia respecto de lo ya guardado.
+        """
+        now = time.time()
+        rows: Dict[str, tuple] = {}
+        for comment in comments:
+            if comment.get("error"):
+                continue
+            label = comment.get("classification") or comment.get("label")
+            rows[str(comment["id"])] = (
+                str(comment["id"]), _str(comment.get("tweet_id")),
+                _str(comment.get("conversation_id") or comment.get("tweet_id")), _str(comment.get("author_id")),
+                stored_timestamp(comment.get("created_at")), comment.get("text"),
+                comment.get("like_count", 0), comment.get("reply_count", 0),
+                label, now if label else None, source, now,
+            )
+        if not rows:
+            return 0
+
+        with self._lock:
+            previous = self._fetch_comments(list(rows))
+            changes = []
+            for comment_id, row in rows.items():
+                new = dict(zip(_COMMENT_COLUMNS, row))
+                old = previous.get(comment_id)
+                if old is not None and new["label"] is None:
+                    new["label"] = old["label"]
+                changes.append((old, new))
+            self._conn.executemany(self._upsert_sql("comments", _COMMENT_COLUMNS), list(rows.values()))
+            self._apply_rollup_changes(changes, now)
+            self._conn.commit()
+        return len(rows)
+
+    @staticmethod
+    def _upsert_sql(table: str, columns: Tuple[str, ...]) -> str:
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, {table}.{c})" if c in ("label", "label_updated_at", "username")
+            else f"{c} = excluded.{c}"
+            for c in columns if c != "id"
+        )
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}"
+        )
+
+    def _upsert(self, table: str, columns: Tuple[str, ...], rows: List[tuple]) -> int:
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(self._upsert_sql(table, columns), rows)
+            self._conn.commit()
+        return len(rows)
+
+    def set_labels(self, item_type: str, labels: Dict[str, str]) -> int:
+        """
+        Guarda etiquetas de clasificación ({id: etiqueta}) para tweets o comentarios ya almacenados.
+        """
+        table = "tweets" if item_type == ITEM_TWEET else "comments"
+        labels = {str(item_id): label for item_id, label in labels.items()}
+        now = time.time()
+        with self._lock:
+            previous = self._fetch_comments(list(labels)) if table == "comments" else {}
+            cursor = self._conn.executemany(
+                f"UPDATE {table} SET label = ?, label_updated_at = ? WHERE id = ?",
+                [(label, now, item_id) for item_id, label in labels.items()],
+            )
+            # Los agregados de comentarios siguen el cambio de etiqueta
+            self._apply_rollup_changes(
+                [(old, {**old, "label": labels[comment_id]}) for comment_id, old in previous.items()], now)
+            self._conn.commit()
+        return cursor.rowcount
+
+    # ---------------- agregados de comentarios ----------------
+
+    def _fetch_comments(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT id, tweet_id, author_id, created_at, like_count, reply_count, label "
+                f"FROM comments WHERE id IN ({', '.join('?' * len(part))})",
+                part,
+            ).fetchall()
+            found.update((row["id"], dict(row)) for row in rows)
+        return found
+
+    def _accounts_for(self, tweet_ids: List[str]) -> Dict[str, str]:
+        accounts: Dict[str, str] = {}
+        for start in range(0, len(tweet_ids), 500):
+            part = tweet_ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT id, username FROM tweets WHERE username IS NOT NULL AND id IN ({', '.join('?' * len(part))})",
+                part,
+            ).fetchall()
+            accounts.update((row["id"], account_key(row["username"])) for row in rows)
+        return accounts
+
+    def _apply_rollup_changes(self, changes: List[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]],
+                              now: float) -> None:
+        """
+        Suma a los agregados la diferencia entre la versión guardada de cada comentario
+        (None si es nuevo) y la nueva. Costo proporcional a los comentarios que cambian,
+        no al tamaño de la conversación. La cuenta es la del tweet comentado (si está guardado).
+        """
+        tweet_ids = {version["tweet_id"] for change in changes for version in change if version and version.get("tweet_id")}
+        accounts = self._accounts_for(sorted(tweet_ids))
+        totals: Dict[Tuple[str, str], List[Any]] = {}
+        authors: Dict[Tuple[str, str, str], List[Any]] = {}
+        daily: Dict[Tuple[str, str, str], List[int]] = {}
+
+        for old, new in changes:
+            # Se resta la versión anterior y se suma la nueva (si no cambió nada, no hay nada que hacer)
+            if old is not None and all(old.get(c) == new.get(c) for c in _ROLLUP_FIELDS):
+                continue
+            for sign, version in ((-1, old), (1, new)):
+                if version is None:
+                    continue
+                created_at = version.get("created_at")
+                likes = sign * (version.get("like_count") or 0)
+                relevant = sign * (version.get("label") == _RELEVANT_LABEL)
+                for scope, key in ((ROLLUP_TWEET, version.get("tweet_id")),
+                                   (ROLLUP_ACCOUNT, accounts.get(version.get("tweet_id")))):
+                    if not key:
+                        continue
+                    total = totals.setdefault((scope, key), [0, 0, 0, 0, 0, None, None])
+                    total[0] += sign
+                    total[1] += likes
+                    total[2] += sign * (version.get("reply_count") or 0)
+                    total[3] += sign * (version.get("label") is not None)
+                    total[4] += relevant
+                    if created_at and sign > 0:
+                        total[5] = min(total[5] or created_at, created_at)
+                        total[6] = max(total[6] or created_at, created_at)
+                    if version.get("author_id"):
+                        author = authors.setdefault((scope, key, version["author_id"]), [0, 0, None])
+                        author[0] += sign
+                        author[1] += likes
+                        if created_at and sign > 0:
+                            author[2] = max(author[2] or created_at, created_at)
+                    if created_at:
+                        day = daily.setdefault((scope, key, created_at[:10]), [0, 0, 0])
+                        day[0] += sign
+                        day[1] += likes
+                        day[2] += relevant
+
+        self._write_rollup_deltas(totals, authors, daily, now)
+
+    def _attribute_rollups(self, tweet_ids: List[str], account: str, now: float, sign: int = 1) -> None:
+        """
+        Suma (o resta, con `sign=-1`) los agregados ya acumulados de cada tweet a los de la
+        cuenta (costo por tweet, no por comentario). Las fechas extremas solo se amplían.
+        """
+        totals: Dict[Tuple[str, str], List[Any]] = {}
+        authors: Dict[Tuple[str, str, str], List[Any]] = {}
+        daily: Dict[Tuple[str, str, str], List[int]] = {}
+        key = (ROLLUP_ACCOUNT, account)
+        for start in range(0, len(tweet_ids), 500):
+            part = tweet_ids[start:start + 500]
+            marks = ", ".join("?" * len(part))
+            for row in self._conn.execute(
+                    f"SELECT comments, like_count, reply_count, labeled, relevant, first_at, last_at "
+                    f"FROM comment_rollups WHERE scope = ? AND key IN ({marks})", [ROLLUP_TWEET, *part]):
+                total = totals.setdefault(key, [0, 0, 0, 0, 0, None, None])
+                for i in range(5):
+                    total[i] += sign * row[i]
+                if sign > 0:
+                    total[5] = min(filter(None, (total[5], row[5])), default=None)
+                    total[6] = max(filter(None, (total[6], row[6])), default=None)
+            for row in self._conn.execute(
+                    f"SELECT author_id, comments, like_count, last_at FROM comment_rollup_authors "
+                    f"WHERE scope = ? AND key IN ({marks})", [ROLLUP_TWEET, *part]):
+                author = authors.setdefault((*key, row[0]), [0, 0, None])
+                author[0] += sign * row[1]
+                author[1] += sign * row[2]
+                if sign > 0:
+                    author[2] = max(filter(None, (author[2], row[3])), default=None)
+            for row in self._conn.execute(
+                    f"SELECT day, comments, like_count, relevant FROM comment_rollup_daily "
+                    f"WHERE scope = ? AND key IN ({marks})", [ROLLUP_TWEET, *part]):
+                day = daily.setdefault((*key, row[0]), [0, 0, 0])
+                for i in range(3):
+                    day[i] += sign * row[i + 1]
+        if totals:
+            self._write_rollup_deltas(totals, authors, daily, now)
+
+    def _write_rollup_deltas(self, totals: Dict[Tuple[str, str], List[Any]],
+                             authors: Dict[Tuple[str, str, str], List[Any]],
+                             daily: Dict[Tuple[str, str, str], List[int]], now: float) -> None:
+        self._conn.executemany(
+            """
+            INSERT INTO comment_rollups (scope, key, comments, like_count, reply_count, labeled, relevant,
+                                         first_at, last_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(scope, key) DO UPDATE SET
+                comments = comments + excluded.comments,
+                like_count = like_count + excluded.like_count,
+                reply_count = reply_count + excluded.reply_count,
+                labeled = labeled + excluded.labeled,
+                relevant = relevant + excluded.relevant,
+                first_at = CASE WHEN first_at IS NULL OR excluded.first_at < first_at
+                                THEN COALESCE(excluded.first_at, first_at) ELSE first_at END,
+                last_at = CASE WHEN last_at IS NULL OR excluded.last_at > last_at
+                               THEN COALESCE(excluded.last_at, last_at) ELSE last_at END,
+                updated_at = excluded.updated_at
+            """,
+            [(scope, key, *values, now) for (scope, key), values in totals.items()],
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO comment_rollup_authors (scope, key, author_id, comments, like_count, last_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(scope, key, author_id) DO UPDATE SET
+                comments = comments + excluded.comments,
+                like_count = like_count + excluded.like_count,
+                last_at = CASE WHEN last_at IS NULL OR excluded.last_at > last_at
+                               THEN COALESCE(excluded.last_at, last_at) ELSE last_at END
+            """,
+            [(*key, *values) for key, values in authors.items()],
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO comment_rollup_daily (scope, key, day, comments, like_count, relevant)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(scope, key, day) DO UPDATE SET
+                comments = comments + excluded.comments,
+                like_count = like_count + excluded.like_count,
+                relevant = relevant + excluded.relevant
+            """,
+            [(*key, *values) for key, values in daily.items()],
+        )
+
+    def rebuild_rollups(self) -> None:
+        """
+        Recalcula todos los agregados desde los comentarios guardados (p. ej. tras migrar una base).
+        """
+        now = time.time()
+        # (scope, expresión de la clave, join adicional)
+        scopes = [
+            (ROLLUP_TWEET, "c.tweet_id", ""),
+            (ROLLUP_ACCOUNT, "lower(t.username)", "JOIN tweets t ON t.id = c.tweet_id"),
+        ]
+        with self._lock:
+            for table in ("comment_rollups", "comment_rollup_authors", "comment_rollup_daily"):
+                self._conn.execute(f"DELETE FROM {table}")
+            for scope, key, join in scopes:
+                self._conn.execute(
+                    f"""
+                    INSERT INTO comment_rollups (scope, key, comments, like_count, reply_count, labeled, relevant,
+                                                 first_at, last_at, updated_at)
+                    SELECT ?, {key}, COUNT(*), COALESCE(SUM(c.like_count), 0), COALESCE(SUM(c.reply_count), 0),
+                           SUM(c.label IS NOT NULL), SUM(CASE WHEN c.label = ? THEN 1 ELSE 0 END), MIN(NULLIF(c.created_at, '')), MAX(NULLIF(c.created_at, '')), ?
+                    FROM comments c {join} WHERE {key} IS NOT NULL GROUP BY {key}
+                    """,
+                    (scope, _RELEVANT_LABEL, now),
+                )
+                self._conn.execute(
+                    f"""
+                    INSERT INTO comment_rollup_authors (scope, key, author_id, comments, like_count, last_at)
+                    SELECT ?, {key}, c.author_id, COUNT(*), COALESCE(SUM(c.like_count), 0), MAX(NULLIF(c.created_at, ''))
+                    FROM comments c {join} WHERE {key} IS NOT NULL AND c.author_id IS NOT NULL
+                    GROUP BY {key}, c.author_id
+                    """,
+                    (scope,),
+                )
+                self._conn.execute(
+                    f"""
+                    INSERT INTO comment_rollup_daily (scope, key, day, comments, like_count, relevant)
+                    SELECT ?, {key}, substr(c.created_at, 1, 10), COUNT(*), COALESCE(SUM(c.like_count), 0),
+                           SUM(CASE WHEN c.label = ? THEN 1 ELSE 0 END)
+                    FROM comments c {join} WHERE {key} IS NOT NULL AND c.created_at > ''
+                    GROUP BY {key}, substr(c.created_at, 1, 10)
+                    """,
+                    (scope, _RELEVANT_LABEL),
+                )
+            self._conn.commit()
+
+    def get_rollup(self, scope: str, key: str, top_commenters: int = 10,
+                   days: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Resumen precalculado de un tweet o una cuenta: volumen, interacción, proporción
+        relevante, principales comentaristas y serie diaria (los últimos `days` días con datos).
+        """
+        if scope == ROLLUP_ACCOUNT:
+            key = account_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM comment_rollups WHERE scope = ? AND key = ?", (scope, key)
+            ).fetchone()
+            if row is None:
+                return None
+            top = self._conn.execute(
+                "SELECT author_id, comments, like_count, last_at FROM comment_rollup_authors "
+                "WHERE scope = ? AND key = ? AND comments > 0 ORDER BY comments DESC, like_count DESC LIMIT ?",
+                (scope, key, top_commenters),
+            ).fetchall()
+            timeline = self._conn.execute(
+                "SELECT day, comments, like_count, relevant FROM comment_rollup_daily "
+                "WHERE scope = ? AND key = ? ORDER BY day DESC LIMIT ?",
+                (scope, key, days if days else -1),
+            ).fetchall()
+        return {
+            **self._rollup_summary(row),
+            "top_commenters": [dict(r) for r in top],
+            "timeline": [dict(r) for r in reversed(timeline)],
+        }
+
+    def list_rollups(self, scope: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Tweets o cuentas con más comentarios, con su resumen.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM comment_rollups WHERE scope = ? ORDER BY comments DESC, key LIMIT ?",
+                (scope, limit),
+            ).fetchall()
+        return [self._rollup_summary(row) for row in rows]
+
+    @staticmethod
+    def _rollup_summary(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item["relevant_share"] = round(item["relevant"] / item["labeled"], 4) if item["labeled"] else None
+        item["engagement"] = item["like_count"] + item["reply_count"]
+        return item
+
+    # ---------------- lectura ----------------
+
+    def query(self, table: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              limit: int = 100, cursor: Optional[str] = None, **filters: Optional[str]) -> Dict[str, Any]:
+        """
+        Consulta por rango de fechas y filtros exactos, del más reciente al más antiguo,
+        con paginación por keyset: `next_cursor` apunta al último elemento devuelto.
+        """
+        sql, params = self._query_sql(table, start_date, end_date, limit + 1, cursor, filters)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = encode_cursor(rows[limit - 1]["created_at"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        items = [self._row_to_dict(row) for row in rows[:limit]]
+        return {"items": items, "count": len(items), "next_cursor": next_cursor}
+
+    @staticmethod
+    def _query_sql(table: str, start_date: Optional[str], end_date: Optional[str], limit: int,
+                   cursor: Optional[str], filters: Dict[str, Optional[str]]) -> Tuple[str, List[Any]]:
+        if table not in _FILTERS:
+            raise ValueError(f"Tabla no soportada: {table}")
+
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column in _FILTERS[table]:
+            value = filters.get(column)
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_date or end_date:
+            # Un rango de fechas excluye los elementos sin fecha
+            clauses.append("created_at > ?")
+            params.append(NO_DATE)
+        if start_date:
+            clauses.append("created_at >= ?")
+            params.append(normalize_timestamp(start_date))
+        if end_date:
+            clauses.append("created_at <= ?")
+            params.append(normalize_timestamp(end_date))
+        if cursor:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        return f"SELECT * FROM {table} {where} ORDER BY created_at DESC, id DESC LIMIT ?", params
+
+    def iter_chunks(self, table: str, chunk_size: int = 1000, start_date: Optional[str] = None,
+                    end_date: Optional[str] = None, **filters: Optional[str]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Recorre todos los resultados de `query` en bloques de `chunk_size` siguiendo el cursor,
+        sin cargar la tabla completa en memoria (para exportaciones masivas).
+        """
+        cursor = None
+        while True:
+            page = self.query(table, start_date=start_date, end_date=end_date, limit=chunk_size,
+                              cursor=cursor, **filters)
+            if page["items"]:
+                yield page["items"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        if item.get("created_at") == NO_DATE:
+            item["created_at"] = None
+        raw = item.pop("raw", None)
+        if raw:
+            item["raw"] = json.loads(raw)
+        return item
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for table in ("tweets", "comments"):
+                total = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                labels = self._conn.execute(
+                    f"SELECT COALESCE(label, 'SIN ETIQUETA'), COUNT(*) FROM {table} GROUP BY label"
+                ).fetchall()
+                result[table] = {"total": total, "labels": {label: count for label, count in labels}}
+            return result
+
+
+def _str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+_store: Optional[LocalStore] = None
+_store_lock = threading.Lock()
+
+
+def get_local_store() -> Optional[LocalStore]:
+    """
+    Devuelve el almacén local compartido (o None si STORAGE_ENABLED está desactivado).
+    """
+    global _store
+    if not settings.STORAGE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LocalStore(settings.STORAGE_SQLITE_PATH)
+    return _store
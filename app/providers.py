@@ -0,0 +1,94 @@
+# app/providers.py
+"""
+Registro de proveedores externos (clientes de Twitter y OpenAI).
+
+Los clientes se crean en el primer uso y se reutilizan después; las librerías pesadas
+(tweepy, openai) se importan recién dentro de cada fábrica. Así importar la app y atender
+requests que no los necesitan (`/`, modo mock) no paga ese costo en el arranque en frío.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from app.config import settings
+
+PROVIDER_OPENAI = "openai"
+PROVIDER_TWITTER = "twitter"
+
+
+class ProviderRegistry:
+    """
+    Fábricas registradas por nombre e instancias creadas bajo demanda.
+    Los argumentos de `get` forman parte de la clave (p. ej. un cliente por bearer token).
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[..., Any]] = {}
+        self._instances: Dict[Tuple[str, Tuple[Hashable, ...]], Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[..., Any]) -> None:
+        self._factories[name] = factory
+
+    def override(self, name: str, factory: Callable[..., Any]) -> None:
+        """
+        Reemplaza la fábrica (p. ej. por un cliente simulado) y descarta las instancias existentes.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            for key in [k for k in self._instances if k[0] == name]:
+                del self._instances[key]
+
+    def get(self, name: str, *args: Hashable) -> Any:
+        key = (name, args)
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    if name not in self._factories:
+                        raise KeyError(f"Proveedor no registrado: {name}")
+                    instance = self._factories[name](*args)
+                    self._instances[key] = instance
+        return instance
+
+    def pop(self, name: str) -> List[Any]:
+        """
+        Quita y devuelve las instancias creadas de un proveedor (para cerrarlas).
+        """
+        with self._lock:
+            keys = [k for k in self._instances if k[0] == name]
+            return [self._instances.pop(k) for k in keys]
+
+    def created(self) -> List[str]:
+        return sorted({name for name, _ in self._instances})
+
+
+def _create_openai_client():
+    from openai import OpenAI
+
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def _create_twitter_client(bearer_token: str):
+    import tweepy
+
+    return tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=True)
+
+
+registry = ProviderRegistry()
+registry.register(PROVIDER_OPENAI, _create_openai_client)
+registry.register(PROVIDER_TWITTER, _create_twitter_client)
+
+
+def get_openai_client():
+    """
+    Cliente síncrono de OpenAI compartido, creado en el primer uso.
+    """
+    return registry.get(PROVIDER_OPENAI)
+
+
+def get_twitter_client(bearer_token: str):
+    """
+    Cliente de Tweepy reutilizable por bearer token (conexiones keep-alive), creado en el primer uso.
+    """
+    return registry.get(PROVIDER_TWITTER, bearer_token)
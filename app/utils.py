@@ -0,0 +1,110 @@
+# app/utils.py
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa el módulo json estándar
+    orjson = None
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MEDIA_MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def default_window(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
+    # Si no se pasan fechas, usar últimos 7 días por defecto
+    if not start_date or not end_date:
+        end_date = datetime.utcnow().isoformat()
+        start_date = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    return start_date, end_date
+
+
+def _default(obj: Any) -> Any:
+    # Los objetos de Tweepy se exportan vía `.data`; fechas y demás como texto
+    if hasattr(obj, "data"):
+        return obj.data
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_json(payload: Any) -> bytes:
+    """
+    Serializa a JSON (UTF-8) con orjson si está instalado, o con el módulo estándar.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def to_json_line(payload) -> str:
+    """
+    Serializa un objeto como una línea NDJSON (los objetos de Tweepy se exportan vía `.data`).
+    """
+    return dumps_json(payload).decode("utf-8") + "\n"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Interpreta el parámetro `fields` ("id,text,public_metrics.like_count"). None = sin proyección.
+    """
+    if not fields:
+        return None
+    parsed = [f.strip() for f in fields.split(",") if f.strip()]
+    return parsed or None
+
+
+def project(item: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """
+    Devuelve solo los campos pedidos de `item`. Admite rutas con punto para campos anidados
+    ("public_metrics.like_count") y omite los que no existen.
+    """
+    result: Dict[str, Any] = {}
+    for field in fields:
+        value: Any = item
+        parts = field.split(".")
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return result
+
+
+def project_items(items: Iterable[Any], fields: Optional[List[str]]) -> List[Any]:
+    if fields is None:
+        return list(items)
+    return [project(_default(item) if hasattr(item, "data") else item, fields) for item in items]
+
+
+def accepts_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return any(media in accept for media in _MSGPACK_TYPES)
+
+
+def render(request: Request, payload: Any, status_code: int = 200,
+           headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Negociación de contenido: MessagePack si el cliente lo pide en `Accept` (y `msgpack`
+    está instalado), si no JSON con el codificador más rápido disponible.
+    La compresión gzip la aplica el middleware según `Accept-Encoding`.
+    """
+    headers = {**(headers or {}), "Vary": "Accept"}
+    if accepts_msgpack(request):
+        try:
+            import msgpack
+        except ImportError:
+            msgpack = None
+        if msgpack is not None:
+            body = msgpack.packb(payload, default=_default, use_bin_type=True)
+            return Response(body, status_code=status_code, media_type=MEDIA_MSGPACK, headers=headers)
+    return Response(dumps_json(payload), status_code=status_code, media_type=MEDIA_JSON, headers=headers)
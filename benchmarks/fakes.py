@@ -0,0 +1,174 @@
+# benchmarks/fakes.py
+"""
+Backends simulados de Twitter y OpenAI para medir la API sin red.
+Ambos admiten latencia y tasa de errores configurables, y son deterministas con una semilla.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import tweepy
+
+from app.modules.analysis.batch_service import ITEMS_MARKER, StubChatModel
+
+SAMPLE_TEXTS = [
+    "Entregamos bonos del programa Techo Propio a 300 familias de Piura.",
+    "Avanzan las obras de agua potable y alcantarillado en Ate.",
+    "Feria de emprendimiento local este sábado en el Parque Central.",
+    "Campaña gratuita de salud en el Parque Reducto N°2 este fin de semana.",
+    "Nuevo crédito hipotecario Mivivienda con tasas preferenciales.",
+    "Inauguramos nueva ciclovía conectando Av. Pardo con el Malecón Cisneros.",
+    "Reforzamos la iluminación pública en Av. Benavides para mayor seguridad vecinal.",
+    "Supervisamos la planta de tratamiento de aguas residuales de Taboada.",
+]
+
+
+class FakeAPIError(Exception):
+    """
+    Error simulado con `status_code`, como los de OpenAI (429 / 5xx reintentables).
+    """
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Error simulado {status_code}")
+        self.status_code = status_code
+
+
+class _Faults:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, seed: int):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def next_delay(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return max(0.0, self.latency_ms + jitter) / 1000.0, fail
+
+
+class FakeTwitterClient:
+    """
+    Subconjunto de `tweepy.Client` usado por los servicios sociales:
+    get_user, get_users_tweets (paginado), get_tweets y search_recent_tweets.
+    """
+
+    faults: Optional[_Faults] = None
+    tweets_per_user: int = 500
+    replies_per_conversation: int = 20
+
+    def __init__(self, **kwargs):
+        pass
+
+    @classmethod
+    def configure(cls, latency_ms: float = 50, jitter_ms: float = 10, error_rate: float = 0.0,
+                  seed: int = 7, tweets_per_user: int = 500, replies_per_conversation: int = 20) -> None:
+        cls.faults = _Faults(latency_ms, jitter_ms, error_rate, seed)
+        cls.tweets_per_user = tweets_per_user
+        cls.replies_per_conversation = replies_per_conversation
+
+    def _call(self) -> None:
+        delay, fail = self.faults.next_delay()
+        time.sleep(delay)
+        if fail:
+            raise tweepy.TweepyException("Error simulado de Twitter")
+
+    def get_user(self, username: str, **kwargs):
+        self._call()
+        data = {"id": str(zlib.crc32(username.encode("utf-8")) % 10 ** 6), "username": username, "name": username.capitalize()}
+        return SimpleNamespace(data=SimpleNamespace(id=data["id"], data=data))
+
+    def get_users_tweets(self, id, max_results: int = 10, pagination_token=None, since_id=None, **kwargs):
+        self._call()
+        offset = int(pagination_token or 0)
+        count = min(max_results, self.tweets_per_user - offset)
+        base = 1900000000000000000 + int(id) * 10000
+        now = datetime.utcnow()
+        data = [
+            {
+                "id": str(base + self.tweets_per_user - offset - i),
+                "text": SAMPLE_TEXTS[(offset + i) % len(SAMPLE_TEXTS)],
+                "created_at": (now - timedelta(minutes=offset + i)).isoformat() + "Z",
+                "author_id": str(id),
+                "conversation_id": str(base + self.tweets_per_user - offset - i),
+                "lang": "es",
+                "public_metrics": {"retweet_count": i % 7, "reply_count": i % 5, "like_count": i % 40, "quote_count": 0},
+            }
+            for i in range(count)
+        ]
+        if since_id:
+            data = [t for t in data if int(t["id"]) > int(since_id)]
+        next_offset = offset + count
+        meta = {"result_count": len(data)}
+        if data:
+            meta.update({"newest_id": data[0]["id"], "oldest_id": data[-1]["id"]})
+        if next_offset < self.tweets_per_user and data:
+            meta["next_token"] = str(next_offset)
+        return SimpleNamespace(data=data, includes={}, meta=meta)
+
+    def get_tweets(self, ids: List[str], **kwargs):
+        self._call()
+        return SimpleNamespace(data=[{"id": i, "conversation_id": i, "author_id": "1"} for i in ids])
+
+    def search_recent_tweets(self, query: str, max_results: int = 10, **kwargs):
+        self._call()
+        conversations = [part.split(":")[1].strip(")") for part in query.split()
+                         if part.strip("(").startswith("conversation_id:")]
+        per_conversation = max(1, min(self.replies_per_conversation, max_results // max(1, len(conversations))))
+        data = [
+            {
+                "id": f"{c}{j:03d}",
+                "text": SAMPLE_TEXTS[j % len(SAMPLE_TEXTS)],
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "author_id": f"{1000 + j}",
+                "conversation_id": c,
+                "public_metrics": {"like_count": j % 9, "reply_count": j % 3},
+            }
+            for c in conversations for j in range(per_conversation)
+        ]
+        return SimpleNamespace(data=data, includes={}, meta={"result_count": len(data)})
+
+
+class FakeAsyncOpenAI:
+    """
+    Sustituto de `openai.AsyncOpenAI` (solo `chat.completions.create`). Se instala dentro de un
+    `AsyncLLMClient` real, así la medición incluye su semáforo, token buckets y reintentos.
+    Responde como el modelo simulado tras una latencia configurable y falla con 429 según `error_rate`.
+    """
+
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 50, error_rate: float = 0.0, seed: int = 11):
+        self.faults = _Faults(latency_ms, jitter_ms, error_rate, seed)
+        self.stub = StubChatModel()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        delay, fail = self.faults.next_delay()
+        await asyncio.sleep(delay)
+        if fail:
+            raise FakeAPIError(429)
+
+        if ITEMS_MARKER in messages[-1]["content"]:
+            content = self.stub(messages, model)
+        else:
+            item = [{"indice": 0, "texto": messages[-1]["content"]}]
+            parsed = json.loads(self.stub([{"content": ITEMS_MARKER + json.dumps(item)}], model))
+            content = parsed["resultados"][0]["etiqueta"]
+
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(m["content"]) // 4 for m in messages),
+            completion_tokens=max(1, len(content) // 4),
+        )
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
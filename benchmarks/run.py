@@ -0,0 +1,324 @@
+# benchmarks/run.py
+"""
+Benchmark reproducible de carga y latencia de la API.
+
+Levanta la app en este mismo proceso con backends simulados de Twitter y OpenAI
+(latencia y tasa de errores configurables), lanza cada escenario a distintos niveles
+de concurrencia y guarda p50/p95/p99, throughput y memoria en un JSON.
+
+Uso:
+    python -m benchmarks.run --concurrency 1,8,32 --requests 64 --output benchmarks/results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json      # falla si hay regresión
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# La configuración se lee del entorno al importar la app: aislar datos y desactivar las cachés
+_DATA_DIR = tempfile.mkdtemp(prefix="sentidata-bench-")
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("COLLECT_CACHE_ENABLED", "false")
+os.environ.setdefault("STORAGE_SQLITE_PATH", os.path.join(_DATA_DIR, "store.sqlite3"))
+os.environ.setdefault("WATERMARK_SQLITE_PATH", os.path.join(_DATA_DIR, "watermarks.sqlite3"))
+os.environ.setdefault("JOBS_SQLITE_PATH", os.path.join(_DATA_DIR, "jobs.sqlite3"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# El backend simulado no impone cuotas: sin token buckets se mide la app, no el límite configurado
+os.environ.setdefault("LLM_RPM_LIMIT", "0")
+os.environ.setdefault("LLM_TPM_LIMIT", "0")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.modules.analysis import llm_client  # noqa: E402
+from app.providers import PROVIDER_TWITTER, registry  # noqa: E402
+from benchmarks.fakes import FakeAsyncOpenAI, FakeTwitterClient, SAMPLE_TEXTS  # noqa: E402
+
+Scenario = Callable[[httpx.AsyncClient, int], Any]
+
+
+def install_fakes(args: argparse.Namespace) -> FakeAsyncOpenAI:
+    """
+    Reemplaza los clientes de Twitter y OpenAI por los simulados.
+    """
+    FakeTwitterClient.configure(latency_ms=args.twitter_latency_ms, error_rate=args.twitter_error_rate,
+                                seed=args.seed)
+    registry.override(PROVIDER_TWITTER, lambda bearer_token: FakeTwitterClient())
+
+    fake_openai = FakeAsyncOpenAI(latency_ms=args.llm_latency_ms, error_rate=args.llm_error_rate, seed=args.seed)
+    client = llm_client.get_async_llm_client()
+    client._client = fake_openai
+    return fake_openai
+
+
+# ---------------- escenarios ----------------
+
+def _texts(n: int, salt: int) -> List[str]:
+    return [f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} #{salt}-{i}" for i in range(n)]
+
+
+async def scenario_collect(client: httpx.AsyncClient, i: int) -> None:
+    response = await client.get("/social/collect/twitter", params={
+        "username": f"cuenta{i % 10}", "mock": "false", "max_results": 200,
+    })
+    response.raise_for_status()
+
+
+async def scenario_analyze_batch(client: httpx.AsyncClient, i: int) -> None:
+    response = await client.post("/analysis/analyze/posts", params={"mode": "batch"}, json=_texts(100, i))
+    response.raise_for_status()
+
+
+async def scenario_analyze_cascade(client: httpx.AsyncClient, i: int) -> None:
+    response = await client.post("/analysis/analyze/posts", params={"mode": "cascade"}, json=_texts(100, i))
+    response.raise_for_status()
+
+
+async def scenario_pipeline(client: httpx.AsyncClient, i: int) -> float:
+    """
+    Pipeline del servidor (NDJSON). Devuelve el tiempo hasta el primer resultado.
+    """
+    started = time.perf_counter()
+    first = None
+    async with client.stream("GET", "/pipeline/twitter", params={
+        "username": f"cuenta{i % 10}", "mock": "false", "max_results": 100,
+    }) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_lines():
+            if first is None:
+                first = time.perf_counter() - started
+    return first
+
+
+async def scenario_client_flow(client: httpx.AsyncClient, i: int) -> None:
+    """
+    Flujo de `client.py::pipeline_example`: recolectar y luego clasificar desde el cliente.
+    """
+    response = await client.get("/social/collect/twitter", params={
+        "username": f"cuenta{i % 10}", "mock": "false", "max_results": 50,
+    })
+    response.raise_for_status()
+    tweets = response.json()["data"]["data"]
+    response = await client.post("/analysis/analyze/posts", params={"mode": "batch"},
+                                 json=[t["text"] for t in tweets] or ["-"])
+    response.raise_for_status()
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "collect": scenario_collect,
+    "analyze_batch": scenario_analyze_batch,
+    "analyze_cascade": scenario_analyze_cascade,
+    "pipeline": scenario_pipeline,
+    "client_flow": scenario_client_flow,
+}
+
+
+# ---------------- medición ----------------
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+async def run_level(base_url: str, scenario: Scenario, concurrency: int, requests: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    first_results: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker() -> None:
+            nonlocal errors
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    first = await scenario(client, i)
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if isinstance(first, float):
+                    first_results.append(first)
+
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "mean": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "memory_mb": {"rss_before": round(rss_before, 1), "rss_after": round(rss_mb(), 1),
+                      "peak_rss": round(peak_rss_mb(), 1)},
+    }
+    if first_results:
+        result["time_to_first_result_ms"] = {
+            "p50": round(percentile(first_results, 50) * 1000, 1),
+            "p95": round(percentile(first_results, 95) * 1000, 1),
+        }
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _Server:
+    """
+    Uvicorn en un hilo aparte, con su propio event loop.
+    """
+
+    def __init__(self, port: int):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+# ---------------- comparación con baseline ----------------
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Devuelve la lista de regresiones: p95 más lento o throughput menor que el baseline
+    por encima de la tolerancia relativa.
+    """
+    regressions = []
+    for name, levels in results["scenarios"].items():
+        previous = {level["concurrency"]: level for level in baseline.get("scenarios", {}).get(name, [])}
+        for level in levels:
+            before = previous.get(level["concurrency"])
+            if before is None:
+                continue
+            tag = f"{name}@c{level['concurrency']}"
+            if level["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (1 + tolerance):
+                regressions.append(f"{tag}: p95 {before['latency_ms']['p95']} → {level['latency_ms']['p95']} ms")
+            if level["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{tag}: throughput {before['throughput_rps']} → {level['throughput_rps']} rps")
+            if level["errors"] > before["errors"]:
+                regressions.append(f"{tag}: errores {before['errors']} → {level['errors']}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de carga y latencia de SentiData")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Escenarios separados por coma")
+    parser.add_argument("--concurrency", default="1,8,32", help="Niveles de concurrencia separados por coma")
+    parser.add_argument("--requests", type=int, default=64, help="Requests por nivel")
+    parser.add_argument("--twitter-latency-ms", type=float, default=50)
+    parser.add_argument("--twitter-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmarks/results.json")
+    parser.add_argument("--baseline", help="JSON de baseline contra el cual comparar")
+    parser.add_argument("--save-baseline", help="Guardar también los resultados como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Regresión relativa tolerada (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"Escenarios desconocidos: {', '.join(unknown)}")
+        return 2
+
+    port = _free_port()
+    results: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "args": vars(args),
+            "settings": {
+                "ANALYSIS_BATCH_SIZE": settings.ANALYSIS_BATCH_SIZE,
+                "LLM_MAX_IN_FLIGHT": settings.LLM_MAX_IN_FLIGHT,
+                "COMMENTS_MAX_WORKERS": settings.COMMENTS_MAX_WORKERS,
+            },
+        },
+        "scenarios": {},
+    }
+
+    install_fakes(args)
+    with _Server(port):
+        for name in names:
+            results["scenarios"][name] = []
+            for concurrency in levels:
+                level = asyncio.run(run_level(f"http://127.0.0.1:{port}", SCENARIOS[name], concurrency, args.requests))
+                results["scenarios"][name].append(level)
+                print(f"{name:16s} c={concurrency:<3d} p50={level['latency_ms']['p50']:>8} ms  "
+                      f"p95={level['latency_ms']['p95']:>8} ms  p99={level['latency_ms']['p99']:>8} ms  "
+                      f"{level['throughput_rps']:>7} rps  errores={level['errors']}")
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regresiones detectadas:")
+            for line in regressions:
+                print(f" - {line}")
+            return 1
+        print("Sin regresiones respecto al baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+# benchmarks/startup.py
+"""
+Benchmark de arranque en frío (serverless).
+
+Cada corrida es un intérprete nuevo que mide: importar `app.main`, el arranque (lifespan)
+y la primera request a `/` y a la recolección mock, llamando a la app ASGI directamente.
+También verifica que tweepy y openai no se hayan importado para esas requests.
+Falla (código 1) si la mediana supera el presupuesto.
+
+Uso:
+    python -m benchmarks.startup --runs 5 --import-budget-ms 1500 --first-request-budget-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Módulos que no deberían cargarse para `/` ni para el modo mock
+LAZY_MODULES = ("tweepy", "openai")
+
+
+def _scope(path: str, query: str = "") -> Dict[str, Any]:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 50000), "server": ("benchmark", 80),
+    }
+
+
+async def _request(app, path: str, query: str = "") -> Tuple[int, float]:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    started = time.perf_counter()
+    await app(_scope(path, query), receive, send)
+    return status, (time.perf_counter() - started) * 1000
+
+
+async def _lifespan(app, events: asyncio.Queue, done: asyncio.Queue) -> None:
+    async def receive():
+        return await events.get()
+
+    async def send(message):
+        await done.put(message["type"])
+
+    await app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send)
+
+
+async def _probe_requests(app) -> Dict[str, Any]:
+    events: asyncio.Queue = asyncio.Queue()
+    done: asyncio.Queue = asyncio.Queue()
+    lifespan = asyncio.create_task(_lifespan(app, events, done))
+
+    started = time.perf_counter()
+    await events.put({"type": "lifespan.startup"})
+    await done.get()
+    startup_ms = (time.perf_counter() - started) * 1000
+
+    root_status, root_ms = await _request(app, "/")
+    mock_status, mock_ms = await _request(app, "/social/collect/twitter", "username=benchmark&mock=true&max_results=20")
+
+    await events.put({"type": "lifespan.shutdown"})
+    await done.get()
+    await lifespan
+    return {
+        "startup_ms": round(startup_ms, 2),
+        "first_request_ms": round(root_ms, 2),
+        "first_mock_request_ms": round(mock_ms, 2),
+        "statuses": [root_status, mock_status],
+    }
+
+
+def probe() -> Dict[str, Any]:
+    """
+    Se ejecuta en un intérprete nuevo: mide el import y las primeras requests.
+    """
+    started = time.perf_counter()
+    from app.main import app
+
+    import_ms = (time.perf_counter() - started) * 1000
+    result = asyncio.run(_probe_requests(app))
+    from app.providers import registry
+
+    return {
+        "import_ms": round(import_ms, 2),
+        **result,
+        "eager_modules": [name for name in LAZY_MODULES if name in sys.modules],
+        "providers_created": registry.created(),
+    }
+
+
+def run_probe(data_dir: str) -> Dict[str, Any]:
+    env = {
+        **os.environ,
+        "CACHE_ENABLED": "false",
+        "STORAGE_SQLITE_PATH": os.path.join(data_dir, "store.sqlite3"),
+        "WATERMARK_SQLITE_PATH": os.path.join(data_dir, "watermarks.sqlite3"),
+        "JOBS_SQLITE_PATH": os.path.join(data_dir, "jobs.sqlite3"),
+    }
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--probe"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check_budget(summary: Dict[str, Any], import_budget_ms: float, first_request_budget_ms: float) -> List[str]:
+    failures = []
+    if summary["import_ms"] > import_budget_ms:
+        failures.append(f"import: {summary['import_ms']:.1f} ms > {import_budget_ms:.0f} ms")
+    first_request = summary["startup_ms"] + summary["first_request_ms"]
+    if first_request > first_request_budget_ms:
+        failures.append(f"arranque + primera request: {first_request:.1f} ms > {first_request_budget_ms:.0f} ms")
+    if summary["eager_modules"]:
+        failures.append(f"módulos importados sin necesidad: {', '.join(summary['eager_modules'])}")
+    if any(status != 200 for status in summary["statuses"]):
+        failures.append(f"respuestas inesperadas: {summary['statuses']}")
+    return failures
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío de SentiData")
+    parser.add_argument("--runs", type=int, default=5, help="Intérpretes nuevos a medir (se usa la mediana)")
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--first-request-budget-ms", type=float, default=300,
+                        help="Presupuesto para arranque (lifespan) + primera request a /")
+    parser.add_argument("--output", help="Guardar los resultados en este JSON")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.probe:
+        print(json.dumps(probe()))
+        return 0
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="sentidata-startup-") as data_dir:
+            runs.append(run_probe(data_dir))
+
+    summary: Dict[str, Any] = {
+        key: round(statistics.median(run[key] for run in runs), 2)
+        for key in ("import_ms", "startup_ms", "first_request_ms", "first_mock_request_ms")
+    }
+    summary["eager_modules"] = sorted({name for run in runs for name in run["eager_modules"]})
+    summary["providers_created"] = sorted({name for run in runs for name in run["providers_created"]})
+    summary["statuses"] = [status for run in runs for status in run["statuses"]]
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+
+    failures = check_budget(summary, args.import_budget_ms, args.first_request_budget_ms)
+    for failure in failures:
+        print(f"PRESUPUESTO EXCEDIDO: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
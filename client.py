@@ -1,25 +1,15 @@
-# client_with_comments.py
-import requests
+# client.py
+"""
+Ejemplo de uso del SDK (`sentidata_client`) contra un servidor en marcha:
+recolecta tweets de varias cuentas a la vez, los clasifica y adjunta sus comentarios.
+"""
+import asyncio
 from datetime import datetime, timedelta
-from app.modules.social.comments_service import get_mock_comments
+from typing import Dict, List
 
-BASE_URL = "http://127.0.0.1:8000"
+from sentidata_client import AsyncSentiDataClient
 
-def get_tweets(username: str, start_date: str, end_date: str, max_results: int = 5, mock: bool = True):
-    """
-    Recupera tweets desde el endpoint /social/collect/twitter
-    """
-    params = {
-        "username": username,
-        "start_date": start_date,
-        "end_date": end_date,
-        "max_results": max_results,
-        "mock": mock
-    }
-    response = requests.get(f"{BASE_URL}/social/collect/twitter", params=params)
-    response.raise_for_status()
-    data = response.json()
-    return data.get("data", {}).get("data", [])  # lista de tweets
+BASE_URL = "http://127.0.0.1:8000"
 
 
 def analyze_texts(texts: list):
@@ -29,49 +19,55 @@ def analyze_texts(texts: list):
     return ["RELEVANTE" for _ in texts]
 
 
-def pipeline_example(username: str, start_date: str, end_date: str, limit: int = 5):
-    print(f"Obteniendo tweets de @{username} desde {start_date} hasta {end_date}...")
-    tweets = get_tweets(username, start_date, end_date, max_results=limit)
-
-    if not tweets:
-        print("No se obtuvieron tweets.")
-        return []
-
-    tweet_ids = [tweet.get("id") for tweet in tweets]
-    texts = [tweet.get("text", "") for tweet in tweets if tweet.get("text")]
-    print(f"Analizando {len(texts)} tweets con LLM mock...")
-
-    classifications = analyze_texts(texts)
-
-    # Obtener comentarios mock para cada tweet
-    comments_dict = get_mock_comments(tweet_ids)
-
-    # Combinar los datos originales con la clasificación y comentarios
-    analyzed_tweets = []
-    for i, tweet in enumerate(tweets):
-        analyzed_tweets.append({
-            "id": tweet.get("id"),
-            "text": tweet.get("text"),
-            "created_at": tweet.get("created_at"),
-            "author_id": tweet.get("author_id"),
-            "public_metrics": tweet.get("public_metrics"),
-            "classification": classifications[i] if i < len(classifications) else "RELEVANTE",
-            "comments": comments_dict.get(tweet.get("id"), [])
-        })
-
-    return analyzed_tweets
+async def pipeline_example(usernames: List[str], start_date: str, end_date: str, limit: int = 5) -> Dict[str, List[Dict]]:
+    async with AsyncSentiDataClient(BASE_URL) as client:
+        print(f"Obteniendo tweets de {', '.join('@' + u for u in usernames)} desde {start_date} hasta {end_date}...")
+        responses = await client.collect_many(usernames, start_date=start_date, end_date=end_date, max_results=limit)
+
+        results: Dict[str, List[Dict]] = {}
+        for username, response in responses.items():
+            if isinstance(response, Exception):
+                print(f"@{username}: error al recolectar ({response})")
+                continue
+            tweets = response.get("data", {}).get("data", [])
+            if not tweets:
+                print(f"@{username}: no se obtuvieron tweets.")
+                continue
+
+            texts = [tweet.get("text", "") for tweet in tweets]
+            print(f"@{username}: analizando {len(texts)} tweets con LLM mock...")
+            classifications = analyze_texts(texts)
+
+            comments = (await client.collect_comments([tweet["id"] for tweet in tweets]))["data"]["comments"]
+
+            # Combinar los datos originales con la clasificación y comentarios
+            results[username] = [
+                {
+                    "id": tweet.get("id"),
+                    "text": tweet.get("text"),
+                    "created_at": tweet.get("created_at"),
+                    "author_id": tweet.get("author_id"),
+                    "public_metrics": tweet.get("public_metrics"),
+                    "classification": classification,
+                    "comments": comments.get(tweet.get("id"), []),
+                }
+                for tweet, classification in zip(tweets, classifications)
+            ]
+        return results
 
 
 if __name__ == "__main__":
     start = (datetime.utcnow() - timedelta(days=10)).isoformat()
     end = datetime.utcnow().isoformat()
 
-    results = pipeline_example("ministeriovivienda", start_date=start, end_date=end, limit=5)
-
-    for tweet in results:
-        print(f"Tweet: {tweet['text']}")
-        print(f"Clasificación: {tweet['classification']}")
-        print(f"Comentarios ({len(tweet['comments'])}):")
-        for comment in tweet['comments']:
-            print(f" - {comment['text']} (autor: {comment['author_id']})")
-        print("\n")
+    results = asyncio.run(pipeline_example(["ministeriovivienda", "munilima"], start_date=start, end_date=end, limit=5))
+
+    for username, tweets in results.items():
+        print(f"===== @{username} =====")
+        for tweet in tweets:
+            print(f"Tweet: {tweet['text']}")
+            print(f"Clasificación: {tweet['classification']}")
+            print(f"Comentarios ({len(tweet['comments'])}):")
+            for comment in tweet['comments']:
+                print(f" - {comment['text']} (autor: {comment['author_id']})")
+            print("\n")
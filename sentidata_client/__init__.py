@@ -0,0 +1,3 @@
+from sentidata_client.client import AsyncSentiDataClient, SentiDataClient, SentiDataError
+
+__all__ = ["AsyncSentiDataClient", "SentiDataClient", "SentiDataError"]
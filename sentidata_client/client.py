@@ -0,0 +1,393 @@
+# sentidata_client/client.py
+"""
+Cliente de la API de SentiData, en versión síncrona (`SentiDataClient`) y asyncio
+(`AsyncSentiDataClient`), con la misma interfaz.
+
+- Un pool de conexiones keep-alive compartido por cliente (httpx).
+- Reintentos con backoff exponencial y jitter (respetando `Retry-After`): los GET ante
+  errores de red, 429 y 502/503/504; los POST (no idempotentes) solo si la conexión no
+  llegó a establecerse o ante 429/503.
+- Consumo en streaming de las respuestas NDJSON y de los resultados paginados de jobs.
+- `collect_many` recolecta varias cuentas a la vez con concurrencia acotada.
+"""
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8000"
+RETRY_STATUSES = (429, 502, 503, 504)
+# Para métodos no idempotentes: el servidor rechazó la request sin procesarla
+SAFE_RETRY_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+FINAL_JOB_STATUSES = ("done", "failed", "cancelled")
+
+# (método, ruta, query params, cuerpo JSON)
+RequestSpec = Tuple[str, str, Dict[str, Any], Any]
+
+
+class SentiDataError(Exception):
+    """
+    Respuesta de error de la API (después de agotar los reintentos).
+    """
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"HTTP {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _clean(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.status_code < 400:
+        return
+    try:
+        detail = response.json().get("detail")
+    except (ValueError, AttributeError):
+        detail = response.text
+    raise SentiDataError(response.status_code, detail)
+
+
+class _BaseClient:
+    """
+    Configuración y armado de requests compartidos por ambos clientes.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: float = 60.0, max_retries: int = 4,
+                 backoff_seconds: float = 0.5, max_backoff_seconds: float = 30.0,
+                 max_connections: int = 32, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._client_kwargs = {
+            "base_url": self.base_url,
+            "timeout": timeout,
+            "headers": {"Accept-Encoding": "gzip", **(headers or {})},
+            "limits": httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        }
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff_seconds)
+            except ValueError:
+                pass
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+        return delay * (0.5 + random.random() / 2)
+
+    def _should_retry(self, attempt: int, method: str, response: Optional[httpx.Response] = None,
+                      error: Optional[Exception] = None) -> bool:
+        """
+        Un POST solo se repite si es seguro que no se procesó: error al conectar o 429/503.
+        """
+        if attempt >= self.max_retries:
+            return False
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if response is not None:
+            return response.status_code in (RETRY_STATUSES if idempotent else SAFE_RETRY_STATUSES)
+        return idempotent or isinstance(error, httpx.ConnectError)
+
+    # ---------------- requests de la API ----------------
+
+    @staticmethod
+    def _collect_tweets_spec(username: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                             max_results: int = 5, mock: bool = True, incremental: bool = False,
+                             pagination_token: Optional[str] = None, fields: Optional[str] = None) -> RequestSpec:
+        return "GET", "/social/collect/twitter", _clean({
+            "username": username, "start_date": start_date, "end_date": end_date, "max_results": max_results,
+            "mock": mock, "incremental": incremental, "pagination_token": pagination_token, "fields": fields,
+        }), None
+
+    @staticmethod
+    def _collect_comments_spec(tweet_ids: List[str], max_results: int = 20, mock: bool = True,
+                               incremental: bool = False, fields: Optional[str] = None) -> RequestSpec:
+        return "GET", "/social/collect/comments", _clean({
+            "tweet_ids": list(tweet_ids), "max_results": max_results, "mock": mock,
+            "incremental": incremental, "fields": fields,
+        }), None
+
+    @staticmethod
+    def _fanout_spec(usernames: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     max_results: Optional[int] = None, mock: bool = True, queue_pending: bool = True,
+                     fields: Optional[str] = None) -> RequestSpec:
+        return "POST", "/social/collect/twitter/fanout", _clean({
+            "start_date": start_date, "end_date": end_date, "max_results": max_results, "mock": mock,
+            "queue_pending": queue_pending, "fields": fields,
+        }), list(usernames)
+
+    @staticmethod
+    def _analyze_spec(texts: List[str], mode: str = "batch", **params: Any) -> RequestSpec:
+        return "POST", "/analysis/analyze/posts", _clean({"mode": mode, **params}), list(texts)
+
+    @staticmethod
+    def _tweet_stream_spec(username: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                           max_results: Optional[int] = None, page_size: int = 100, mock: bool = True,
+                           fields: Optional[str] = None) -> RequestSpec:
+        return "GET", "/social/collect/twitter/stream", _clean({
+            "username": username, "start_date": start_date, "end_date": end_date, "max_results": max_results,
+            "page_size": page_size, "mock": mock, "fields": fields,
+        }), None
+
+    @staticmethod
+    def _pipeline_spec(username: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       max_results: Optional[int] = None, mock: bool = True, include_comments: bool = True,
+                       max_comments: int = 5) -> RequestSpec:
+        return "GET", "/pipeline/twitter", _clean({
+            "username": username, "start_date": start_date, "end_date": end_date, "max_results": max_results,
+            "mock": mock, "include_comments": include_comments, "max_comments": max_comments,
+        }), None
+
+
+class SentiDataClient(_BaseClient):
+    """
+    Cliente síncrono. Usarlo como context manager (o llamar `close()`) para liberar el pool.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._http = httpx.Client(**self._client_kwargs)
+
+    def __enter__(self) -> "SentiDataClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._http.close()
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None, json_body: Any = None) -> Dict:
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self._http.request(method, path, params=params, json=json_body)
+            except httpx.TransportError as e:
+                if not self._should_retry(attempt, method, error=e):
+                    raise
+            else:
+                if not self._should_retry(attempt, method, response):
+                    _raise_for_status(response)
+                    return response.json()
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    def stream_lines(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                     json_body: Any = None) -> Iterator[Dict]:
+        """
+        Itera un endpoint NDJSON objeto por objeto. Se reintenta solo si falla antes de
+        recibir la primera línea (después no se podría reanudar sin duplicar datos).
+        """
+        attempt = 0
+        yielded = False
+        while True:
+            try:
+                with self._http.stream(method, path, params=params, json=json_body) as response:
+                    if self._should_retry(attempt, method, response):
+                        delay = self._delay(attempt, response)
+                    else:
+                        if response.status_code >= 400:
+                            response.read()
+                            _raise_for_status(response)
+                        for line in response.iter_lines():
+                            if line.strip():
+                                yielded = True
+                                yield json.loads(line)
+                        return
+            except httpx.TransportError as e:
+                if yielded or not self._should_retry(attempt, method, error=e):
+                    raise
+                delay = self._delay(attempt, None)
+            time.sleep(delay)
+            attempt += 1
+
+    # ---------------- API ----------------
+
+    def collect_tweets(self, username: str, **params: Any) -> Dict:
+        return self.request(*self._collect_tweets_spec(username, **params))
+
+    def collect_comments(self, tweet_ids: List[str], **params: Any) -> Dict:
+        return self.request(*self._collect_comments_spec(tweet_ids, **params))
+
+    def collect_many(self, usernames: Iterable[str], concurrency: int = 8, **params: Any) -> Dict[str, Any]:
+        """
+        Recolecta varias cuentas a la vez (hasta `concurrency` requests sobre el mismo pool).
+        Devuelve {username: respuesta o excepción}.
+        """
+        usernames = list(dict.fromkeys(usernames))
+
+        def collect(username: str) -> Any:
+            try:
+                return self.collect_tweets(username, **params)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            return dict(zip(usernames, executor.map(collect, usernames)))
+
+    def fanout(self, usernames: List[str], **params: Any) -> Dict:
+        return self.request(*self._fanout_spec(usernames, **params))
+
+    def analyze(self, texts: List[str], mode: str = "batch", **params: Any) -> Dict:
+        return self.request(*self._analyze_spec(texts, mode, **params))
+
+    def iter_tweet_pages(self, username: str, **params: Any) -> Iterator[Dict]:
+        return self.stream_lines(*self._tweet_stream_spec(username, **params))
+
+    def iter_tweets(self, username: str, **params: Any) -> Iterator[Dict]:
+        for page in self.iter_tweet_pages(username, **params):
+            if page.get("status") == "error":
+                raise SentiDataError(200, page)
+            yield from page.get("data") or []
+
+    def iter_pipeline(self, username: str, **params: Any) -> Iterator[Dict]:
+        return self.stream_lines(*self._pipeline_spec(username, **params))
+
+    def iter_job_results(self, job_id: str, page_size: int = 500, wait: bool = True,
+                         poll_interval: float = 2.0) -> Iterator[Dict]:
+        """
+        Recorre los resultados de un job por páginas. Con `wait` sigue consultando
+        hasta que el job termina.
+        """
+        offset = 0
+        while True:
+            page = self.request("GET", f"/jobs/{job_id}/results", {"offset": offset, "limit": page_size})
+            yield from page["results"]
+            offset += page["count"]
+            if page["next_offset"] is None:
+                if not wait or page["job_status"] in FINAL_JOB_STATUSES:
+                    return
+                time.sleep(poll_interval)
+
+
+class AsyncSentiDataClient(_BaseClient):
+    """
+    Cliente asyncio. Usarlo con `async with` (o llamar `aclose()`) para liberar el pool.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._http = httpx.AsyncClient(**self._client_kwargs)
+
+    async def __aenter__(self) -> "AsyncSentiDataClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json_body: Any = None) -> Dict:
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await self._http.request(method, path, params=params, json=json_body)
+            except httpx.TransportError as e:
+                if not self._should_retry(attempt, method, error=e):
+                    raise
+            else:
+                if not self._should_retry(attempt, method, response):
+                    _raise_for_status(response)
+                    return response.json()
+            await asyncio.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    async def stream_lines(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                           json_body: Any = None) -> AsyncIterator[Dict]:
+        """
+        Itera un endpoint NDJSON objeto por objeto. Se reintenta solo si falla antes de
+        recibir la primera línea (después no se podría reanudar sin duplicar datos).
+        """
+        attempt = 0
+        yielded = False
+        while True:
+            try:
+                async with self._http.stream(method, path, params=params, json=json_body) as response:
+                    if self._should_retry(attempt, method, response):
+                        delay = self._delay(attempt, response)
+                    else:
+                        if response.status_code >= 400:
+                            await response.aread()
+                            _raise_for_status(response)
+                        async for line in response.aiter_lines():
+                            if line.strip():
+                                yielded = True
+                                yield json.loads(line)
+                        return
+            except httpx.TransportError as e:
+                if yielded or not self._should_retry(attempt, method, error=e):
+                    raise
+                delay = self._delay(attempt, None)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    # ---------------- API ----------------
+
+    async def collect_tweets(self, username: str, **params: Any) -> Dict:
+        return await self.request(*self._collect_tweets_spec(username, **params))
+
+    async def collect_comments(self, tweet_ids: List[str], **params: Any) -> Dict:
+        return await self.request(*self._collect_comments_spec(tweet_ids, **params))
+
+    async def collect_many(self, usernames: Iterable[str], concurrency: int = 8, **params: Any) -> Dict[str, Any]:
+        """
+        Recolecta varias cuentas a la vez (hasta `concurrency` requests sobre el mismo pool).
+        Devuelve {username: respuesta o excepción}.
+        """
+        usernames = list(dict.fromkeys(usernames))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def collect(username: str) -> Any:
+            async with semaphore:
+                return await self.collect_tweets(username, **params)
+
+        results = await asyncio.gather(*(collect(u) for u in usernames), return_exceptions=True)
+        return dict(zip(usernames, results))
+
+    async def fanout(self, usernames: List[str], **params: Any) -> Dict:
+        return await self.request(*self._fanout_spec(usernames, **params))
+
+    async def analyze(self, texts: List[str], mode: str = "batch", **params: Any) -> Dict:
+        return await self.request(*self._analyze_spec(texts, mode, **params))
+
+    def iter_tweet_pages(self, username: str, **params: Any) -> AsyncIterator[Dict]:
+        return self.stream_lines(*self._tweet_stream_spec(username, **params))
+
+    async def iter_tweets(self, username: str, **params: Any) -> AsyncIterator[Dict]:
+        async for page in self.iter_tweet_pages(username, **params):
+            if page.get("status") == "error":
+                raise SentiDataError(200, page)
+            for tweet in page.get("data") or []:
+                yield tweet
+
+    def iter_pipeline(self, username: str, **params: Any) -> AsyncIterator[Dict]:
+        return self.stream_lines(*self._pipeline_spec(username, **params))
+
+    async def iter_job_results(self, job_id: str, page_size: int = 500, wait: bool = True,
+                               poll_interval: float = 2.0) -> AsyncIterator[Dict]:
+        """
+        Recorre los resultados de un job por páginas. Con `wait` sigue consultando
+        hasta que el job termina.
+        """
+        offset = 0
+        while True:
+            page = await self.request("GET", f"/jobs/{job_id}/results", {"offset": offset, "limit": page_size})
+            for item in page["results"]:
+                yield item
+            offset += page["count"]
+            if page["next_offset"] is None:
+                if not wait or page["job_status"] in FINAL_JOB_STATUSES:
+                    return
+                await asyncio.sleep(poll_interval)
@@ -0,0 +1,81 @@
+# tests/test_batch_service.py
+import asyncio
+import json
+
+from app.modules.analysis.analysis_service import LABEL_ERROR, LABEL_NOT_RELEVANT, LABEL_RELEVANT
+from app.modules.analysis.batch_service import (
+    StubChatModel,
+    build_batch_messages,
+    classify_batch,
+    classify_batch_async,
+    classify_relevance_batched,
+    parse_batch_labels,
+)
+
+MODEL = "gpt-4o-mini"
+
+
+def test_parse_batch_labels_accepts_objects_and_plain_lists():
+    content = json.dumps({"resultados": [{"indice": 1, "etiqueta": "no relevante"},
+                                         {"indice": 0, "etiqueta": "Relevante."}]})
+    assert parse_batch_labels(content, 2) == [LABEL_RELEVANT, LABEL_NOT_RELEVANT]
+    assert parse_batch_labels(json.dumps(["RELEVANTE", "NO"]), 2) == [LABEL_RELEVANT, LABEL_NOT_RELEVANT]
+
+
+def test_parse_batch_labels_leaves_invalid_entries_empty():
+    content = json.dumps({"resultados": [{"indice": 0, "etiqueta": "quizás"}, {"indice": 7, "etiqueta": "RELEVANTE"}]})
+    assert parse_batch_labels(content, 2) == [None, None]
+    assert parse_batch_labels("no es json", 3) == [None, None, None]
+
+
+def test_classify_batch_uses_one_call_per_batch():
+    stub = StubChatModel()
+    texts = ["nuevo programa de vivienda social", "resultado del partido", "bono techo propio"]
+    assert classify_batch(texts, MODEL, stub) == [LABEL_RELEVANT, LABEL_NOT_RELEVANT, LABEL_RELEVANT]
+    assert stub.calls == [3]
+
+
+def test_classify_batch_retries_only_missing_indices():
+    calls = []
+
+    def partial(messages, model):
+        calls.append(messages)
+        # Primera llamada: falta el índice 1; el reintento responde el lote reducido
+        if len(calls) == 1:
+            return json.dumps({"resultados": [{"indice": 0, "etiqueta": "RELEVANTE"},
+                                              {"indice": 2, "etiqueta": "NO RELEVANTE"}]})
+        return json.dumps({"resultados": [{"indice": 0, "etiqueta": "RELEVANTE"}]})
+
+    assert classify_batch(["a", "b", "c"], MODEL, partial) == [LABEL_RELEVANT, LABEL_RELEVANT, LABEL_NOT_RELEVANT]
+    assert len(calls) == 2
+    assert calls[1] == build_batch_messages(["b"])
+
+
+def test_classify_batch_async_retries_only_missing_indices():
+    calls = []
+
+    async def partial(messages, model):
+        calls.append(messages)
+        if len(calls) == 1:
+            return json.dumps({"resultados": [{"indice": 1, "etiqueta": "NO RELEVANTE"}]})
+        raise RuntimeError("timeout")
+
+    labels = asyncio.run(classify_batch_async(["a", "b"], MODEL, partial))
+    assert labels == [LABEL_ERROR, LABEL_NOT_RELEVANT]
+    assert calls[1] == build_batch_messages(["a"])
+
+
+def test_classify_batch_marks_errors_when_the_model_fails():
+    def broken(messages, model):
+        raise RuntimeError("timeout")
+
+    assert classify_batch(["a", "b"], MODEL, broken) == [LABEL_ERROR, LABEL_ERROR]
+
+
+def test_classify_relevance_batched_splits_by_batch_size_and_deduplicates():
+    stub = StubChatModel()
+    texts = [f"vivienda {i}" for i in range(7)] + ["vivienda 0"]
+    labels = classify_relevance_batched(texts, MODEL, batch_size=3, chat_model=stub, use_cache=False)
+    assert labels == [LABEL_RELEVANT] * 8
+    # Los lotes corren en paralelo: el orden de las llamadas no está garantizado
+    assert sorted(stub.calls) == [1, 3, 3]
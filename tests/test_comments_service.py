@@ -0,0 +1,101 @@
+# tests/test_comments_service.py
+import re
+from types import SimpleNamespace
+
+from app.modules.social import comments_service
+from app.modules.social.comments_service import _search_conversations, build_conversation_queries, get_real_comments
+from app.modules.social.watermark_service import SCOPE_CONVERSATION, WatermarkStore
+
+
+class FakeSearchClient:
+    """
+    Búsqueda reciente simulada: filtra por las conversaciones de la consulta, `since_id`
+    y `until_id`, del más reciente al más antiguo, y pagina con `next_token`.
+    """
+
+    def __init__(self, replies):
+        self.replies = sorted(replies, key=lambda r: -int(r["id"]))
+        self.calls = []
+
+    def get_tweets(self, ids, tweet_fields=None):
+        return SimpleNamespace(data=[{"id": i, "conversation_id": i, "author_id": "5"} for i in ids])
+
+    def search_recent_tweets(self, query, max_results, next_token=None, since_id=None, until_id=None, **kwargs):
+        self.calls.append({"query": query, "until_id": until_id, "next_token": next_token})
+        conversations = set(re.findall(r"conversation_id:(\d+)", query))
+        matches = [
+            r for r in self.replies
+            if r["conversation_id"] in conversations
+            and (since_id is None or int(r["id"]) > int(since_id))
+            and (until_id is None or int(r["id"]) < int(until_id))
+        ]
+        start = int(next_token or 0)
+        page = matches[start:start + max_results]
+        meta = {"next_token": str(start + max_results)} if start + max_results < len(matches) else {}
+        return SimpleNamespace(data=page, meta=meta)
+
+
+def _replies(conversation_id, ids):
+    return [{"id": str(i), "conversation_id": conversation_id, "text": "r", "author_id": "9",
+             "created_at": "2026-01-01T00:00:00.000Z"} for i in ids]
+
+
+def test_quiet_conversation_does_not_drain_the_busy_one():
+    # La conversación 1 tiene 1000 respuestas recientes; la 2, una sola y antigua
+    client = FakeSearchClient(_replies("1", range(2000, 3000)) + _replies("2", [10]))
+    query = build_conversation_queries({"1": "5", "2": "5"})[0]
+
+    results, exhausted, _ = _search_conversations(client, query, max_per_conversation=20)
+
+    by_conversation = {}
+    for reply in results:
+        by_conversation.setdefault(reply["conversation_id"], []).append(reply["id"])
+    assert len(by_conversation["1"]) == 20
+    assert by_conversation["2"] == ["10"]
+    assert exhausted == {"2"}
+    # Tras completar la conversación 1 la consulta se rearma solo con la 2
+    assert len(client.calls) == 2
+    assert client.calls[1]["query"] == "conversation_id:2 -from:5"
+    assert client.calls[1]["until_id"] is not None
+
+
+def test_all_conversations_exhausted_when_results_run_out():
+    client = FakeSearchClient(_replies("1", range(100, 105)) + _replies("2", range(200, 203)))
+    query = build_conversation_queries({"1": "5", "2": "5"})[0]
+
+    results, exhausted, _ = _search_conversations(client, query, max_per_conversation=20)
+
+    assert len(results) == 8
+    assert exhausted == {"1", "2"}
+    assert len(client.calls) == 1
+
+
+def test_incremental_polling_resumes_busy_threads_without_gaps(tmp_path, monkeypatch):
+    client = FakeSearchClient(_replies("1", range(100, 150)))
+    store = WatermarkStore(str(tmp_path / "watermarks.sqlite3"))
+    monkeypatch.setattr(comments_service, "get_twitter_client", lambda token: client)
+    monkeypatch.setattr(comments_service, "get_watermark_store", lambda: store)
+
+    def poll():
+        response = get_real_comments(["1"], "token", max_results=20, incremental=True)
+        return [c["id"] for c in response["comments"]["1"]], response["incremental"]
+
+    # Primera recolección: línea base en la respuesta más nueva
+    poll()
+    assert store.get(SCOPE_CONVERSATION, "1")["newest_id"] == "149"
+
+    # 40 respuestas nuevas con tope 20: se devuelven las más nuevas y queda un hueco
+    client.replies = sorted(client.replies + _replies("1", range(150, 190)), key=lambda r: -int(r["id"]))
+    second, report = poll()
+    assert second == [str(i) for i in range(189, 169, -1)]
+    assert report["pending"] == 1
+    assert store.get(SCOPE_CONVERSATION, "1")["newest_id"] == "149"
+
+    # La siguiente recolección cubre el hueco y la marca salta a la más nueva
+    third, report = poll()
+    assert third == [str(i) for i in range(169, 149, -1)]
+    assert report["advanced"] == 1
+    assert store.get(SCOPE_CONVERSATION, "1")["newest_id"] == "189"
+
+    fourth, _ = poll()
+    assert fourth == []
@@ -0,0 +1,99 @@
+# tests/test_job_service.py
+import asyncio
+
+from app.modules.jobs import job_service
+from app.modules.jobs.job_service import (
+    STATUS_CANCELLED,
+    STATUS_DONE,
+    STATUS_QUEUED,
+    JobDeferred,
+    JobManager,
+    JobStore,
+)
+
+
+async def _wait_for(store: JobStore, job_id: str, statuses, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = store.get(job_id)
+        if job["status"] in statuses or asyncio.get_running_loop().time() > deadline:
+            return job
+        await asyncio.sleep(0.01)
+
+
+def test_final_status_does_not_overwrite_cancellation_from_another_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    owner_store, other_store = JobStore(path), JobStore(path)
+    job_id = owner_store.create("classify", {"texts": ["a"]})
+    assert owner_store.claim(job_id, "owner")
+
+    assert other_store.cancel(job_id)
+
+    assert not owner_store.append_results(job_id, "owner", [{"index": 0}], 1, 1)
+    assert not owner_store.finish(job_id, "owner", STATUS_DONE)
+    job = owner_store.get(job_id)
+    assert job["status"] == STATUS_CANCELLED and job["results_available"] == 0
+    assert owner_store.lost([job_id], "owner") == [job_id]
+
+
+def test_runner_stops_when_cancelled_elsewhere(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.db")
+    reports = []
+
+    async def endless(params, report):
+        while True:
+            await report([{"n": len(reports)}], len(reports), None)
+            reports.append(1)
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setitem(job_service.RUNNERS, "endless", endless)
+
+    async def scenario():
+        manager = JobManager(JobStore(path), workers=1)
+        job = await manager.submit("endless", {})
+        await asyncio.sleep(0.05)
+        JobStore(path).cancel(job["id"])
+        final = await _wait_for(manager.store, job["id"], (STATUS_CANCELLED,))
+        await asyncio.sleep(0.05)
+        seen = len(reports)
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return final, seen
+
+    final, seen = asyncio.run(scenario())
+    assert final["status"] == STATUS_CANCELLED
+    assert len(reports) == seen
+
+
+def test_deferred_job_is_requeued_without_holding_a_worker(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.db")
+    runs = []
+
+    async def deferring(params, report):
+        runs.append(params.get("round", 0))
+        if params.get("round", 0) == 0:
+            raise JobDeferred({**params, "round": 1}, 0.2)
+        await report([{"round": params["round"]}], 1, 1)
+
+    async def quick(params, report):
+        await report([{"quick": True}], 1, 1)
+
+    monkeypatch.setitem(job_service.RUNNERS, "deferring", deferring)
+    monkeypatch.setitem(job_service.RUNNERS, "quick", quick)
+
+    async def scenario():
+        manager = JobManager(JobStore(path), workers=1)
+        deferred = await manager.submit("deferring", {})
+        await asyncio.sleep(0.05)
+        waiting = manager.store.get(deferred["id"])
+        # El único worker queda libre mientras el job diferido espera su not_before
+        quick_job = await manager.submit("quick", {})
+        quick_final = await _wait_for(manager.store, quick_job["id"], (STATUS_DONE,), timeout=0.15)
+        final = await _wait_for(manager.store, deferred["id"], (STATUS_DONE,))
+        await manager.stop()
+        return waiting, quick_final, final
+
+    waiting, quick_final, final = asyncio.run(scenario())
+    assert waiting["status"] == STATUS_QUEUED and waiting["params"]["round"] == 1
+    assert quick_final["status"] == STATUS_DONE
+    assert final["status"] == STATUS_DONE and runs == [0, 1]
@@ -0,0 +1,52 @@
+# tests/test_prefilter_service.py
+import numpy as np
+import pytest
+
+from app.modules.analysis import prefilter_service
+from app.modules.analysis.analysis_service import LABEL_NOT_RELEVANT, LABEL_RELEVANT
+from app.modules.analysis.prefilter_service import LinearPrefilter, resolve_thresholds, train_prefilter
+
+ON_TOPIC = [
+    "Entregamos 120 bonos del programa Techo Propio a familias de Comas.",
+    "Avanzan las obras de agua potable y alcantarillado en Piura: 80% de ejecución.",
+    "¿Cómo postulo al bono Mivivienda?",
+    "¿Cuándo llega el agua potable a Puno?",
+]
+OFF_TOPIC = [
+    "Feria de emprendimiento local este sábado en Surco. ¡Te esperamos!",
+    "Sembramos 200 nuevos árboles en Cusco.",
+    "Torneo interdistrital en Piura: 8 equipos inscritos.",
+    "¡Excelente iniciativa!",
+]
+
+
+def test_default_prefilter_decides_clear_cases_locally():
+    low, high = resolve_thresholds()
+    labels, _ = LinearPrefilter().decide(ON_TOPIC + OFF_TOPIC, low, high)
+    assert labels == [LABEL_RELEVANT] * len(ON_TOPIC) + [LABEL_NOT_RELEVANT] * len(OFF_TOPIC)
+
+
+def test_default_prefilter_leaves_weak_evidence_to_the_llm():
+    low, high = resolve_thresholds()
+    labels, _ = LinearPrefilter().decide(["Seguimos con la obra en el distrito."], low, high)
+    assert labels == [None]
+
+
+def test_train_prefilter_saves_and_activates_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(prefilter_service, "_prefilter", None)
+    texts = ["Se inauguró el mercado modelo de Ate."] * 5 + ["Concierto gratuito en el mercado de Ate."] * 5
+    labels = [LABEL_RELEVANT] * 5 + [LABEL_NOT_RELEVANT] * 5
+    path = str(tmp_path / "prefilter.npz")
+
+    result = train_prefilter(texts, labels, epochs=50, path=path)
+
+    assert result["examples"] == 10 and result["relevant"] == 5
+    model = prefilter_service.get_prefilter()
+    proba = model.predict_proba(texts[:1] + texts[-1:])
+    assert proba[0] > proba[1]
+    np.testing.assert_allclose(LinearPrefilter.load(path).predict_proba(texts), model.predict_proba(texts))
+
+
+def test_train_prefilter_requires_both_classes(tmp_path):
+    with pytest.raises(ValueError):
+        train_prefilter(["vivienda"], [LABEL_RELEVANT], path=str(tmp_path / "p.npz"))
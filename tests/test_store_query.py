@@ -0,0 +1,41 @@
+# tests/test_store_query.py
+import pytest
+
+from app.modules.storage.store_service import LocalStore, encode_cursor
+
+
+def test_cursor_pagination_includes_rows_without_created_at(tmp_path):
+    store = LocalStore(str(tmp_path / "store.sqlite3"))
+    tweets = [{"id": str(i), "created_at": f"2026-01-0{i % 3 + 1}T10:00:00" if i % 2 else None}
+              for i in range(1, 10)]
+    store.upsert_tweets(tweets, username="acc", source="mock")
+
+    seen, cursor = [], None
+    while True:
+        page = store.query("tweets", limit=2, cursor=cursor)
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(t["id"] for t in tweets)
+    assert len(seen) == len(set(seen))
+    # Las filas sin fecha van al final
+    assert all(store.query("tweets", limit=20)["items"][i]["created_at"] is None for i in range(5, 9))
+
+
+@pytest.mark.parametrize("table, filters", [
+    ("tweets", {}),
+    ("tweets", {"label": "RELEVANTE"}),
+    ("tweets", {"username": "acc"}),
+    ("comments", {"tweet_id": "t1"}),
+    ("comments", {"label": "RELEVANTE"}),
+])
+def test_query_pages_are_served_by_an_index(tmp_path, table, filters):
+    store = LocalStore(str(tmp_path / "store.sqlite3"))
+    cursor = encode_cursor("2026-01-01T10:00:00.000Z", "5")
+    for start_date in (None, "2025-12-01"):
+        sql, params = store._query_sql(table, start_date, None, 101, cursor, filters)
+        plan = " ".join(row[3] for row in store._conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        assert "USING INDEX" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,46 @@
+# tests/test_twitter_service.py
+from types import SimpleNamespace
+
+from app.modules.social import twitter_service
+from app.modules.social.twitter_service import get_real_tweets
+from app.modules.social.watermark_service import SCOPE_USER, WatermarkStore
+
+
+class FakeTimelineClient:
+    """
+    Línea de tiempo de 12 tweets servida en páginas; `next_token` es el offset.
+    """
+
+    def __init__(self):
+        self.tokens = []
+        self.tweets = [{"id": str(200 - i), "text": f"tweet {i}", "created_at": f"2024-05-01T{i:02d}:00:00.000Z"}
+                       for i in range(12)]
+
+    def get_user(self, username, user_fields=None):
+        return SimpleNamespace(data=SimpleNamespace(id="1", username=username))
+
+    def get_users_tweets(self, id, max_results, pagination_token=None, **kwargs):
+        self.tokens.append(pagination_token)
+        offset = int(pagination_token or 0)
+        page = self.tweets[offset:offset + max_results]
+        meta = {"result_count": len(page)}
+        if offset + max_results < len(self.tweets):
+            meta["next_token"] = str(offset + max_results)
+        return SimpleNamespace(data=page, includes={}, meta=meta)
+
+
+def test_real_tweets_resume_from_pagination_token(tmp_path, monkeypatch):
+    client = FakeTimelineClient()
+    store = WatermarkStore(str(tmp_path / "watermarks.sqlite3"))
+    monkeypatch.setattr(twitter_service, "get_twitter_client", lambda token: client)
+    monkeypatch.setattr(twitter_service, "get_watermark_store", lambda: store)
+
+    first = get_real_tweets("vivienda", "2024-05-01", "2024-05-02", "token", max_results=5)
+    second = get_real_tweets("vivienda", "2024-05-01", "2024-05-02", "token", max_results=5,
+                             incremental=True, pagination_token=first["meta"]["next_token"])
+
+    assert client.tokens == [None, "5"]
+    assert [t["id"] for t in second["data"]] == [t["id"] for t in client.tweets[5:10]]
+    # Una página intermedia no cubre lo nuevo desde la marca: la marca no avanza
+    assert not second["incremental"]["watermark_advanced"]
+    assert store.get(SCOPE_USER, "vivienda") is None